@@ -0,0 +1,118 @@
+"""Compare JSON codecs and the compact store format.
+
+Usage::
+
+    python benchmarks/codec_bench.py [--minions 5000] [--repeat 5]
+
+Times encode and decode of a synthetic ``data.json`` store and of a typical
+gateway response frame with every installed codec. It then times a full
+write and re-read of the store through ``JsonFileBackend``, indented and
+compact, and reports the file sizes. Install ``orjson`` (or
+``pip install minions-openclaw[fast]``) to see the fast path.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Run from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from minions_openclaw.codec import get_codec, set_codec
+from minions_openclaw.storage import JsonFileBackend
+from minions_openclaw.storage.document import Document
+
+
+def make_store(n: int) -> Dict[str, Any]:
+    minions = [{
+        'id': f'minion-{i:06d}',
+        'title': f'Instance {i}',
+        'minionTypeId': 'openclaw-snapshot',
+        'fields': {
+            'instanceId': f'instance-{i % 50}',
+            'capturedAt': '2026-10-01T12:00:00+00:00',
+            'configHash': f'{i:064x}',
+            'config': '{"agents":[{"name":"main","model":"claude"}],"port":18789}',
+        },
+        'createdAt': '2026-10-01T12:00:00+00:00',
+        'updatedAt': '2026-10-01T12:00:00+00:00',
+        'tags': ['snapshot'],
+        'status': 'active',
+        'priority': 'medium',
+        'description': '',
+    } for i in range(n)]
+    relations = [{
+        'id': f'rel-{i:06d}', 'sourceId': f'minion-{i:06d}', 'targetId': f'minion-{i + 1:06d}', 'type': 'follows',
+    } for i in range(n - 1)]
+    return {'minions': minions, 'relations': relations}
+
+
+def make_frame() -> Dict[str, Any]:
+    return {'type': 'result', 'id': 'call-1', 'payload': {'items': [
+        {'id': f'agent-{i}', 'name': f'agent {i}', 'model': 'claude', 'tools': ['read', 'write'], 'enabled': True}
+        for i in range(50)
+    ]}}
+
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def available_codecs() -> List[str]:
+    names = []
+    for name in ('stdlib', 'orjson', 'msgspec'):
+        try:
+            get_codec(name)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minions', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    store = make_store(args.minions)
+    frame = make_frame()
+    print(f"{'codec':<10}{'store enc':>12}{'store dec':>12}{'frame enc':>12}{'frame dec':>12}   (ms, best of {args.repeat})")
+    for name in available_codecs():
+        codec = get_codec(name)
+        store_bytes = codec.dumps(store)
+        frame_bytes = codec.dumps(frame)
+        frame_text = frame_bytes.decode()
+        print(f"{name:<10}"
+              f"{best_ms(lambda: codec.dumps(store), args.repeat):>12.2f}"
+              f"{best_ms(lambda: codec.loads(store_bytes), args.repeat):>12.2f}"
+              f"{best_ms(lambda: [codec.dumps(frame) for _ in range(100)], args.repeat) / 100:>12.4f}"
+              f"{best_ms(lambda: [codec.loads(frame_text) for _ in range(100)], args.repeat) / 100:>12.4f}")
+
+    print(f"\n{'store file':<22}{'size KiB':>10}{'write':>10}{'read':>10}   (ms)")
+    for name in available_codecs():
+        previous = set_codec(name)
+        try:
+            for compact in (False, True):
+                with tempfile.TemporaryDirectory() as tmp:
+                    backend = JsonFileBackend(Path(tmp) / 'data.json', compact_json=compact)
+                    doc = Document(store)
+                    write = best_ms(lambda: backend._persist([], doc), args.repeat)
+                    read = best_ms(backend._parse, args.repeat)
+                    size = backend.path.stat().st_size / 1024
+                label = f"{name}/{'compact' if compact else 'indented'}"
+                print(f"{label:<22}{size:>10.0f}{write:>10.1f}{read:>10.1f}")
+        finally:
+            set_codec(previous)
+
+
+if __name__ == '__main__':
+    main()
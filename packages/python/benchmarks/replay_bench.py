@@ -0,0 +1,89 @@
+"""Replay recorded gateway traffic through GatewayClient as fast as possible.
+
+Usage::
+
+    python benchmarks/replay_bench.py [recording.ndjson] [--repeat 5]
+
+Without a recording, a synthetic session is recorded first against a
+``MockGateway`` with large list payloads and bursts of push events. The
+recording is then replayed at full speed through a fresh client, re-issuing
+the recorded calls of its first connection, and the time until every frame
+has been dispatched is reported. A parse-only pass with the active codec is
+timed separately, so dispatcher and parser changes can be told apart.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+# Run from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from minions_openclaw.codec import current_codec
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.recording import Recording, TrafficRecorder
+from minions_openclaw.testing import MockGateway
+
+
+async def record_synthetic(path: Path) -> None:
+    gateway = MockGateway(items=500, item_bytes=512)
+    with TrafficRecorder(path, url='ws://synthetic') as recorder:
+        client = GatewayClient('ws://synthetic', connect=gateway.connect, recorder=recorder)
+        await client.open_connection()
+        for _ in range(5):
+            await client.fetch_presence()
+            for i in range(200):
+                await gateway.push('presence', {'seq': i, 'online': True})
+            await asyncio.sleep(0.01)
+        await client.close()
+
+
+async def replay_once(recording: Recording) -> float:
+    frames = sum(1 for _ in recording.incoming())
+    client = GatewayClient('ws://replay', connect=recording.connector(speed=None))
+    start = time.perf_counter()
+    await client.open_connection()
+    await asyncio.gather(*(client.call(method, params, use_cache=False) for method, params in recording.calls()))
+    # Pushes after the last response are still being dispatched
+    while client.metrics.frames_in < frames and client.connected:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return elapsed
+
+
+def main(path: Optional[str], repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        if path is None:
+            path = str(Path(tmp) / 'synthetic.ndjson')
+            asyncio.run(record_synthetic(Path(path)))
+        recording = Recording.load(path)
+        size = Path(path).stat().st_size
+    frames = list(recording.incoming())
+    total = sum(len(f) for f in frames)
+    print(f"{len(recording.connections)} connection(s), {len(frames)} frames received, "
+          f"{total / 1024:.0f} KiB payload, {size / 1024:.0f} KiB on disk")
+
+    codec = current_codec()
+    parse = min(_timed(lambda: [codec.loads(f) for f in frames]) for _ in range(repeat))
+    replay = min(asyncio.run(replay_once(recording)) for _ in range(repeat))
+    print(f"parse only ({codec.name}):  {parse * 1000:8.1f} ms  {total / parse / 2**20:7.1f} MiB/s")
+    print(f"full replay:           {replay * 1000:8.1f} ms  {len(frames) / replay:7.0f} frames/s")
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording', nargs='?')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.recording, args.repeat)
@@ -21,10 +21,31 @@ from .types import (
     openclaw_ui_config_type,
     ALL_TYPES,
 )
-from .instance_manager import InstanceManager
+from .instance_manager import InstanceManager, VacuumReport
 from .config_decomposer import ConfigDecomposer
 from .snapshot_manager import SnapshotManager
-from .gateway_client import GatewayClient
+from .retention import RetentionPolicy, PruneReport
+from .gateway_client import ConnectionStats, FrameTooLarge, GatewayClient, GatewayError, ReconnectPolicy
+from .circuit_breaker import BreakerRegistry, CircuitBreaker, CircuitOpenError
+from .rate_limit import TokenBucket
+from .codec import JsonCodec, current_codec, get_codec, set_codec
+from .deadline import Deadline, DeadlineExceeded, current_deadline
+from .health import HealthCheck, HealthCheckScheduler
+from .metrics import ClientMetrics, LatencyHistogram
+from .recording import Recording, TrafficRecorder
+from .response_cache import CacheStats, ResponseCache
+from .signing import ChallengeSigner, SigningError
+from .subscription import Subscription, SubscriptionOverflow
+from .gateway_pool import GatewayPool, PoolStats
+from .fleet import FleetCollector, FleetReport, InstanceResult
+from .storage import (
+    StorageBackend,
+    JsonFileBackend,
+    JournalBackend,
+    SqliteBackend,
+    ShardedBackend,
+    migrate_json_to_sqlite,
+)
 from minions import (
     Minion,
     MinionType,
@@ -62,9 +83,50 @@ __all__ = [
     'openclaw_ui_config_type',
     'ALL_TYPES',
     'InstanceManager',
+    'VacuumReport',
     'ConfigDecomposer',
     'SnapshotManager',
+    'RetentionPolicy',
+    'PruneReport',
     'GatewayClient',
+    'GatewayError',
+    'FrameTooLarge',
+    'ReconnectPolicy',
+    'ConnectionStats',
+    'Subscription',
+    'SubscriptionOverflow',
+    'ChallengeSigner',
+    'SigningError',
+    'ResponseCache',
+    'CacheStats',
+    'ClientMetrics',
+    'LatencyHistogram',
+    'HealthCheckScheduler',
+    'HealthCheck',
+    'Deadline',
+    'DeadlineExceeded',
+    'current_deadline',
+    'JsonCodec',
+    'get_codec',
+    'set_codec',
+    'current_codec',
+    'TrafficRecorder',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'BreakerRegistry',
+    'TokenBucket',
+    'Recording',
+    'GatewayPool',
+    'PoolStats',
+    'FleetCollector',
+    'FleetReport',
+    'InstanceResult',
+    'StorageBackend',
+    'JsonFileBackend',
+    'JournalBackend',
+    'SqliteBackend',
+    'ShardedBackend',
+    'migrate_json_to_sqlite',
     'Minion',
     'MinionType',
     'Relation',
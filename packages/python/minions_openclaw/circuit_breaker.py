@@ -0,0 +1,156 @@
+"""Circuit breakers that stop traffic to gateways that keep failing."""
+from __future__ import annotations
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+from minions import Minion
+from .rate_limit import TokenBucket
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Instance ``status`` while its breaker is open or half-open
+CIRCUIT_OPEN_STATUS = 'circuit-open'
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class CircuitOpenError(ConnectionError):
+    """The breaker is open; the gateway was not contacted."""
+
+    def __init__(self, retry_at: float) -> None:
+        super().__init__(f"Circuit open until {_iso(retry_at)}")
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one gateway.
+
+    ``failure_threshold`` consecutive failures open the breaker, and while
+    it is open :meth:`allow` raises :class:`CircuitOpenError` straight away.
+    After ``cooldown`` seconds it turns half-open and lets a single trial
+    through: success closes it, failure opens it for another cooldown. A
+    trial that never reports back frees its slot after one more cooldown.
+    Times come from ``clock`` in wall-clock seconds, so the state survives
+    :meth:`to_fields` / :meth:`restore` across processes.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        # Set while open: the earliest time a trial may go through
+        self.retry_at: Optional[float] = None
+        self._trial_until: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.retry_at is None:
+            return CLOSED
+        return OPEN if self.clock() < self.retry_at else HALF_OPEN
+
+    def allow(self) -> None:
+        """Raise :class:`CircuitOpenError` unless a call may go through now."""
+        state = self.state
+        if state == CLOSED:
+            return
+        now = self.clock()
+        if state == HALF_OPEN and (self._trial_until is None or now >= self._trial_until):
+            self._trial_until = now + self.cooldown
+            return
+        raise CircuitOpenError(max(self.retry_at or now, self._trial_until or now))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.retry_at = None
+        self._trial_until = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_until = None
+        if self.retry_at is not None or self.failures >= self.failure_threshold:
+            self.retry_at = self.clock() + self.cooldown
+
+    def to_fields(self) -> Dict[str, Any]:
+        """Instance fields describing this breaker; see :meth:`InstanceManager.record_breakers`."""
+        return {
+            'consecutiveFailures': self.failures,
+            'circuitRetryAt': _iso(self.retry_at) if self.retry_at is not None else None,
+        }
+
+    def restore(self, fields: Mapping[str, Any]) -> None:
+        """Load state persisted by :meth:`InstanceManager.record_breakers`."""
+        self.failures = int(fields.get('consecutiveFailures') or 0)
+        self.retry_at = None
+        self._trial_until = None
+        if fields.get('status') == CIRCUIT_OPEN_STATUS and fields.get('circuitRetryAt'):
+            try:
+                self.retry_at = datetime.fromisoformat(fields['circuitRetryAt']).timestamp()
+            except (TypeError, ValueError):
+                pass
+
+
+class BreakerRegistry:
+    """Per-instance circuit breakers and token buckets for fleet sweeps.
+
+    Each instance gets its own :class:`CircuitBreaker`, restored from its
+    persisted fields the first time it is seen. With a ``rate``, each also
+    gets a :class:`TokenBucket` allowing ``rate`` contacts per second with
+    bursts of ``burst``, so a fleet coming back is not hit by every client
+    at once. A sweep or health check takes one token per instance it
+    contacts, for the connection or pool lease, however many calls it then
+    makes; pace individual calls with ``GatewayClient(rate_limit=...)``.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def breaker(self, instance: Minion) -> CircuitBreaker:
+        breaker = self._breakers.get(instance.id)
+        if breaker is None:
+            breaker = self._breakers[instance.id] = CircuitBreaker(
+                self.failure_threshold, self.cooldown, self.clock)
+            breaker.restore(instance.fields)
+        return breaker
+
+    def bucket(self, instance_id: str) -> Optional[TokenBucket]:
+        if self.rate is None:
+            return None
+        bucket = self._buckets.get(instance_id)
+        if bucket is None:
+            bucket = self._buckets[instance_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def get(self, instance_id: str) -> Optional[CircuitBreaker]:
+        return self._breakers.get(instance_id)
+
+    def items(self) -> Iterator[Tuple[str, CircuitBreaker]]:
+        return iter(list(self._breakers.items()))
+
+    def __len__(self) -> int:
+        return len(self._breakers)
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, AsyncContextManager, Optional
 from minions import Minions, MinionPlugin
 
 from ..types import ALL_TYPES
@@ -6,18 +6,26 @@ from ..instance_manager import InstanceManager
 from ..snapshot_manager import SnapshotManager
 from ..config_decomposer import ConfigDecomposer
 from ..gateway_client import GatewayClient
+from ..gateway_pool import GatewayPool
 
 class OpenClawPluginAPI:
     def __init__(self, core: Minions):
         self.instances = InstanceManager()
         self.snapshots = SnapshotManager()
         self.config = ConfigDecomposer()
+        self.gateways = GatewayPool()
         
     def create_gateway_client(
         self, url: str, token: Optional[str] = None, device_private_key: Optional[str] = None
     ) -> GatewayClient:
         return GatewayClient(url, token, device_private_key)
 
+    def lease_gateway_client(
+        self, url: str, token: Optional[str] = None, device_private_key: Optional[str] = None
+    ) -> AsyncContextManager[GatewayClient]:
+        """Borrow a pooled, already-authenticated connection to ``url``."""
+        return self.gateways.lease(url, token, device_private_key)
+
 class OpenClawPlugin(MinionPlugin):
     """
     MinionPlugin implementation that mounts OpenClaw capabilities onto the core Minions client.
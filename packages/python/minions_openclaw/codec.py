@@ -0,0 +1,148 @@
+"""JSON encoding for wire frames and storage, with optional fast backends.
+
+The active codec is picked once at import: ``$OPENCLAW_JSON_CODEC``
+(``orjson``, ``msgspec``, ``stdlib`` or ``auto``) if set, otherwise the
+fastest installed library. Every codec produces the same JSON text for the
+plain data this package handles, so files written with one are read back by
+any other. The fast codecs fall back to the standard library for input
+they do not support: ``NaN`` / ``Infinity`` literals and integers beyond 64
+bits. Content hashes do not use the codec; see
+:func:`~minions_openclaw.storage.blobs.canonical_json`.
+"""
+from __future__ import annotations
+import json
+import os
+from typing import Any, Callable, Dict, Union
+
+CODEC_ENV = 'OPENCLAW_JSON_CODEC'
+
+
+class DecodeError(ValueError):
+    """Input is not valid JSON, whichever codec parsed it."""
+
+
+class JsonCodec:
+    """Standard-library codec; the fallback when no faster library is installed.
+
+    ``dumps`` returns UTF-8 bytes, compact unless ``indent`` is set, and
+    ``loads`` accepts ``bytes`` or ``str``.
+    """
+    name = 'stdlib'
+
+    def dumps(self, value: Any, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(value, indent=2, ensure_ascii=False).encode()
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError as exc:
+            raise DecodeError(str(exc)) from exc
+
+
+_stdlib = JsonCodec()
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+        # Non-string keys are stringified as the stdlib does
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value: Any, indent: bool = False) -> bytes:
+        options = self._options | (self._orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return self._orjson.dumps(value, option=options)
+        except self._orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits
+            return _stdlib.dumps(value, indent)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            # NaN / Infinity and big integers are valid for the stdlib
+            return _stdlib.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    name = 'msgspec'
+
+    def __init__(self) -> None:
+        import msgspec
+        self._msgspec = msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, value: Any, indent: bool = False) -> bytes:
+        try:
+            data = self._encoder.encode(value)
+        except (OverflowError, self._msgspec.EncodeError):
+            return _stdlib.dumps(value, indent)
+        return self._msgspec.json.format(data, indent=2) if indent else data
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError:
+            return _stdlib.loads(data)
+
+
+_CODECS: Dict[str, Callable[[], JsonCodec]] = {
+    'orjson': OrjsonCodec,
+    'msgspec': MsgspecCodec,
+    'stdlib': JsonCodec,
+}
+
+
+def get_codec(name: str = 'auto') -> JsonCodec:
+    """Return the codec called ``name``, or the fastest installed one for ``auto``.
+
+    Raises:
+        ValueError: for an unknown name, or a library that is not installed.
+    """
+    if name == 'auto':
+        for candidate in ('orjson', 'msgspec'):
+            try:
+                return _CODECS[candidate]()
+            except ImportError:
+                continue
+        return JsonCodec()
+    if name not in _CODECS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    try:
+        return _CODECS[name]()
+    except ImportError as exc:
+        raise ValueError(f"JSON codec {name} is not installed. Run: pip install {name}") from exc
+
+
+_active = get_codec(os.environ.get(CODEC_ENV, '').lower() or 'auto')
+
+
+def current_codec() -> JsonCodec:
+    return _active
+
+
+def set_codec(codec: Union[str, JsonCodec]) -> JsonCodec:
+    """Switch the process-wide codec; returns the previous one."""
+    global _active
+    previous = _active
+    _active = get_codec(codec) if isinstance(codec, str) else codec
+    return previous
+
+
+def dumps(value: Any, indent: bool = False) -> bytes:
+    return _active.dumps(value, indent)
+
+
+def dumps_str(value: Any) -> str:
+    """Compact JSON text, for frames and fields that must be ``str``."""
+    return _active.dumps(value).decode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return _active.loads(data)
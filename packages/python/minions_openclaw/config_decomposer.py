@@ -1,10 +1,12 @@
 """Config decomposer - parses openclaw.json into minion tree."""
 from __future__ import annotations
+import copy
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
 
 from minions import Minion, Relation, create_minion, generate_id, now
+from . import codec
 from .types import (
     openclaw_agent_type,
     openclaw_channel_type,
@@ -24,22 +26,7 @@ from .types import (
     openclaw_ui_config_type,
     registry,
 )
-
-DATA_DIR = Path.home() / '.openclaw-manager'
-DATA_FILE = DATA_DIR / 'data.json'
-
-
-def _read_storage() -> Dict[str, Any]:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    try:
-        return json.loads(DATA_FILE.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {'minions': [], 'relations': []}
-
-
-def _write_storage(data: Dict[str, Any]) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+from .storage import StorageBackend, default_backend
 
 
 _ARRAY_KEYS = {'agents', 'channels', 'modelProviders', 'skills', 'tools', 'hooks', 'cronJobs'}
@@ -50,8 +37,15 @@ _SINGLETON_KEYS = {
 
 
 class ConfigDecomposer:
+    def __init__(self, storage: Optional[StorageBackend] = None) -> None:
+        self.storage = storage or default_backend()
+
+    def batch(self) -> ContextManager[None]:
+        """Commit every decomposition saved inside the block in a single write."""
+        return self.storage.transaction()
+
     def load_from_file(self, path: str) -> Dict[str, Any]:
-        return json.loads(Path(path).read_text())
+        return codec.loads(Path(path).read_bytes())
 
     def decompose(self, config: Dict[str, Any], parent_instance_id: str) -> Tuple[List[Minion], List[Relation]]:
         minions: List[Minion] = []
@@ -76,9 +70,9 @@ class ConfigDecomposer:
                 'name': agent.get('name', ''),
                 'model': agent.get('model', ''),
                 'systemPrompt': agent.get('systemPrompt', ''),
-                'tools': json.dumps(agent.get('tools', [])),
-                'channels': json.dumps(agent.get('channels', [])),
-                'skills': json.dumps(agent.get('skills', [])),
+                'tools': codec.dumps_str(agent.get('tools', [])),
+                'channels': codec.dumps_str(agent.get('channels', [])),
+                'skills': codec.dumps_str(agent.get('skills', [])),
                 'enabled': agent.get('enabled', True),
             }))
 
@@ -86,7 +80,7 @@ class ConfigDecomposer:
             add_child(make(openclaw_channel_type, ch.get('name', 'channel'), {
                 'type': ch.get('type', ''),
                 'name': ch.get('name', ''),
-                'config': json.dumps(ch.get('config', {})),
+                'config': codec.dumps_str(ch.get('config', {})),
                 'enabled': ch.get('enabled', True),
             }))
 
@@ -104,14 +98,14 @@ class ConfigDecomposer:
                 'name': skill.get('name', ''),
                 'description': skill.get('description', ''),
                 'enabled': skill.get('enabled', True),
-                'config': json.dumps(skill.get('config', {})),
+                'config': codec.dumps_str(skill.get('config', {})),
             }))
 
         for tool in config.get('tools', []):
             add_child(make(openclaw_tool_config_type, tool.get('name', 'tool'), {
                 'name': tool.get('name', ''),
                 'type': tool.get('type', ''),
-                'config': json.dumps(tool.get('config', {})),
+                'config': codec.dumps_str(tool.get('config', {})),
                 'enabled': tool.get('enabled', True),
             }))
 
@@ -148,7 +142,7 @@ class ConfigDecomposer:
         for hook in config.get('hooks', []):
             add_child(make(openclaw_hook_type, hook.get('url', 'hook'), {
                 'url': hook.get('url', ''),
-                'events': json.dumps(hook.get('events', [])),
+                'events': codec.dumps_str(hook.get('events', [])),
                 'secret': hook.get('secret', ''),
                 'enabled': hook.get('enabled', True),
             }))
@@ -165,7 +159,7 @@ class ConfigDecomposer:
             add_child(make(openclaw_discovery_config_type, 'Discovery Config', {
                 'enabled': dc.get('enabled', False),
                 'port': dc.get('port', 5353),
-                'interfaces': json.dumps(dc.get('interfaces', [])),
+                'interfaces': codec.dumps_str(dc.get('interfaces', [])),
             }))
 
         if ic := config.get('identityConfig'):
@@ -186,7 +180,7 @@ class ConfigDecomposer:
             add_child(make(openclaw_logging_config_type, 'Logging Config', {
                 'level': lc.get('level', 'info'),
                 'format': lc.get('format', 'json'),
-                'outputs': json.dumps(lc.get('outputs', ['stdout'])),
+                'outputs': codec.dumps_str(lc.get('outputs', ['stdout'])),
             }))
 
         if uc := config.get('uiConfig'):
@@ -198,15 +192,32 @@ class ConfigDecomposer:
 
         return minions, relations
 
+    def decompose_and_save(
+        self, config: Dict[str, Any], parent_instance_id: str
+    ) -> Tuple[List[Minion], List[Relation]]:
+        """Decompose ``config`` and persist the resulting tree in one write."""
+        minions, relations = self.decompose(config, parent_instance_id)
+        self.storage.put_many(
+            minions=[m.to_dict() for m in minions],
+            relations=[r.to_dict() for r in relations],
+        )
+        return minions, relations
+
     def compose(self, instance_id: str, storage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Reconstruct an OpenClawConfig from a minion tree."""
-        data = storage or _read_storage()
-
-        child_ids = {
-            r['targetId'] for r in data['relations']
-            if r.get('sourceId') == instance_id and r.get('type') == 'parent_of'
-        }
-        children = [m for m in data['minions'] if m.get('id') in child_ids and not m.get('deletedAt')]
+        if storage is not None:
+            child_ids = {
+                r['targetId'] for r in storage['relations']
+                if r.get('sourceId') == instance_id and r.get('type') == 'parent_of'
+            }
+            children = [m for m in storage['minions'] if m.get('id') in child_ids and not m.get('deletedAt')]
+        else:
+            children = []
+            with self.storage.reading():
+                for r in self.storage.list_relations(source_id=instance_id, type='parent_of'):
+                    m = self.storage.get_minion(r['targetId'])
+                    if m and not m.get('deletedAt'):
+                        children.append(m)
 
         type_to_key: Dict[str, str] = {
             openclaw_agent_type.id: 'agents',
@@ -236,11 +247,12 @@ class ConfigDecomposer:
             for k, v in child.get('fields', {}).items():
                 if isinstance(v, str):
                     try:
-                        fields[k] = json.loads(v)
-                    except (json.JSONDecodeError, ValueError):
+                        fields[k] = codec.loads(v)
+                    except ValueError:
                         fields[k] = v
                 else:
-                    fields[k] = v
+                    # Records may be shared with the storage cache
+                    fields[k] = copy.deepcopy(v)
 
             if key in _ARRAY_KEYS:
                 config.setdefault(key, []).append(fields)
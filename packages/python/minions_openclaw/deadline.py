@@ -0,0 +1,85 @@
+"""Overall time budgets for gateway operations."""
+from __future__ import annotations
+import asyncio
+import contextvars
+import time
+from typing import Any, Optional
+
+_current: contextvars.ContextVar[Optional['Deadline']] = contextvars.ContextVar('openclaw_deadline', default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The enclosing :class:`Deadline` ran out before the operation finished."""
+
+
+class Deadline:
+    """A point in time by which a group of operations must finish.
+
+    Used as ``async with Deadline(5.0):``, it becomes the current deadline
+    for everything awaited inside the block, including tasks created there:
+    ``GatewayClient`` caps its connect and call timeouts to the time left
+    and fails fast once it is spent. When the budget runs out, whatever is
+    still outstanding is cancelled and :class:`DeadlineExceeded` is raised.
+    A nested deadline never extends the one around it.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.expires_at = time.monotonic() + timeout
+        self._scope: Optional[asyncio.Timeout] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """``timeout`` limited to the time left (just the time left if None)."""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, operation: str = 'operation') -> None:
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+    async def __aenter__(self) -> 'Deadline':
+        outer = _current.get()
+        if outer is not None:
+            self.expires_at = min(self.expires_at, outer.expires_at)
+        self._token = _current.set(self)
+        self._scope = asyncio.timeout(self.remaining())
+        await self._scope.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        assert self._scope is not None and self._token is not None
+        _current.reset(self._token)
+        try:
+            await self._scope.__aexit__(exc_type, exc, tb)
+        except TimeoutError as timeout:
+            if isinstance(exc, DeadlineExceeded):
+                raise
+            raise DeadlineExceeded("Deadline exceeded") from timeout
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The innermost :class:`Deadline` block being run, if any."""
+    return _current.get()
+
+
+def budget(timeout: Optional[float], operation: str = 'operation') -> Optional[float]:
+    """``timeout`` capped by the current deadline; raises if it is already spent."""
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    deadline.check(operation)
+    return deadline.cap(timeout)
+
+
+def detached_context() -> contextvars.Context:
+    """A copy of the current context without a deadline, for background tasks."""
+    context = contextvars.copy_context()
+    context.run(_current.set, None)
+    return context
@@ -0,0 +1,172 @@
+"""Concurrent presence collection across every registered instance."""
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from minions import Minion
+from .circuit_breaker import BreakerRegistry, CircuitOpenError
+from .deadline import Deadline
+from .gateway_client import GatewayClient
+from .gateway_pool import ClientFactory, GatewayPool
+from .instance_manager import InstanceManager
+from .snapshot_manager import SnapshotManager
+
+
+@dataclass
+class InstanceResult:
+    """Outcome for one instance; timings are in milliseconds."""
+    instance_id: str
+    url: str
+    ok: bool = False
+    error: Optional[str] = None
+    snapshot_id: Optional[str] = None
+    connect_ms: float = 0.0
+    fetch_ms: float = 0.0
+    total_ms: float = 0.0
+    # Not contacted because its circuit breaker is open
+    skipped: bool = False
+    presence: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+
+@dataclass
+class FleetReport:
+    results: List[InstanceResult] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    @property
+    def succeeded(self) -> List[InstanceResult]:
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self) -> List[InstanceResult]:
+        return [r for r in self.results if not r.ok]
+
+
+class FleetCollector:
+    """Fetches presence from many instances at once and snapshots the results.
+
+    At most ``concurrency`` instances are contacted at a time, each within its
+    own ``timeout`` (connect plus fetch). A failing or slow host only marks
+    its own result as failed. All successful presences are then captured as
+    snapshots in a single storage write. Connections come from ``pool`` when
+    one is given, otherwise each instance gets a fresh client that is closed
+    afterwards.
+
+    With ``breakers`` each instance goes through its circuit breaker and
+    token bucket. An instance whose breaker is open is skipped without
+    waiting for a timeout. Each contacted instance's outcome counts once
+    towards its breaker, and breaker state is written to the instances
+    with the snapshots, so later sweeps and other processes skip
+    known-dead hosts too.
+    """
+
+    def __init__(
+        self,
+        instances: Optional[InstanceManager] = None,
+        snapshots: Optional[SnapshotManager] = None,
+        concurrency: int = 16,
+        timeout: float = 15.0,
+        pool: Optional[GatewayPool] = None,
+        client_factory: ClientFactory = GatewayClient,
+        breakers: Optional[BreakerRegistry] = None,
+    ) -> None:
+        self.instances = instances or InstanceManager()
+        self.snapshots = snapshots or SnapshotManager(storage=self.instances.storage)
+        self.breakers = breakers
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.pool = pool
+        self.client_factory = client_factory
+
+    async def collect(
+        self,
+        instance_ids: Optional[List[str]] = None,
+        capture: bool = True,
+        deadline: Optional[Deadline] = None,
+    ) -> FleetReport:
+        """Contact ``instance_ids`` (default: every registered instance).
+
+        With ``capture`` the successful presences are persisted as snapshots
+        and each result carries its ``snapshot_id``. A ``deadline`` bounds the
+        whole sweep: per-instance timeouts are capped to the time left, and
+        instances not reached in time are reported as failed.
+        """
+        start = time.monotonic()
+        if instance_ids is None:
+            targets = self.instances.list()
+        else:
+            targets = [m for m in (self.instances.get_by_id(i) for i in instance_ids) if m is not None]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(instance: Minion) -> InstanceResult:
+            async with semaphore:
+                return await self._collect_one(instance, deadline)
+
+        results = list(await asyncio.gather(*(bounded(m) for m in targets)))
+        with self.snapshots.batch():
+            if capture:
+                for result in results:
+                    if result.ok:
+                        snapshot = self.snapshots.capture_snapshot(
+                            result.instance_id, result.presence or {}, inline_config=False)
+                        result.snapshot_id = snapshot.id
+            if self.breakers is not None:
+                self.instances.record_breakers({m.id: self.breakers.breaker(m) for m in targets})
+        return FleetReport(results=results, elapsed_ms=(time.monotonic() - start) * 1000)
+
+    async def _collect_one(self, instance: Minion, deadline: Optional[Deadline] = None) -> InstanceResult:
+        fields = instance.fields
+        result = InstanceResult(instance_id=instance.id, url=fields.get('url', ''))
+        start = time.monotonic()
+        timeout = self.timeout if deadline is None else deadline.cap(self.timeout)
+        breaker = bucket = None
+        if self.breakers is not None:
+            breaker = self.breakers.breaker(instance)
+            bucket = self.breakers.bucket(instance.id)
+            try:
+                breaker.allow()
+            except CircuitOpenError as exc:
+                result.error = str(exc)
+                result.skipped = True
+                return result
+        contacted = expired = False
+        try:
+            if timeout <= 0:
+                raise TimeoutError
+            async with asyncio.timeout(timeout):
+                if bucket is not None:
+                    await bucket.acquire()
+                contacted = True
+                if self.pool is not None:
+                    async with self.pool.lease_instance(instance) as client:
+                        result.connect_ms = (time.monotonic() - start) * 1000
+                        result.presence = await client.fetch_presence()
+                else:
+                    client = self.client_factory(result.url, fields.get('token'), fields.get('devicePrivateKey'))
+                    try:
+                        await client.open_connection()
+                        result.connect_ms = (time.monotonic() - start) * 1000
+                        result.presence = await client.fetch_presence()
+                    finally:
+                        await client.close()
+            result.ok = True
+        except TimeoutError:
+            if deadline is not None and deadline.expired:
+                result.error = "Deadline exceeded"
+                # The sweep ran out of time; that says nothing about the host
+                expired = True
+            else:
+                result.error = f"Timed out after {round(timeout, 3)}s"
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        result.total_ms = (time.monotonic() - start) * 1000
+        if result.ok:
+            result.fetch_ms = result.total_ms - result.connect_ms
+        if breaker is not None and contacted and not expired:
+            if result.ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        return result
@@ -1,9 +1,22 @@
 """Gateway WebSocket client."""
 from __future__ import annotations
 import asyncio
-import json
-import base64
-from typing import Any, Dict, Optional
+import functools
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from . import codec
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .deadline import DeadlineExceeded, budget, current_deadline, detached_context
+from .metrics import ClientMetrics
+from .rate_limit import TokenBucket
+from .recording import TrafficRecorder
+from .response_cache import MISSING, ResponseCache
+from .signing import ED25519, ChallengeSigner, default_signer
+from .subscription import DROP_OLDEST, Subscription
 
 try:
     import websockets
@@ -11,30 +24,271 @@ try:
 except ImportError:
     HAS_WEBSOCKETS = False
 
+DEFAULT_CALL_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# async (url, additional_headers=...) -> socket with send(), recv() and close()
+Connector = Callable[..., Awaitable[Any]]
+
+
+class GatewayError(RuntimeError):
+    """The gateway answered a call with an error frame."""
+
+    def __init__(self, method: str, payload: Any) -> None:
+        super().__init__(f"{method} failed: {payload}")
+        self.method = method
+        self.payload = payload
+
+
+class FrameTooLarge(ConnectionError):
+    """A received frame exceeded ``max_frame_size``; the connection is dropped."""
+
+    def __init__(self, size: Optional[int], limit: int) -> None:
+        received = f"of {size} bytes " if size is not None else ""
+        super().__init__(f"Frame {received}exceeds max_frame_size of {limit} bytes")
+        self.size = size
+        self.limit = limit
+
+
+# Read-only methods that are safe to send again after a reconnect
+DEFAULT_IDEMPOTENT_METHODS = frozenset({'agents.list', 'channels.list', 'models.list', 'system-presence'})
+
+# Cursor pagination: request params and the response key naming the next page
+CURSOR_PARAM = 'cursor'
+LIMIT_PARAM = 'limit'
+NEXT_CURSOR_KEY = 'nextCursor'
+
+# Default liveness probe: one model rather than a presence payload that
+# can run to megabytes on large gateways
+PING_METHOD = 'models.list'
+PING_PARAMS: Dict[str, Any] = {LIMIT_PARAM: 1}
+
+
+@dataclass
+class ReconnectPolicy:
+    """Opt-in automatic reconnection for :class:`GatewayClient`.
+
+    Attempt ``n`` (from 0) waits ``min(max_delay, base_delay * 2**n)`` scaled
+    by a random factor in [0.5, 1], so a fleet of clients does not reconnect
+    in lockstep after a gateway restart. ``max_attempts`` of None retries
+    forever.
+    """
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_attempts: Optional[int] = None
+    idempotent_methods: FrozenSet[str] = DEFAULT_IDEMPOTENT_METHODS
+
+    def delay(self, attempt: int) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+@dataclass
+class ConnectionStats:
+    reconnects: int = 0
+    failed_attempts: int = 0
+    resumed_sessions: int = 0
+    reissued_calls: int = 0
+    failed_calls: int = 0
+
+
+@dataclass
+class _Call:
+    method: str
+    params: Dict[str, Any]
+    idempotent: bool
+    future: asyncio.Future = field(repr=False)
+    # monotonic time of the last send, for latency metrics
+    sent_at: float = 0.0
+
 
 class GatewayClient:
-    def __init__(self, url: str, token: Optional[str] = None, device_private_key: Optional[str] = None) -> None:
+    """Authenticated WebSocket client for one gateway.
+
+    After the handshake a single background reader owns ``recv()`` and routes
+    every response to the call waiting for its ``id``, so any number of calls
+    can be in flight on the connection at once. Frames that answer no call
+    are server pushes; they are delivered to :meth:`subscribe` iterators and
+    :meth:`on` callbacks by event name (the frame's ``event``, else its
+    ``type``).
+
+    With a ``reconnect`` policy a dropped connection is re-established in
+    the background. The handshake presents the cached device token instead
+    of signing the challenge again (falling back to signing if the gateway
+    rejects it). Pending idempotent calls are re-sent, other pending calls
+    fail with ``ConnectionError``, and new calls wait for the reconnect.
+    Subscriptions stay open across reconnects. ``stats`` counts what happened.
+
+    ``connect_timeout`` bounds the whole handshake and ``call_timeout`` each
+    call; both can be overridden per operation, and inside a
+    :class:`~minions_openclaw.deadline.Deadline` block they are further
+    capped to the time left.
+
+    With a ``recorder`` every frame sent and received is appended to a
+    :class:`~minions_openclaw.recording.TrafficRecorder` file, which
+    :class:`~minions_openclaw.recording.Recording` can replay later. The
+    caller owns the recorder and closes it.
+
+    A ``breaker`` is consulted before every connect and call: while it is
+    open they fail at once with
+    :class:`~minions_openclaw.circuit_breaker.CircuitOpenError`, and
+    timeouts and lost connections count as failures (an error frame still
+    proves the gateway is up). A ``rate_limit`` token bucket paces connects
+    and calls: one token per handshake and per call, so :meth:`call_many`
+    takes one per call. Waiting for it counts against their timeout.
+
+    A received frame longer than ``max_frame_size`` bytes (None for no
+    limit) drops the connection with :class:`FrameTooLarge` instead of
+    being buffered and parsed.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        device_private_key: Optional[str] = None,
+        connect: Optional[Connector] = None,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        reconnect: Optional[ReconnectPolicy] = None,
+        signer: Optional[ChallengeSigner] = None,
+        cache: Optional[ResponseCache] = None,
+        cache_key: Optional[str] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        rate_limit: Optional[TokenBucket] = None,
+        max_frame_size: Optional[int] = DEFAULT_MAX_FRAME_SIZE,
+    ) -> None:
         self.url = url
         self.token = token
         self.device_private_key = device_private_key
+        self.signer = signer or default_signer
+        self.cache = cache
+        # Identifies this instance's entries in a cache shared with other clients
+        self.cache_key = cache_key or url
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.reconnect = reconnect
+        self.stats = ConnectionStats()
+        self.metrics = ClientMetrics()
+        self.recorder = recorder
+        self.breaker = breaker
+        self.rate_limit = rate_limit
+        self.max_frame_size = max_frame_size
+        self._connect = connect
         self._ws = None
         self._device_token: Optional[str] = None
         self._connected = False
+        self._reader: Optional[asyncio.Task] = None
+        self._reconnector: Optional[asyncio.Task] = None
+        self._closing = False
+        self._calls: Dict[str, _Call] = {}
+        # Optional capabilities from hello-ok, e.g. 'batch'
+        self._features: FrozenSet[str] = frozenset()
+        self._subscriptions: List[Subscription] = []
+        self._listeners: List[Tuple[Optional[str], Callable[[Dict[str, Any]], Any]]] = []
+        # Running coroutine callbacks, referenced so they are not collected mid-flight
+        self._callback_tasks: Set[asyncio.Task] = set()
+
+    async def open_connection(self, timeout: Optional[float] = None) -> None:
+        """Connect and authenticate within ``timeout`` (default ``connect_timeout``) seconds."""
+        self._closing = False
+        await self._timed_handshake(self.connect_timeout if timeout is None else timeout)
+        self._start_reader()
+
+    async def _timed_handshake(self, timeout: Optional[float], resume: bool = False) -> None:
+        limit = budget(timeout, 'connect')
+        contacted = False
+        try:
+            async with asyncio.timeout(limit):
+                await self._admit()
+                contacted = True
+                await self._handshake(resume)
+        except BaseException as exc:
+            if self._ws is not None:
+                await self._ws.close()
+                self._ws = None
+            self._connected = False
+            if contacted and isinstance(exc, TimeoutError):
+                self._record_timeout(timeout, limit)
+            elif contacted and isinstance(exc, Exception):
+                self._record_outcome(False)
+            if isinstance(exc, TimeoutError) and not isinstance(exc, DeadlineExceeded):
+                raise self._timeout_error('connect', limit) from exc
+            raise
+        self._record_outcome(True)
 
-    async def open_connection(self) -> None:
-        if not HAS_WEBSOCKETS:
-            raise RuntimeError("websockets package not installed. Run: pip install websockets")
-        import websockets as ws_lib
+    async def _admit(self, calls: int = 1) -> None:
+        if self.breaker is not None:
+            self.breaker.allow()
+        if self.rate_limit is not None:
+            await self.rate_limit.acquire(calls)
+
+    def _record_outcome(self, ok: bool) -> None:
+        if self.breaker is not None:
+            if ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def _record_timeout(self, requested: Optional[float], limit: Optional[float]) -> None:
+        """Count a timeout as a breaker failure unless the caller's deadline caused it.
+
+        ``budget()`` caps ``limit`` to the time left on the current
+        :class:`Deadline`; a sweep running out of time says nothing about
+        the host, so it must not open the host's breaker.
+        """
+        deadline = current_deadline()
+        if deadline is not None and (
+            deadline.expired or requested is None or (limit is not None and limit < requested)
+        ):
+            return
+        self._record_outcome(False)
+
+    def _timeout_error(self, operation: str, limit: Optional[float]) -> TimeoutError:
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            return DeadlineExceeded(f"Deadline exceeded during {operation}")
+        return asyncio.TimeoutError(f"{operation} timed out after {limit}s")
+
+    def _start_reader(self) -> None:
+        # Background tasks must not inherit the caller's deadline
+        self._reader = asyncio.get_running_loop().create_task(
+            self._read_loop(self._ws), context=detached_context())
+
+    async def _handshake(self, resume: bool = False) -> None:
+        connect = self._connect
+        if connect is None:
+            if not HAS_WEBSOCKETS:
+                raise RuntimeError("websockets package not installed. Run: pip install websockets")
+            import websockets as ws_lib
+            connect = functools.partial(ws_lib.connect, max_size=self.max_frame_size)
         headers = {}
         if self.token:
             headers['Authorization'] = f'Bearer {self.token}'
-        self._ws = await ws_lib.connect(self.url, additional_headers=headers)
-        msg = json.loads(await asyncio.wait_for(self._ws.recv(), timeout=10))
+        self._ws = await connect(self.url, additional_headers=headers)
+        if self.recorder is not None:
+            self.recorder.connection(self.url)
+        msg = codec.loads(await self._recv_handshake())
         if msg.get('type') == 'connect.challenge':
             nonce = msg['payload'].get('nonce', '')
             timestamp = msg['payload'].get('timestamp', '')
-            signature = self._sign_challenge(nonce, timestamp)
-            await self._ws.send(json.dumps({
+            # A resumed session proves itself with the device token alone
+            resuming = resume and bool(self._device_token)
+            algorithm = None
+            if resuming:
+                signature = ''
+            else:
+                try:
+                    signature, algorithm = await self._sign_challenge(
+                        nonce, timestamp, msg['payload'].get('algorithms'))
+                except BaseException:
+                    await self._ws.close()
+                    self._ws = None
+                    raise
+            await self._send({
                 'type': 'connect',
                 'payload': {
                     'role': 'operator',
@@ -42,73 +296,552 @@ class GatewayClient:
                     'signature': signature,
                     'timestamp': timestamp,
                     'nonce': nonce,
+                    # RSA stays implicit for gateways that predate the field
+                    **({'algorithm': algorithm} if algorithm == ED25519 else {}),
                     **(({'deviceToken': self._device_token}) if self._device_token else {}),
                 }
-            }))
-            response = json.loads(await asyncio.wait_for(self._ws.recv(), timeout=10))
+            })
+            response = codec.loads(await self._recv_handshake())
             if response.get('type') == 'hello-ok':
                 self._connected = True
+                self._features = frozenset(response['payload'].get('features') or ())
                 if response['payload'].get('deviceToken'):
                     self._device_token = response['payload']['deviceToken']
+                if resuming:
+                    self.stats.resumed_sessions += 1
             elif response.get('type') == 'hello-error':
+                await self._ws.close()
+                self._ws = None
+                if resuming:
+                    # Token expired or revoked: sign the challenge instead
+                    self._device_token = None
+                    return await self._handshake()
                 raise RuntimeError(f"Auth failed: {response.get('payload')}")
 
-    def _sign_challenge(self, nonce: str, timestamp: str) -> str:
-        if not self.device_private_key:
-            return ''
+    async def _recv_handshake(self) -> Any:
+        return await self._receive(self._ws)
+
+    async def _receive(self, ws: Any) -> Any:
         try:
-            from cryptography.hazmat.primitives import hashes, serialization
-            from cryptography.hazmat.primitives.asymmetric import padding
-
-            pem = self.device_private_key.encode()
-            private_key = serialization.load_pem_private_key(pem, password=None)
-            message = f'{nonce}:{timestamp}'.encode()
-            # PKCS1v15 is used for compatibility with the TypeScript GatewayClient
-            # (Node.js crypto.createSign default behaviour).  Both sides must agree
-            # on the padding scheme; change to PSS here only if the gateway is
-            # updated to verify PSS signatures.
-            signature = private_key.sign(message, padding.PKCS1v15(), hashes.SHA256())
-            return base64.b64encode(signature).decode()
-        except ImportError:
-            # cryptography package not installed — fall back to no signature
-            return ''
-        except Exception:
-            return ''
+            raw = await ws.recv()
+        except Exception as exc:
+            # websockets closes with 1009 when a frame is over max_size
+            sent = getattr(exc, 'sent', None)
+            if getattr(sent, 'code', None) == 1009 and self.max_frame_size is not None:
+                raise FrameTooLarge(None, self.max_frame_size) from exc
+            raise
+        if self.max_frame_size is not None and len(raw) > self.max_frame_size:
+            raise FrameTooLarge(len(raw), self.max_frame_size)
+        self.metrics.received(raw)
+        if self.recorder is not None:
+            self.recorder.received(raw)
+        return raw
+
+    async def _send(self, frame: Dict[str, Any]) -> None:
+        data = codec.dumps(frame)
+        # Sent as a text frame, which is what the gateway expects
+        text = data.decode()
+        await self._ws.send(text)
+        self.metrics.sent(data)
+        if self.recorder is not None:
+            self.recorder.sent(text)
 
-    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
-        if not self._ws:
+    async def _read_loop(self, ws: Any) -> None:
+        error: Optional[BaseException] = ConnectionError("Connection closed")
+        try:
+            while True:
+                self._dispatch(codec.loads(await self._receive(ws)))
+        except asyncio.CancelledError:
+            # close() settles pending calls and subscriptions itself
+            error = None
+            raise
+        except Exception as exc:
+            error = exc if isinstance(exc, ConnectionError) else ConnectionError(f"Connection lost: {exc}")
+            if isinstance(exc, FrameTooLarge):
+                try:
+                    await ws.close()
+                except Exception:
+                    pass
+        finally:
+            self._connected = False
+            if error is not None:
+                if self.recorder is not None:
+                    self.recorder.lost(error)
+                if self.cache is not None:
+                    # Invalidation events may be missed while disconnected
+                    self.cache.invalidate(self.cache_key)
+                if self.reconnect is not None and not self._closing:
+                    self._connection_lost(error)
+                else:
+                    self._fail_pending(error)
+                    self._close_subscriptions(error)
+
+    def _connection_lost(self, error: BaseException) -> None:
+        for call_id, pending in list(self._calls.items()):
+            if not pending.idempotent:
+                del self._calls[call_id]
+                self.stats.failed_calls += 1
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+        if self._reconnector is None or self._reconnector.done():
+            self._reconnector = asyncio.get_running_loop().create_task(
+                self._reconnect_loop(error), context=detached_context())
+
+    async def _reconnect_loop(self, error: BaseException) -> None:
+        assert self.reconnect is not None
+        attempt = 0
+        while not self._closing:
+            if self.reconnect.max_attempts is not None and attempt >= self.reconnect.max_attempts:
+                self._fail_pending(ConnectionError(f"Reconnect gave up after {attempt} attempts: {error}"))
+                self._close_subscriptions(error)
+                return
+            await asyncio.sleep(self.reconnect.delay(attempt))
+            attempt += 1
+            try:
+                await self._timed_handshake(self.connect_timeout, resume=True)
+            except Exception as exc:
+                self.stats.failed_attempts += 1
+                error = exc
+                continue
+            self.stats.reconnects += 1
+            self._start_reader()
+            for call_id, pending in list(self._calls.items()):
+                # Non-idempotent calls made while reconnecting send themselves
+                if pending.idempotent and not pending.future.done():
+                    self.stats.reissued_calls += 1
+                    await self._send_call(call_id, pending)
+            return
+
+    async def _send_call(self, call_id: str, pending: _Call) -> None:
+        pending.sent_at = time.monotonic()
+        await self._send({
+            'type': 'call', 'id': call_id, 'method': pending.method, 'params': pending.params,
+        })
+
+    async def _send_calls(self, entries: List[Tuple[str, _Call]]) -> None:
+        if 'batch' in self._features and len(entries) > 1:
+            sent_at = time.monotonic()
+            for _, pending in entries:
+                pending.sent_at = sent_at
+            await self._send({'type': 'batch', 'calls': [
+                {'id': call_id, 'method': pending.method, 'params': pending.params}
+                for call_id, pending in entries
+            ]})
+            return
+        for call_id, pending in entries:
+            await self._send_call(call_id, pending)
+
+    def _dispatch(self, msg: Dict[str, Any]) -> None:
+        if msg.get('type') == 'batch' and isinstance(msg.get('results'), list):
+            for frame in msg['results']:
+                self._dispatch(frame)
+            return
+        call_id = msg.get('id')
+        if not call_id:
+            self._publish(msg)
+            return
+        pending = self._calls.pop(call_id, None)
+        if pending is None or pending.future.done():
+            # Late response to a call that already timed out
+            return
+        self.metrics.observe(pending.method, (time.monotonic() - pending.sent_at) * 1000)
+        if msg.get('type') == 'error' or msg.get('error') is not None:
+            pending.future.set_exception(GatewayError(pending.method, msg.get('error', msg.get('payload'))))
+        else:
+            pending.future.set_result(msg.get('payload'))
+
+    def _publish(self, msg: Dict[str, Any]) -> None:
+        name = msg.get('event') or msg.get('type')
+        if self.cache is not None:
+            self.cache.handle_event(self.cache_key, name)
+        for subscription in list(self._subscriptions):
+            if subscription.matches(name):
+                subscription.push(msg)
+        for event, callback in list(self._listeners):
+            if event is None or event == name:
+                try:
+                    result = callback(msg)
+                    if asyncio.iscoroutine(result):
+                        task = asyncio.get_running_loop().create_task(result)
+                        self._callback_tasks.add(task)
+                        task.add_done_callback(functools.partial(self._callback_done, name))
+                except Exception:
+                    logger.exception("Event callback for %s failed", name)
+
+    def _callback_done(self, name: Optional[str], task: asyncio.Task) -> None:
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Event callback for %s failed", name, exc_info=task.exception())
+
+    def subscribe(
+        self, event: Optional[str] = None, maxsize: int = 100, overflow: str = DROP_OLDEST
+    ) -> Subscription:
+        """Return an async iterator over pushed frames named ``event`` (all if None).
+
+        See :class:`~minions_openclaw.subscription.Subscription` for the
+        ``maxsize`` / ``overflow`` semantics. Close it (or use it as a context
+        manager) to stop buffering.
+        """
+        subscription = Subscription(event, maxsize, overflow, on_close=self._subscriptions.remove)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def on(self, event: Optional[str], callback: Callable[[Dict[str, Any]], Any]) -> Callable[[], None]:
+        """Call ``callback(frame)`` for each pushed frame named ``event``.
+
+        Coroutine callbacks are scheduled as tasks; exceptions from either
+        kind are logged, and tasks still running are cancelled by
+        :meth:`close`. Returns a function that removes the callback.
+        """
+        entry = (event, callback)
+        self._listeners.append(entry)
+
+        def off() -> None:
+            if entry in self._listeners:
+                self._listeners.remove(entry)
+        return off
+
+    def _close_subscriptions(self, error: Optional[BaseException] = None) -> None:
+        for subscription in list(self._subscriptions):
+            subscription.close(error)
+
+    def _fail_pending(self, error: BaseException) -> None:
+        calls, self._calls = self._calls, {}
+        for pending in calls.values():
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    async def _sign_challenge(
+        self, nonce: str, timestamp: str, accepted: Optional[List[str]] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Return ``(signature, algorithm)``; unsigned when no device key is set.
+
+        Raises:
+            SigningError: if the key cannot be loaded or used.
+        """
+        if not self.device_private_key:
+            return '', None
+        message = f'{nonce}:{timestamp}'.encode()
+        signature = await self.signer.sign_async(self.device_private_key, message, accepted)
+        return signature, self.signer.algorithm(self.device_private_key)
+
+    async def call(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+        use_cache: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a call and wait for the response frame with the same ``id``.
+
+        ``idempotent`` marks the call as safe to re-send after a reconnect;
+        by default the reconnect policy's ``idempotent_methods`` decide.
+        With a :attr:`cache`, cacheable methods are answered from it when
+        possible; ``use_cache=False`` always asks the gateway. ``timeout``
+        overrides ``call_timeout`` for this call.
+
+        Raises:
+            GatewayError: if the gateway answers with an error frame.
+            ConnectionError: if the connection drops before the response.
+            asyncio.TimeoutError: after ``timeout`` seconds, including any
+                time spent waiting for a reconnect.
+            DeadlineExceeded: if the current deadline runs out first.
+        """
+        if use_cache and self.cache is not None and self.cache.cacheable(method):
+            cached = self.cache.get(self.cache_key, method, params)
+            if cached is not MISSING:
+                return cached
+            generation = self.cache.generation
+            result = await self.call(method, params, idempotent, use_cache=False, timeout=timeout)
+            self.cache.put(self.cache_key, method, params, result, generation)
+            return result
+        reconnecting = self._reconnector is not None and not self._reconnector.done()
+        if not self.connected and not reconnecting:
             raise RuntimeError("Not connected")
+        requested = self.call_timeout if timeout is None else timeout
+        limit = budget(requested, method)
+        if idempotent is None:
+            idempotent = self.reconnect is not None and method in self.reconnect.idempotent_methods
         from minions import generate_id
         call_id = generate_id()
-        await self._ws.send(json.dumps({'type': 'call', 'id': call_id, 'method': method, 'params': params or {}}))
-        while True:
-            raw = await asyncio.wait_for(self._ws.recv(), timeout=10)
-            msg = json.loads(raw)
-            if msg.get('id') == call_id:
-                return msg.get('payload')
-
-    async def fetch_presence(self) -> Dict[str, Any]:
-        results = await asyncio.gather(
-            self.call('agents.list'),
-            self.call('channels.list'),
-            self.call('models.list'),
-            self.call('system-presence'),
-            return_exceptions=True
+        pending = _Call(method, params or {}, idempotent, asyncio.get_running_loop().create_future())
+        # Register before sending so a fast response cannot be missed
+        self._calls[call_id] = pending
+        sent = False
+        try:
+            async with asyncio.timeout(limit):
+                await self._admit()
+                sent = True
+                if reconnecting:
+                    # Sent by the reconnect loop once the connection is back
+                    if not idempotent:
+                        await self._wait_connected()
+                        if not pending.future.done():
+                            await self._send_call(call_id, pending)
+                else:
+                    try:
+                        await self._send_call(call_id, pending)
+                    except Exception as exc:
+                        if not idempotent or self.reconnect is None:
+                            raise ConnectionError(f"Send failed: {exc}") from exc
+                result = await pending.future
+            self._record_outcome(True)
+            return result
+        except TimeoutError as exc:
+            self.metrics.timed_out(method)
+            if sent:
+                self._record_timeout(requested, limit)
+            raise self._timeout_error(method, limit) from exc
+        except GatewayError:
+            self._record_outcome(True)
+            raise
+        except ConnectionError:
+            if sent:
+                self._record_outcome(False)
+            raise
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def call_many(
+        self,
+        calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+        return_exceptions: bool = True,
+        timeout: Optional[float] = None,
+    ) -> List[Any]:
+        """Send ``(method, params)`` calls together and return their results in order.
+
+        All frames are written before any response is awaited, as a single
+        ``batch`` frame when the gateway advertises the ``batch`` feature, so
+        the whole set costs one round trip. A failed call leaves its exception
+        (``GatewayError``, ``ConnectionError``, or ``asyncio.TimeoutError``
+        after ``timeout`` seconds, default ``call_timeout``) in its slot; with
+        ``return_exceptions=False`` the first one is raised instead. Calls
+        the :attr:`cache` can answer are not sent.
+        """
+        cache = self.cache
+        results: List[Any] = [MISSING] * len(calls)
+        if cache is not None:
+            for index, (method, params) in enumerate(calls):
+                if cache.cacheable(method):
+                    results[index] = cache.get(self.cache_key, method, params)
+            generation = cache.generation
+        misses = [index for index, result in enumerate(results) if result is MISSING]
+        if misses:
+            fetched = await self._send_many([calls[index] for index in misses], timeout)
+            for index, result in zip(misses, fetched):
+                results[index] = result
+                method, params = calls[index]
+                if cache is not None and cache.cacheable(method) and not isinstance(result, BaseException):
+                    cache.put(self.cache_key, method, params, result, generation)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+
+    async def _send_many(
+        self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float] = None
+    ) -> List[Any]:
+        if not self.connected:
+            if self._reconnector is None or self._reconnector.done():
+                raise RuntimeError("Not connected")
+            # Each call waits for the reconnect on its own
+            return list(await asyncio.gather(
+                *(self.call(method, params, use_cache=False, timeout=timeout) for method, params in calls),
+                return_exceptions=True,
+            ))
+        from minions import generate_id
+        loop = asyncio.get_running_loop()
+        requested = self.call_timeout if timeout is None else timeout
+        limit = budget(requested, 'call_many')
+        deadline = loop.time() + limit
+        try:
+            await asyncio.wait_for(self._admit(len(calls)), timeout=limit)
+        except CircuitOpenError as exc:
+            return [exc] * len(calls)
+        except TimeoutError:
+            return [self._timeout_error(method, limit) for method, _ in calls]
+        entries: List[Tuple[str, _Call]] = []
+        for method, params in calls:
+            idempotent = self.reconnect is not None and method in self.reconnect.idempotent_methods
+            entry = (generate_id(), _Call(method, params or {}, idempotent, loop.create_future()))
+            self._calls[entry[0]] = entry[1]
+            entries.append(entry)
+        try:
+            try:
+                await asyncio.wait_for(self._send_calls(entries), timeout=max(deadline - loop.time(), 0))
+            except Exception as exc:
+                error = ConnectionError(f"Send failed: {exc}")
+                for _, pending in entries:
+                    # With a reconnect policy, idempotent calls are re-sent instead
+                    if (not pending.idempotent or self.reconnect is None) and not pending.future.done():
+                        pending.future.set_exception(error)
+            futures = [pending.future for _, pending in entries]
+            if futures:
+                await asyncio.wait(futures, timeout=max(deadline - loop.time(), 0))
+        finally:
+            for call_id, _ in entries:
+                self._calls.pop(call_id, None)
+        results: List[Any] = []
+        for (_, pending), future in zip(entries, futures):
+            if not future.done():
+                future.cancel()
+                self.metrics.timed_out(pending.method)
+                result: Any = self._timeout_error(pending.method, limit)
+            else:
+                result = future.exception() or future.result()
+            results.append(result)
+        if any(isinstance(r, ConnectionError) for r in results):
+            self._record_outcome(False)
+        elif any(isinstance(r, TimeoutError) for r in results):
+            self._record_timeout(requested, limit)
+        else:
+            self._record_outcome(True)
+        return results
+
+    async def _wait_connected(self) -> None:
+        while not self.connected:
+            if self._reconnector is None or self._reconnector.done():
+                raise ConnectionError("Not connected")
+            # wait() rather than await, so a cancelled reconnect is not our cancellation
+            await asyncio.wait({self._reconnector})
+
+    async def fetch_presence(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Fetch agents, channels, models and config; a failed collection comes back empty.
+
+        Raises:
+            DeadlineExceeded: if the current deadline ran out, rather than
+                returning a partial result.
+        """
+        results = await self.call_many([
+            ('agents.list', None),
+            ('channels.list', None),
+            ('models.list', None),
+            ('system-presence', None),
+        ], timeout=timeout)
+        for result in results:
+            if isinstance(result, DeadlineExceeded):
+                raise result
+        agents, channels, models = await asyncio.gather(
+            self._all_items('agents.list', results[0], timeout),
+            self._all_items('channels.list', results[1], timeout),
+            self._all_items('models.list', results[2], timeout),
         )
-        agents_r, channels_r, models_r, config_r = results
+        config_r = results[3]
         return {
-            'agents': (agents_r.get('items', []) if isinstance(agents_r, dict) else []),
-            'channels': (channels_r.get('items', []) if isinstance(channels_r, dict) else []),
-            'models': (models_r.get('items', []) if isinstance(models_r, dict) else []),
+            'agents': agents,
+            'channels': channels,
+            'models': models,
             'config': (config_r if isinstance(config_r, dict) else {}),
         }
 
+    async def _all_items(self, method: str, first: Any, timeout: Optional[float]) -> List[Any]:
+        # Follows the cursor of a paginated first page; any failure empties the list
+        if not isinstance(first, dict):
+            return []
+        items = first.get('items', [])
+        cursor = first.get(NEXT_CURSOR_KEY)
+        if not cursor:
+            return items
+        items = list(items)
+        try:
+            async for item in self.paginate(method, {CURSOR_PARAM: cursor}, timeout=timeout):
+                items.append(item)
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            return []
+        return items
+
+    async def paginate(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Any]:
+        """Iterate over the ``items`` of every page of a cursor-paginated list method.
+
+        Each response is ``{'items': [...], 'nextCursor': ...}``; the next
+        page is requested with ``params['cursor']`` set to that cursor (and
+        ``limit`` to ``page_size`` when given) until a page has no cursor.
+        A gateway without pagination returns everything as one page. The
+        next page is requested while the current one is consumed, and only
+        one or two pages are held at a time. ``timeout`` applies per page.
+        Pages are never answered from the cache.
+        """
+        request = dict(params or {})
+        if page_size is not None:
+            request[LIMIT_PARAM] = page_size
+        page = await self.call(method, request, use_cache=False, timeout=timeout)
+        upcoming: Optional[asyncio.Future] = None
+        try:
+            while True:
+                cursor = page.get(NEXT_CURSOR_KEY) if isinstance(page, dict) else None
+                if cursor:
+                    upcoming = asyncio.ensure_future(self.call(
+                        method, {**request, CURSOR_PARAM: cursor}, use_cache=False, timeout=timeout))
+                items = page.get('items', []) if isinstance(page, dict) else []
+                page = None
+                for item in items:
+                    yield item
+                if upcoming is None:
+                    return
+                page = await upcoming
+                upcoming = None
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
+
     async def close(self) -> None:
+        self._closing = True
+        if self._reconnector is not None:
+            self._reconnector.cancel()
+            try:
+                await self._reconnector
+            except asyncio.CancelledError:
+                pass
+            self._reconnector = None
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        self._fail_pending(ConnectionError("Client closed"))
+        self._close_subscriptions()
+        # A callback may be the one closing the client; don't wait on it
+        callbacks = [t for t in self._callback_tasks if t is not asyncio.current_task()]
+        for task in callbacks:
+            task.cancel()
+        if callbacks:
+            await asyncio.gather(*callbacks, return_exceptions=True)
         if self._ws:
             await self._ws.close()
             self._ws = None
             self._connected = False
 
+    @property
+    def connected(self) -> bool:
+        """True while the connection is open and its reader is running."""
+        return self._ws is not None and self._reader is not None and not self._reader.done()
+
+    async def ping(self, method: str = PING_METHOD, params: Optional[Dict[str, Any]] = None) -> float:
+        """Round-trip a call and return its latency in milliseconds.
+
+        By default this asks ``models.list`` for a single item, so the probe
+        stays small however large the gateway's lists are. ``params``
+        defaults to ``PING_PARAMS`` for that method and to none otherwise.
+        The response cache is bypassed.
+        """
+        if params is None and method == PING_METHOD:
+            params = dict(PING_PARAMS)
+        start = time.monotonic()
+        await self.call(method, params, use_cache=False)
+        return (time.monotonic() - start) * 1000
+
     @property
     def device_token(self) -> Optional[str]:
         return self._device_token
@@ -0,0 +1,189 @@
+"""Pool of authenticated gateway connections keyed by instance."""
+from __future__ import annotations
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, Optional
+
+from minions import Minion
+from .gateway_client import PING_METHOD, GatewayClient
+from .response_cache import ResponseCache
+
+ClientFactory = Callable[[str, Optional[str], Optional[str]], GatewayClient]
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    health_check_failures: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _PoolEntry:
+    client: GatewayClient
+    last_used: float
+    leases: int = 0
+
+
+class GatewayPool:
+    """Keeps authenticated :class:`GatewayClient` connections for reuse.
+
+    Connections are keyed by instance id (or URL) and handed out as leases.
+    A client multiplexes calls, so concurrent leases of the same key share one
+    connection. A connection idle for more than ``health_check_after``
+    seconds is pinged before it is reused and replaced if the ping fails.
+    The ping is :meth:`GatewayClient.ping` with ``ping_method`` and
+    ``ping_params``, a one-item ``models.list`` by default.
+    Idle connections are closed after ``idle_timeout`` seconds, and once the
+    pool holds more than ``max_size`` connections the least recently used
+    idle ones are evicted; leased connections are never closed under a caller.
+    A ``cache`` is shared by every pooled client, keyed by the pool key, so
+    cached responses outlive the connection that fetched them.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        idle_timeout: float = 300.0,
+        health_check_after: float = 30.0,
+        ping_timeout: float = 2.0,
+        client_factory: ClientFactory = GatewayClient,
+        clock: Callable[[], float] = time.monotonic,
+        cache: Optional[ResponseCache] = None,
+        ping_method: str = PING_METHOD,
+        ping_params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.ping_timeout = ping_timeout
+        self.ping_method = ping_method
+        self.ping_params = ping_params
+        self.client_factory = client_factory
+        self.clock = clock
+        self.cache = cache
+        self.stats = PoolStats()
+        self._entries: 'OrderedDict[str, _PoolEntry]' = OrderedDict()
+        self._key_locks: Dict[str, asyncio.Lock] = {}
+        # Clients evicted or replaced while leased, closed on their last release
+        self._retired: Dict[int, _PoolEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def acquire(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        device_private_key: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> GatewayClient:
+        """Return a connected client for ``key`` (default ``url``); pair with :meth:`release`."""
+        key = key or url
+        lock = self._key_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry is not None and not await self._healthy(entry):
+                self.stats.health_check_failures += 1
+                await self._discard(key)
+                entry = None
+            if entry is not None:
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.stats.misses += 1
+                client = self.client_factory(url, token, device_private_key)
+                if self.cache is not None:
+                    client.cache, client.cache_key = self.cache, key
+                await client.open_connection()
+                entry = self._entries[key] = _PoolEntry(client, self.clock())
+            entry.leases += 1
+            entry.last_used = self.clock()
+        await self._evict()
+        return entry.client
+
+    async def release(self, client: GatewayClient) -> None:
+        """Return a lease taken with :meth:`acquire`."""
+        entry = next((e for e in self._entries.values() if e.client is client), None)
+        if entry is None:
+            entry = self._retired.get(id(client))
+            if entry is None:
+                return
+            entry.leases -= 1
+            if entry.leases <= 0:
+                del self._retired[id(client)]
+                await client.close()
+            return
+        entry.leases = max(entry.leases - 1, 0)
+        entry.last_used = self.clock()
+        await self._evict()
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        device_private_key: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> AsyncIterator[GatewayClient]:
+        client = await self.acquire(url, token, device_private_key, key)
+        try:
+            yield client
+        finally:
+            await self.release(client)
+
+    def lease_instance(self, instance: Minion) -> AsyncContextManager[GatewayClient]:
+        """Lease the connection for a registered instance minion, keyed by its id."""
+        fields = instance.fields
+        return self.lease(fields['url'], fields.get('token'), fields.get('devicePrivateKey'), key=instance.id)
+
+    async def _healthy(self, entry: _PoolEntry) -> bool:
+        if not entry.client.connected:
+            return False
+        if entry.leases or self.clock() - entry.last_used < self.health_check_after:
+            return True
+        try:
+            await asyncio.wait_for(entry.client.ping(self.ping_method, self.ping_params), timeout=self.ping_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.leases:
+            self._retired[id(entry.client)] = entry
+        else:
+            await entry.client.close()
+
+    async def _evict(self) -> None:
+        now = self.clock()
+        for key, entry in list(self._entries.items()):
+            if not entry.leases and now - entry.last_used > self.idle_timeout:
+                self.stats.evictions += 1
+                await self._discard(key)
+        while len(self._entries) > self.max_size:
+            # Least recently used first; leased connections are skipped
+            idle = next((k for k, e in self._entries.items() if not e.leases), None)
+            if idle is None:
+                break
+            self.stats.evictions += 1
+            await self._discard(idle)
+
+    async def close(self) -> None:
+        """Close every pooled connection, leased or not."""
+        entries = list(self._entries.values()) + list(self._retired.values())
+        self._entries.clear()
+        self._retired.clear()
+        for entry in entries:
+            await entry.client.close()
@@ -0,0 +1,173 @@
+"""Periodic health checks that keep instance ping fields current."""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from minions import Minion
+from .circuit_breaker import BreakerRegistry, CircuitOpenError
+from .deadline import detached_context
+from .gateway_client import PING_METHOD, GatewayClient
+from .gateway_pool import ClientFactory, GatewayPool
+from .instance_manager import InstanceManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HealthCheck:
+    """Outcome of pinging one instance; ``latency_ms`` is None on failure."""
+    instance_id: str
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    # Not pinged because its circuit breaker is open
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.latency_ms is not None
+
+
+class HealthCheckScheduler:
+    """Pings every registered instance each ``interval`` seconds.
+
+    A round pings at most ``concurrency`` instances at a time, each within
+    ``timeout`` seconds (connect plus ping). It then writes ``status``,
+    ``lastPingAt`` and ``lastPingLatencyMs`` for the whole fleet in one
+    batched update via :meth:`InstanceManager.record_pings`. Connections
+    come from ``pool`` when one is given, otherwise each ping uses a fresh
+    client. Run a single round with :meth:`check`, or keep it going in the
+    background with :meth:`start` / :meth:`stop` (or ``async with``).
+
+    The ping is :meth:`GatewayClient.ping` with ``ping_method`` and
+    ``ping_params``: by default ``models.list`` limited to one item, which
+    stays cheap on gateways whose presence payload is large.
+
+    With ``breakers``, instances whose circuit breaker is open are not
+    pinged until their cooldown has passed. The first ping after that is the
+    half-open trial, and breaker state is recorded with the ping results.
+    """
+
+    def __init__(
+        self,
+        instances: Optional[InstanceManager] = None,
+        interval: float = 60.0,
+        timeout: float = 5.0,
+        concurrency: int = 16,
+        pool: Optional[GatewayPool] = None,
+        client_factory: ClientFactory = GatewayClient,
+        breakers: Optional[BreakerRegistry] = None,
+        ping_method: str = PING_METHOD,
+        ping_params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.instances = instances or InstanceManager()
+        self.breakers = breakers
+        self.interval = interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.pool = pool
+        self.client_factory = client_factory
+        self.ping_method = ping_method
+        self.ping_params = ping_params
+        self.rounds = 0
+        self.last_results: List[HealthCheck] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def check(self, instance_ids: Optional[List[str]] = None) -> List[HealthCheck]:
+        """Ping ``instance_ids`` (default: every registered instance) and record the results."""
+        if instance_ids is None:
+            targets = self.instances.list()
+        else:
+            targets = [m for m in (self.instances.get_by_id(i) for i in instance_ids) if m is not None]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(instance: Minion) -> HealthCheck:
+            async with semaphore:
+                return await self._check_one(instance)
+
+        results = list(await asyncio.gather(*(bounded(m) for m in targets)))
+        with self.instances.batch():
+            self.instances.record_pings({r.instance_id: r.latency_ms for r in results})
+            if self.breakers is not None:
+                self.instances.record_breakers({m.id: self.breakers.breaker(m) for m in targets})
+        self.rounds += 1
+        self.last_results = results
+        return results
+
+    async def _check_one(self, instance: Minion) -> HealthCheck:
+        fields = instance.fields
+        result = HealthCheck(instance_id=instance.id)
+        breaker = bucket = None
+        if self.breakers is not None:
+            breaker = self.breakers.breaker(instance)
+            bucket = self.breakers.bucket(instance.id)
+            try:
+                breaker.allow()
+            except CircuitOpenError as exc:
+                result.error = str(exc)
+                result.skipped = True
+                return result
+        contacted = False
+        try:
+            async with asyncio.timeout(self.timeout):
+                if bucket is not None:
+                    await bucket.acquire()
+                contacted = True
+                if self.pool is not None:
+                    async with self.pool.lease_instance(instance) as client:
+                        result.latency_ms = await client.ping(self.ping_method, self.ping_params)
+                else:
+                    client = self.client_factory(fields['url'], fields.get('token'), fields.get('devicePrivateKey'))
+                    try:
+                        await client.open_connection()
+                        result.latency_ms = await client.ping(self.ping_method, self.ping_params)
+                    finally:
+                        await client.close()
+        except TimeoutError:
+            result.error = f"Timed out after {self.timeout}s"
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        if breaker is not None and contacted:
+            if result.ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        return result
+
+    def start(self) -> None:
+        """Run :meth:`check` every ``interval`` seconds until :meth:`stop`."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=detached_context())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.check()
+            except Exception:
+                # A failed round (e.g. storage unavailable) must not end the schedule
+                logger.exception("Health check round failed")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def __aenter__(self) -> 'HealthCheckScheduler':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
@@ -1,27 +1,15 @@
 """Instance manager - Python equivalent of TypeScript InstanceManager."""
 from __future__ import annotations
-import json
-from pathlib import Path
-from typing import List, Optional, Dict, Any
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import ContextManager, List, Mapping, Optional, Dict, Any
 
 from minions import Minion, Relation, create_minion, soft_delete, generate_id, now
-from .types import openclaw_instance_type
-
-DATA_DIR = Path.home() / '.openclaw-manager'
-DATA_FILE = DATA_DIR / 'data.json'
-
-
-def _read_storage() -> Dict[str, Any]:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    try:
-        return json.loads(DATA_FILE.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {'minions': [], 'relations': []}
-
-
-def _write_storage(data: Dict[str, Any]) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+from .circuit_breaker import CIRCUIT_OPEN_STATUS, CLOSED, CircuitBreaker
+from .snapshot_manager import holds_config_blob
+from .types import openclaw_instance_type, openclaw_snapshot_type
+from .storage import DATA_DIR, DATA_FILE, StorageBackend, canonical_json, default_backend
 
 
 def _minion_from_dict(d: Dict[str, Any]) -> Minion:
@@ -29,10 +17,11 @@ def _minion_from_dict(d: Dict[str, Any]) -> Minion:
         id=d['id'],
         title=d['title'],
         minion_type_id=d['minionTypeId'],
-        fields=d.get('fields', {}),
+        # Records may be shared with the storage cache; hand out copies
+        fields=copy.deepcopy(d.get('fields', {})),
         created_at=d.get('createdAt', now()),
         updated_at=d.get('updatedAt', now()),
-        tags=d.get('tags', []),
+        tags=list(d.get('tags') or []),
         status=d.get('status', 'active'),
         priority=d.get('priority', 'medium'),
         description=d.get('description', ''),
@@ -58,7 +47,44 @@ def _minion_to_dict(m: Minion) -> Dict[str, Any]:
     return d
 
 
+@dataclass
+class VacuumReport:
+    """Outcome of :meth:`InstanceManager.vacuum`.
+
+    ``records_scanned`` is the store size before the run; ``bytes_reclaimed``
+    is the serialized size of the purged records, i.e. the parse work every
+    later full load no longer does.
+    """
+    minions: List[str] = field(default_factory=list)
+    relations: List[str] = field(default_factory=list)
+    records_scanned: int = 0
+    bytes_reclaimed: int = 0
+    dry_run: bool = False
+
+
+def _deleted_before(record: Dict[str, Any], cutoff: datetime) -> bool:
+    try:
+        deleted = datetime.fromisoformat(record['deletedAt'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    if deleted.tzinfo is None:
+        deleted = deleted.replace(tzinfo=timezone.utc)
+    return deleted <= cutoff
+
+
 class InstanceManager:
+    def __init__(self, storage: Optional[StorageBackend] = None) -> None:
+        self.storage = storage or default_backend()
+
+    def batch(self) -> ContextManager[None]:
+        """Commit every mutation made inside the block in a single write.
+
+        Managers built on the same backend share the batch, so instances,
+        snapshots and decomposed configs can be written together. Nothing is
+        persisted if the block raises.
+        """
+        return self.storage.transaction()
+
     def register(self, name: str, url: str, token: Optional[str] = None) -> Minion:
         fields: Dict[str, Any] = {'url': url, 'status': 'registered'}
         if token:
@@ -66,33 +92,145 @@ class InstanceManager:
         minion, validation = create_minion({"title": name, "fields": fields}, openclaw_instance_type)
         if not validation.valid:
             raise ValueError(f"Validation failed: {[e.message for e in validation.errors]}")
-        storage = _read_storage()
-        storage['minions'].append(_minion_to_dict(minion))
-        _write_storage(storage)
+        self.storage.put_minion(_minion_to_dict(minion))
         return minion
 
     def list(self) -> List[Minion]:
-        storage = _read_storage()
-        return [
-            _minion_from_dict(m) for m in storage['minions']
-            if m.get('minionTypeId') == openclaw_instance_type.id
-            and not m.get('deletedAt')
-        ]
+        with self.storage.reading():
+            return [
+                _minion_from_dict(m) for m in self.storage.list_minions(openclaw_instance_type.id)
+                if not m.get('deletedAt')
+            ]
 
     def get_by_id(self, id: str) -> Optional[Minion]:
-        storage = _read_storage()
-        for m in storage['minions']:
-            if m.get('id') == id and not m.get('deletedAt'):
-                return _minion_from_dict(m)
+        m = self.storage.get_minion(id)
+        if m and not m.get('deletedAt'):
+            return _minion_from_dict(m)
         return None
 
     def remove(self, id: str) -> None:
-        storage = _read_storage()
-        for i, m in enumerate(storage['minions']):
-            if m.get('id') == id:
-                minion = _minion_from_dict(m)
-                deleted = soft_delete(minion)
-                storage['minions'][i] = _minion_to_dict(deleted)
-                _write_storage(storage)
-                return
-        raise ValueError(f"Instance {id} not found")
+        m = self.storage.get_minion(id)
+        if not m:
+            raise ValueError(f"Instance {id} not found")
+        deleted = soft_delete(_minion_from_dict(m))
+        self.storage.put_minion(_minion_to_dict(deleted))
+
+    def record_pings(self, latencies: Mapping[str, Optional[float]], at: Optional[str] = None) -> int:
+        """Write ping results for many instances in one batched write.
+
+        ``latencies`` maps an instance id to its ping latency in milliseconds,
+        or to None when the instance did not answer. Answering instances get
+        ``status='online'``, ``lastPingAt`` and ``lastPingLatencyMs``; the
+        others become ``offline`` and keep their last successful ping.
+        Unknown and removed ids are skipped. Returns the number of instances
+        updated.
+        """
+        at = at or now()
+        updated = 0
+        with self.storage.transaction():
+            for id, latency in latencies.items():
+                record = self.storage.get_minion(id)
+                if not record or record.get('deletedAt'):
+                    continue
+                fields = dict(record.get('fields', {}))
+                if latency is None:
+                    fields['status'] = 'offline'
+                else:
+                    fields.update(status='online', lastPingAt=at, lastPingLatencyMs=round(latency, 3))
+                self.storage.put_minion({**record, 'fields': fields, 'updatedAt': at})
+                updated += 1
+        return updated
+
+    def record_breakers(self, breakers: Mapping[str, CircuitBreaker], at: Optional[str] = None) -> int:
+        """Persist circuit breaker state for many instances in one batched write.
+
+        An open or half-open breaker sets ``status='circuit-open'`` and
+        ``circuitRetryAt``, so later sweeps, even in another process, skip
+        the instance until then. A closed breaker clears ``circuitRetryAt``
+        and turns a ``circuit-open`` status back to ``online``. Every
+        instance gets ``consecutiveFailures``. Instances whose fields would
+        not change are not rewritten. Returns the number updated.
+        """
+        at = at or now()
+        updated = 0
+        with self.storage.transaction():
+            for id, breaker in breakers.items():
+                record = self.storage.get_minion(id)
+                if not record or record.get('deletedAt'):
+                    continue
+                fields = dict(record.get('fields', {}))
+                state = breaker.to_fields()
+                fields['consecutiveFailures'] = state['consecutiveFailures']
+                if breaker.state == CLOSED:
+                    fields.pop('circuitRetryAt', None)
+                    if fields.get('status') == CIRCUIT_OPEN_STATUS:
+                        fields['status'] = 'online'
+                else:
+                    fields.update(status=CIRCUIT_OPEN_STATUS, circuitRetryAt=state['circuitRetryAt'])
+                if fields == record.get('fields', {}):
+                    continue
+                self.storage.put_minion({**record, 'fields': fields, 'updatedAt': at})
+                updated += 1
+        return updated
+
+    def vacuum(
+        self,
+        older_than: timedelta = timedelta(0),
+        dry_run: bool = False,
+        at: Optional[datetime] = None,
+    ) -> VacuumReport:
+        """Physically purge soft-deleted minions and everything they own.
+
+        Starting from every minion whose ``deletedAt`` is at least
+        ``older_than`` old, the purge follows outgoing ``parent_of`` relations
+        to decomposed children and snapshots; a child that still has a live
+        parent is kept. Relations touching a purged minion, and relations
+        whose endpoints no longer exist, are removed too, and snapshot config
+        blobs are released. Everything is written in one batch. With
+        ``dry_run`` nothing is written and the report lists what would go.
+        """
+        with self.storage.reading():
+            cutoff = (at or datetime.now(timezone.utc)) - older_than
+            minions = {m['id']: m for m in self.storage.list_minions()}
+            relations = self.storage.list_relations()
+            report = VacuumReport(records_scanned=len(minions) + len(relations), dry_run=dry_run)
+
+            parents: Dict[str, List[str]] = {}
+            for r in relations:
+                if r.get('type') == 'parent_of':
+                    parents.setdefault(r['targetId'], []).append(r['sourceId'])
+
+            doomed = {id for id, m in minions.items() if m.get('deletedAt') and _deleted_before(m, cutoff)}
+            frontier = list(doomed)
+            while frontier:
+                parent_id = frontier.pop()
+                for r in self.storage.list_relations(source_id=parent_id, type='parent_of'):
+                    child = r['targetId']
+                    if child in doomed or child not in minions:
+                        continue
+                    if all(p in doomed or p not in minions for p in parents.get(child, [])):
+                        doomed.add(child)
+                        frontier.append(child)
+
+            dead_relations = [
+                r for r in relations
+                if r['sourceId'] in doomed or r['targetId'] in doomed
+                or r['sourceId'] not in minions or r['targetId'] not in minions
+            ]
+            report.minions = [id for id in minions if id in doomed]
+            report.relations = [r['id'] for r in dead_relations]
+            report.bytes_reclaimed = sum(len(canonical_json(minions[id])) for id in report.minions)
+            report.bytes_reclaimed += sum(len(canonical_json(r)) for r in dead_relations)
+            if dry_run:
+                return report
+
+            with self.storage.transaction():
+                for r in dead_relations:
+                    self.storage.delete_relation(r['id'])
+                for id in report.minions:
+                    record = minions[id]
+                    fields = record.get('fields', {})
+                    if record.get('minionTypeId') == openclaw_snapshot_type.id and holds_config_blob(fields):
+                        self.storage.release_blob(fields['configHash'])
+                    self.storage.delete_minion(id)
+            return report
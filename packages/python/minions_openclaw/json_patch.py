@@ -0,0 +1,76 @@
+"""Minimal RFC 6902 style structural diff/patch for JSON values."""
+from __future__ import annotations
+import copy
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def _escape(token: str) -> str:
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def make_patch(a: Any, b: Any) -> Patch:
+    """Return ``add``/``remove``/``replace`` operations turning ``a`` into ``b``."""
+    ops: Patch = []
+    _diff(a, b, '', ops)
+    return ops
+
+
+def _diff(a: Any, b: Any, path: str, ops: Patch) -> None:
+    if type(a) is not type(b):
+        ops.append({'op': 'replace', 'path': path, 'value': b})
+    elif isinstance(a, dict):
+        for key in a:
+            if key not in b:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in b.items():
+            child = f'{path}/{_escape(key)}'
+            if key not in a:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+            else:
+                _diff(a[key], value, child, ops)
+    elif isinstance(a, list):
+        common = min(len(a), len(b))
+        for i in range(common):
+            _diff(a[i], b[i], f'{path}/{i}', ops)
+        # Remove from the end so earlier indexes stay valid while applying
+        for i in range(len(a) - 1, common - 1, -1):
+            ops.append({'op': 'remove', 'path': f'{path}/{i}'})
+        for i in range(common, len(b)):
+            ops.append({'op': 'add', 'path': f'{path}/{i}', 'value': b[i]})
+    elif a != b:
+        ops.append({'op': 'replace', 'path': path, 'value': b})
+
+
+def apply_patch(doc: Any, patch: Patch) -> Any:
+    """Apply ``patch`` to a copy of ``doc`` and return the result."""
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        path = op['path']
+        value = copy.deepcopy(op.get('value'))
+        if path == '':
+            doc = value
+            continue
+        tokens = [_unescape(t) for t in path.split('/')[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = int(last)
+            if op['op'] == 'add':
+                parent.insert(index, value)
+            elif op['op'] == 'remove':
+                del parent[index]
+            else:
+                parent[index] = value
+        elif op['op'] == 'remove':
+            del parent[last]
+        else:
+            parent[last] = value
+    return doc
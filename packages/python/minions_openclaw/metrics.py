@@ -0,0 +1,118 @@
+"""Per-method latency histograms and traffic counters for gateway clients."""
+from __future__ import annotations
+import bisect
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+# Upper bounds in milliseconds; the last bucket is unbounded
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds.
+
+    Recording is O(log buckets) and memory stays constant however many
+    samples arrive. Quantiles are estimated by linear interpolation inside
+    the bucket that holds them, clamped to the observed min and max.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[index - 1] if index else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.max
+                estimate = low + (high - low) * ((rank - seen) / n)
+                return min(max(estimate, self.min), self.max)
+            seen += n
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+def _byte_length(raw: Any) -> int:
+    if isinstance(raw, str):
+        # ASCII text is one byte per character; avoid copying a large frame to count it
+        return len(raw) if raw.isascii() else len(raw.encode())
+    return len(raw)
+
+
+@dataclass
+class ClientMetrics:
+    """Traffic seen by one :class:`~minions_openclaw.gateway_client.GatewayClient`.
+
+    ``latency`` holds a histogram per method, covering calls that got a
+    response (including error frames). ``timeouts`` counts calls per method
+    that hit ``call_timeout``. Byte counts are of the JSON text sent and
+    received, handshake included.
+    """
+    latency: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    timeouts: Dict[str, int] = field(default_factory=dict)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    frames_in: int = 0
+    frames_out: int = 0
+
+    def observe(self, method: str, ms: float) -> None:
+        histogram = self.latency.get(method)
+        if histogram is None:
+            histogram = self.latency[method] = LatencyHistogram()
+        histogram.observe(ms)
+
+    def timed_out(self, method: str) -> None:
+        self.timeouts[method] = self.timeouts.get(method, 0) + 1
+
+    def sent(self, raw: Any) -> None:
+        self.frames_out += 1
+        self.bytes_out += _byte_length(raw)
+
+    def received(self, raw: Any) -> None:
+        self.frames_in += 1
+        self.bytes_in += _byte_length(raw)
+
+    def histogram(self, method: str) -> Optional[LatencyHistogram]:
+        return self.latency.get(method)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'latency': {method: h.as_dict() for method, h in self.latency.items()},
+            'timeouts': dict(self.timeouts),
+            'bytesIn': self.bytes_in,
+            'bytesOut': self.bytes_out,
+            'framesIn': self.frames_in,
+            'framesOut': self.frames_out,
+        }
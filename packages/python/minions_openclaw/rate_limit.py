@@ -0,0 +1,60 @@
+"""Token-bucket rate limiting for gateway traffic."""
+from __future__ import annotations
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Allows ``rate`` operations per second with bursts of up to ``burst``.
+
+    The bucket starts full. :meth:`acquire` reserves its tokens immediately
+    and sleeps off any deficit, so waiters are served in arrival order and a
+    burst of callers is spread out evenly instead of retrying in lockstep. A
+    waiter that is cancelled gives its tokens back.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens available now; negative while waiters hold reservations."""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` if they are available now, without waiting."""
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Take ``tokens``, waiting until the bucket has refilled enough."""
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self._tokens / self.rate)
+        except asyncio.CancelledError:
+            self._tokens += tokens
+            raise
@@ -0,0 +1,243 @@
+"""Recording of gateway traffic and deterministic replay."""
+from __future__ import annotations
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from . import codec
+
+RECORDING_VERSION = 1
+
+# (seconds since the connection opened, 'i' | 'o' | 'e', raw frame or error text)
+Frame = Tuple[float, str, str]
+
+
+def _text(raw: Any) -> str:
+    return raw.decode() if isinstance(raw, (bytes, bytearray)) else raw
+
+
+class TrafficRecorder:
+    """Appends every frame a :class:`GatewayClient` sends or receives to a file.
+
+    The file is newline-delimited JSON: a header line, then one short line
+    per event with its offset in seconds since recording started. ``c``
+    marks a new connection, ``o`` and ``i`` hold the raw text of sent and
+    received frames, and ``e`` records that a connection was lost. Frames are
+    stored verbatim, so replay feeds the parser exactly the bytes the
+    gateway sent. Writes go through a buffered file; call :meth:`close` (or
+    use the recorder as a context manager) to flush it.
+    """
+
+    def __init__(self, path: os.PathLike | str, url: Optional[str] = None) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.frames = 0
+        self._start = time.monotonic()
+        self._file = self.path.open('w', encoding='utf-8')
+        self._write({'recording': RECORDING_VERSION, 'url': url,
+                     'started': datetime.now(timezone.utc).isoformat()})
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        if self._file is None:
+            return
+        self._file.write(codec.dumps_str(entry))
+        self._file.write('\n')
+
+    def _offset(self) -> float:
+        return round(time.monotonic() - self._start, 6)
+
+    def connection(self, url: str) -> None:
+        self._write({'t': self._offset(), 'c': url})
+
+    def sent(self, raw: Any) -> None:
+        self.frames += 1
+        self._write({'t': self._offset(), 'o': _text(raw)})
+
+    def received(self, raw: Any) -> None:
+        self.frames += 1
+        self._write({'t': self._offset(), 'i': _text(raw)})
+
+    def lost(self, error: BaseException) -> None:
+        self._write({'t': self._offset(), 'e': str(error)})
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'TrafficRecorder':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class Recording:
+    """A recorded session, split into one frame list per connection.
+
+    :meth:`connector` turns it into a transport for
+    ``GatewayClient(connect=...)``: each connect replays the next recorded
+    connection, so a session that reconnected replays its reconnects too.
+    """
+
+    def __init__(self, connections: List[List[Frame]], url: Optional[str] = None) -> None:
+        self.connections = connections
+        self.url = url
+
+    @classmethod
+    def load(cls, path: os.PathLike | str) -> 'Recording':
+        connections: List[List[Frame]] = []
+        url = None
+        opened = 0.0
+        with Path(path).open('rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = codec.loads(line)
+                if 'recording' in entry:
+                    if entry['recording'] != RECORDING_VERSION:
+                        raise ValueError(f"Unsupported recording version: {entry['recording']}")
+                    url = entry.get('url')
+                elif 'c' in entry:
+                    opened = entry['t']
+                    connections.append([])
+                    url = url or entry['c']
+                elif connections:
+                    kind = 'i' if 'i' in entry else 'o' if 'o' in entry else 'e'
+                    connections[-1].append((entry['t'] - opened, kind, entry[kind]))
+        return cls(connections, url)
+
+    def incoming(self) -> Iterator[str]:
+        """Every received frame in order, e.g. for parser benchmarks."""
+        for frames in self.connections:
+            for _, kind, raw in frames:
+                if kind == 'i':
+                    yield raw
+
+    def calls(self, connection: int = 0) -> List[Tuple[str, Any]]:
+        """``(method, params)`` of every call sent on one connection."""
+        result = []
+        for _, kind, raw in self.connections[connection]:
+            if kind == 'o':
+                for call in _calls_in(codec.loads(raw)):
+                    result.append((call.get('method', ''), call.get('params')))
+        return result
+
+    def connector(self, speed: Optional[float] = 1.0) -> 'ReplayConnector':
+        """Transport replaying this recording; see :class:`ReplaySocket` for ``speed``."""
+        return ReplayConnector(self, speed)
+
+
+class ReplayConnector:
+    """Hands out one :class:`ReplaySocket` per recorded connection."""
+
+    def __init__(self, recording: Recording, speed: Optional[float] = 1.0) -> None:
+        self.recording = recording
+        self.speed = speed
+        self.sockets: List[ReplaySocket] = []
+
+    async def __call__(self, url: str, additional_headers: Optional[Dict[str, str]] = None) -> 'ReplaySocket':
+        if len(self.sockets) >= len(self.recording.connections):
+            raise ConnectionError("Recording has no more connections")
+        socket = ReplaySocket(self.recording.connections[len(self.sockets)], self.speed)
+        self.sockets.append(socket)
+        return socket
+
+
+def _calls_in(msg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if msg.get('type') == 'call':
+        return [msg]
+    if msg.get('type') == 'batch' and isinstance(msg.get('calls'), list):
+        return msg['calls']
+    return []
+
+
+def _ids_in(msg: Dict[str, Any]) -> List[str]:
+    if msg.get('type') == 'batch' and isinstance(msg.get('results'), list):
+        return [r['id'] for r in msg['results'] if r.get('id')]
+    return [msg['id']] if msg.get('id') else []
+
+
+class ReplaySocket:
+    """Plays back the received side of one recorded connection.
+
+    Received frames are released at their recorded offset divided by
+    ``speed`` (``1.0`` keeps the original timing, ``10`` is ten times
+    faster, ``None`` or ``0`` sends them as soon as they are read). Calls
+    made by the client are matched to recorded calls of the same method in
+    order, and responses carry the live call ids. A response is held back
+    until the client has sent its call, so replies never overtake requests.
+    A recorded connection loss ends the socket with ``ConnectionError``.
+    """
+
+    def __init__(self, frames: List[Frame], speed: Optional[float] = 1.0) -> None:
+        self.speed = speed
+        self.sent: List[str] = []
+        self.closed = False
+        self._incoming: Deque[Frame] = deque(f for f in frames if f[1] in ('i', 'e'))
+        self._recorded: Dict[str, Deque[str]] = {}
+        for _, kind, raw in frames:
+            if kind == 'o':
+                for call in _calls_in(codec.loads(raw)):
+                    self._recorded.setdefault(call.get('method', ''), deque()).append(call['id'])
+        self._ids: Dict[str, str] = {}
+        self._changed = asyncio.Condition()
+        self._start = time.monotonic()
+
+    async def send(self, raw: Any) -> None:
+        if self.closed:
+            raise ConnectionError("Socket closed")
+        self.sent.append(_text(raw))
+        calls = _calls_in(codec.loads(raw))
+        if not calls:
+            return
+        async with self._changed:
+            for call in calls:
+                recorded = self._recorded.get(call.get('method', ''))
+                if recorded:
+                    self._ids[recorded.popleft()] = call['id']
+            self._changed.notify_all()
+
+    async def recv(self) -> str:
+        if not self._incoming:
+            # The recorded connection stayed open; idle until closed
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.closed)
+        if self.closed:
+            raise ConnectionError("Socket closed")
+        offset, kind, raw = self._incoming.popleft()
+        if self.speed:
+            delay = self._start + offset / self.speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if kind == 'e':
+            self.closed = True
+            raise ConnectionError(f"Recorded connection lost: {raw}")
+        msg = codec.loads(raw)
+        ids = _ids_in(msg)
+        if not ids:
+            return raw
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.closed or all(i in self._ids for i in ids))
+        if self.closed:
+            raise ConnectionError("Socket closed")
+        if msg.get('type') == 'batch':
+            for result in msg['results']:
+                if result.get('id'):
+                    result['id'] = self._ids[result['id']]
+        else:
+            msg['id'] = self._ids[msg['id']]
+        return codec.dumps_str(msg)
+
+    async def close(self) -> None:
+        self.closed = True
+        async with self._changed:
+            self._changed.notify_all()
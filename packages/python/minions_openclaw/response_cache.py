@@ -0,0 +1,153 @@
+"""TTL + LRU cache for read-only gateway call results."""
+from __future__ import annotations
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from .storage.blobs import canonical_json
+
+DEFAULT_CACHED_METHODS: FrozenSet[str] = frozenset({
+    'agents.list', 'channels.list', 'models.list', 'system-presence',
+})
+
+# Pushed event name -> cached methods it makes stale (None: every method)
+DEFAULT_INVALIDATIONS: Mapping[str, Optional[Tuple[str, ...]]] = {
+    'agents.changed': ('agents.list',),
+    'channels.changed': ('channels.list',),
+    'models.changed': ('models.list',),
+    'presence': ('system-presence',),
+    'config.changed': None,
+}
+
+# Returned by ResponseCache.get() when nothing usable is cached
+MISSING = object()
+
+CacheKey = Tuple[str, str, bytes]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+
+
+class ResponseCache:
+    """Remembers results of read-only calls per ``(instance, method, params)``.
+
+    Only calls to ``methods`` are cached. An entry expires ``ttl`` seconds
+    after it was stored, and beyond ``max_entries`` the least recently used
+    entry is evicted. Pushed events named in ``invalidate_on`` drop the
+    entries of the methods they map to for the instance that pushed them.
+    Values are deep-copied in and out, so callers may mutate what they get.
+    One cache can be shared by several clients; each client passes its own
+    instance key.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        max_entries: int = 1024,
+        methods: Iterable[str] = DEFAULT_CACHED_METHODS,
+        invalidate_on: Mapping[str, Optional[Tuple[str, ...]]] = DEFAULT_INVALIDATIONS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.methods = frozenset(methods)
+        self.invalidate_on = dict(invalidate_on)
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[CacheKey, _CacheEntry]' = OrderedDict()
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cacheable(self, method: str) -> bool:
+        return method in self.methods
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; see :meth:`put`."""
+        return self._generation
+
+    @staticmethod
+    def key(instance: str, method: str, params: Optional[Dict[str, Any]] = None) -> CacheKey:
+        return (instance, method, canonical_json(params or {}))
+
+    def get(self, instance: str, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Return the cached result or :data:`MISSING`, counting a hit or miss."""
+        key = self.key(instance, method, params)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self.clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return MISSING
+        self.stats.hits += 1
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry.value)
+
+    def put(
+        self,
+        instance: str,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        value: Any,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Store ``value``; skipped if ``generation`` was read before an invalidation.
+
+        Pass the :attr:`generation` observed when the call was sent, so a
+        response that raced with an invalidating event is not cached.
+        """
+        if generation is not None and generation != self._generation:
+            return
+        key = self.key(instance, method, params)
+        self._entries[key] = _CacheEntry(copy.deepcopy(value), self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, instance: Optional[str] = None, methods: Optional[Iterable[str]] = None) -> int:
+        """Drop entries for ``instance`` (all if None) and ``methods`` (all if None)."""
+        wanted = None if methods is None else set(methods)
+        stale = [
+            key for key in self._entries
+            if (instance is None or key[0] == instance) and (wanted is None or key[1] in wanted)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self._generation += 1
+        self.stats.invalidations += len(stale)
+        return len(stale)
+
+    def handle_event(self, instance: str, name: Optional[str]) -> int:
+        """Apply the ``invalidate_on`` rule for a pushed event, if any."""
+        if name not in self.invalidate_on:
+            return 0
+        return self.invalidate(instance, self.invalidate_on[name])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+
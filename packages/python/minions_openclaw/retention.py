@@ -0,0 +1,74 @@
+"""Declarative snapshot retention policies."""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class RetentionPolicy:
+    """Which snapshots of an instance survive :meth:`SnapshotManager.prune`.
+
+    Snapshots younger than ``keep_all`` are all kept. Up to ``hourly`` of age
+    the newest snapshot of each clock hour is kept, and beyond that the newest
+    of each day, for as long as ``daily`` (``None`` keeps one a day forever).
+    ``max_per_instance`` then caps the survivors, newest first. The latest
+    snapshot of an instance is never pruned.
+    """
+    keep_all: timedelta = timedelta(hours=24)
+    hourly: timedelta = timedelta(days=30)
+    daily: Optional[timedelta] = None
+    max_per_instance: Optional[int] = None
+
+    def select_expired(
+        self, snapshots: List[Dict[str, Any]], at: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the snapshots of a single instance that this policy drops."""
+        at = at or datetime.now(timezone.utc)
+        ordered = sorted(snapshots, key=_captured_at, reverse=True)
+        kept: List[Dict[str, Any]] = []
+        expired: List[Dict[str, Any]] = []
+        buckets = set()
+        for i, snapshot in enumerate(ordered):
+            captured = _captured_at(snapshot)
+            age = at - captured
+            if i == 0 or age <= self.keep_all:
+                bucket = None
+            elif age <= self.hourly:
+                bucket = ('h', captured.strftime('%Y-%m-%dT%H'))
+            elif self.daily is None or age <= self.daily:
+                bucket = ('d', captured.strftime('%Y-%m-%d'))
+            else:
+                expired.append(snapshot)
+                continue
+            if bucket is not None and bucket in buckets:
+                expired.append(snapshot)
+                continue
+            buckets.add(bucket)
+            kept.append(snapshot)
+        if self.max_per_instance is not None:
+            expired.extend(kept[max(self.max_per_instance, 1):])
+        return expired
+
+
+@dataclass
+class PruneReport:
+    """Outcome of a :meth:`SnapshotManager.prune` run.
+
+    ``reclaimed_bytes`` counts the serialized snapshot records and relations
+    removed plus config blobs no longer referenced by any snapshot.
+    """
+    removed: List[str] = field(default_factory=list)
+    kept: int = 0
+    reclaimed_bytes: int = 0
+    dry_run: bool = False
+
+
+def _captured_at(snapshot: Dict[str, Any]) -> datetime:
+    fields = snapshot.get('fields', {})
+    value = fields.get('capturedAt') or snapshot.get('createdAt')
+    try:
+        captured = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return captured.astimezone(timezone.utc) if captured.tzinfo else captured.replace(tzinfo=timezone.utc)
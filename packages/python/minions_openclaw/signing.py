@@ -0,0 +1,97 @@
+"""Challenge signing with cached device keys."""
+from __future__ import annotations
+import asyncio
+import base64
+import hashlib
+import threading
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional, Sequence
+
+RSA_SHA256 = 'rsa-sha256'
+ED25519 = 'ed25519'
+
+
+class SigningError(RuntimeError):
+    """The device key could not be loaded or could not sign the challenge."""
+
+
+class ChallengeSigner:
+    """Signs gateway challenges, keeping parsed private keys in memory.
+
+    Parsing a PEM key is far more expensive than signing with it, so loaded
+    key objects are cached by the digest of their PEM text. Signing runs in
+    ``executor`` (the loop's default thread pool when None) so that a burst
+    of handshakes does not stall the event loop.
+
+    RSA keys sign with PKCS1v15 / SHA-256, matching the TypeScript
+    GatewayClient (Node.js ``crypto.createSign`` default). Ed25519 keys are
+    used only when the challenge lists ``ed25519`` among its accepted
+    ``algorithms``.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        self.executor = executor
+        self._keys: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def load_key(self, pem: str) -> Any:
+        digest = hashlib.sha256(pem.encode()).hexdigest()
+        with self._lock:
+            key = self._keys.get(digest)
+        if key is not None:
+            return key
+        try:
+            from cryptography.hazmat.primitives import serialization
+        except ImportError as exc:
+            raise SigningError(
+                "cryptography package not installed. Run: pip install cryptography"
+            ) from exc
+        try:
+            key = serialization.load_pem_private_key(pem.encode(), password=None)
+        except (ValueError, TypeError) as exc:
+            raise SigningError(f"Invalid device private key: {exc}") from exc
+        with self._lock:
+            return self._keys.setdefault(digest, key)
+
+    def algorithm(self, pem: str) -> str:
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+        key = self.load_key(pem)
+        if isinstance(key, rsa.RSAPrivateKey):
+            return RSA_SHA256
+        if isinstance(key, ed25519.Ed25519PrivateKey):
+            return ED25519
+        raise SigningError(f"Unsupported device key type: {type(key).__name__}")
+
+    def sign(self, pem: str, message: bytes, accepted: Optional[Sequence[str]] = None) -> str:
+        """Return the base64 signature of ``message`` with the key in ``pem``.
+
+        ``accepted`` is the list of algorithms the gateway advertised, if any;
+        without it only RSA is assumed to be understood.
+        """
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        key = self.load_key(pem)
+        algorithm = self.algorithm(pem)
+        if algorithm != RSA_SHA256 and algorithm not in (accepted or ()):
+            raise SigningError(f"Gateway does not accept {algorithm} signatures")
+        try:
+            if algorithm == RSA_SHA256:
+                signature = key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+            else:
+                signature = key.sign(message)
+        except Exception as exc:
+            raise SigningError(f"Signing failed: {exc}") from exc
+        return base64.b64encode(signature).decode()
+
+    async def sign_async(self, pem: str, message: bytes, accepted: Optional[Sequence[str]] = None) -> str:
+        """:meth:`sign` on the executor; the first use of a key also parses it there."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.sign, pem, message, accepted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+# Shared by every client that is not given its own signer
+default_signer = ChallengeSigner()
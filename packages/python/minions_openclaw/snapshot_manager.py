@@ -1,101 +1,396 @@
 """Snapshot manager."""
 from __future__ import annotations
-import json
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import copy
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, ContextManager, Dict, List, Optional, Union
 
 from minions import Minion, Relation, create_minion, generate_id, now
+from . import codec
+from .json_patch import apply_patch, make_patch
+from .retention import PruneReport, RetentionPolicy
 from .types import openclaw_snapshot_type
+from .storage import (
+    DATA_DIR,
+    DATA_FILE,
+    StorageBackend,
+    canonical_chunks,
+    canonical_digest,
+    canonical_json,
+    content_digest,
+    default_backend,
+)
 
-DATA_DIR = Path.home() / '.openclaw-manager'
-DATA_FILE = DATA_DIR / 'data.json'
+# Fields describing how a snapshot's config is stored rather than what it is
+_DELTA_FIELDS = ('configBase', 'configPatch', 'configDepth')
 
 
-def _read_storage() -> Dict[str, Any]:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    try:
-        return json.loads(DATA_FILE.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {'minions': [], 'relations': []}
+def holds_config_blob(fields: Dict[str, Any]) -> bool:
+    """Whether a stored snapshot holds a reference to its config blob.
 
-
-def _write_storage(data: Dict[str, Any]) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+    Keyframes do. Deltas point at their base instead, and snapshots with
+    the config inline (legacy ones, and every one on a store shared with
+    the TypeScript SDK) have no blob.
+    """
+    return bool(fields.get('configHash')) and 'configBase' not in fields and 'config' not in fields
 
 
 class SnapshotManager:
-    def capture_snapshot(self, instance_id: str, gateway_data: Dict[str, Any]) -> Minion:
-        storage = _read_storage()
-        minion, _ = create_minion(
-            {
-                "title": f"Snapshot {now()}",
-                "fields": {
-                    'instanceId': instance_id,
-                    'capturedAt': now(),
-                    'config': json.dumps(gateway_data.get('config', {})),
-                    'agentCount': len(gateway_data.get('agents', [])),
-                    'channelCount': len(gateway_data.get('channels', [])),
-                    'modelCount': len(gateway_data.get('models', [])),
-                }
-            },
-            openclaw_snapshot_type
-        )
-        minion_dict = {
-            'id': minion.id,
-            'title': minion.title,
-            'minionTypeId': minion.minion_type_id,
-            'fields': minion.fields,
-            'createdAt': minion.created_at,
-            'updatedAt': minion.updated_at,
-            'tags': minion.tags,
-            'status': minion.status,
-            'priority': minion.priority,
-            'description': minion.description,
+    """Captures and queries point-in-time snapshots of gateway instances.
+
+    Each capture is linked to the previous snapshot of the same instance by
+    a ``follows`` relation. Configs are delta-encoded along that chain: a
+    snapshot either is a keyframe, whose config is stored once per unique
+    content as a blob keyed by the SHA-256 of its canonical JSON, or holds a
+    JSON patch (``configPatch``) against its predecessor (``configBase``).
+    A keyframe is written every ``keyframe_interval`` snapshots, and whenever
+    the exact config already exists as a blob. Use :meth:`get_config` to load
+    the payload.
+
+    On backends shared with the TypeScript SDK (``data.json``) each record
+    keeps the full config inline in ``fields['config']``, which is what
+    that SDK reads. That copy is authoritative, so these stores skip blobs
+    and deltas and take as much space as before they existed; only SQLite
+    and sharded stores are delta-encoded.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[StorageBackend] = None,
+        keyframe_interval: int = 20,
+        tip_cache_size: int = 64,
+    ) -> None:
+        self.storage = storage or default_backend()
+        self.keyframe_interval = keyframe_interval
+        self.tip_cache_size = tip_cache_size
+        # instance id → the last snapshot captured here; a starting point for
+        # finding the chain head, which another writer may have moved on
+        self._chain_tips: Dict[str, str] = {}
+        # snapshot id → private copy of its config, to diff without replaying
+        # the chain; least recently captured first
+        self._tip_configs: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+    def batch(self) -> ContextManager[None]:
+        """Commit every snapshot captured inside the block in a single write."""
+        return self.storage.transaction()
+
+    def capture_snapshot(
+        self, instance_id: str, gateway_data: Dict[str, Any], inline_config: bool = True
+    ) -> Minion:
+        """Persist a snapshot of ``gateway_data`` for ``instance_id``.
+
+        The returned minion carries the config inline (``fields['config']``)
+        for convenience; the stored record references it by ``configHash``.
+        With ``inline_config=False`` the minion omits ``fields['config']``
+        and no copy of the config is kept for the next capture. On SQLite
+        and sharded stores the config is then never encoded as a whole: it
+        is hashed and written to the blob store in chunks. Stores shared
+        with the TypeScript SDK (``typescript_compatible``) cannot stream,
+        because that SDK reads the whole config from the record; it is
+        encoded once and kept there.
+
+        Otherwise a private copy of the config is kept for the
+        ``tip_cache_size`` most recently captured instances, so the next
+        capture can diff against it without rebuilding it from storage.
+        """
+        with self.storage.reading():
+            config = gateway_data.get('config', {})
+            fields: Dict[str, Any] = {'instanceId': instance_id, 'capturedAt': now()}
+            config_json: Optional[bytes] = None
+            if inline_config or self.storage.typescript_compatible:
+                config_json = canonical_json(config)
+                config_hash = content_digest(config_json)
+            else:
+                config_hash = canonical_digest(config)
+            if inline_config:
+                fields['config'] = config_json.decode()
+            fields.update(
+                configHash=config_hash,
+                agentCount=len(gateway_data.get('agents', [])),
+                channelCount=len(gateway_data.get('channels', [])),
+                modelCount=len(gateway_data.get('models', [])),
+            )
+            minion, _ = create_minion(
+                {"title": f"Snapshot {now()}", "fields": fields},
+                openclaw_snapshot_type
+            )
+            previous = self._latest_snapshot(instance_id)
+            inline_store = self.storage.typescript_compatible
+            # The inline copy is authoritative there; a patch or blob next
+            # to it would only add to the file
+            encoding = {} if inline_store else self._encode_config(previous, config, config_hash)
+            minion.fields.update(encoding)
+            minion_dict = {
+                'id': minion.id,
+                'title': minion.title,
+                'minionTypeId': minion.minion_type_id,
+                'fields': self._stored_fields(minion.fields, config_json),
+                'createdAt': minion.created_at,
+                'updatedAt': minion.updated_at,
+                'tags': minion.tags,
+                'status': minion.status,
+                'priority': minion.priority,
+                'description': minion.description,
+            }
+            relation = {
+                'id': generate_id(),
+                'sourceId': instance_id,
+                'targetId': minion.id,
+                'type': 'parent_of',
+                'createdAt': now(),
+                'metadata': {},
+            }
+            relations = [relation]
+            if previous:
+                relations.append({
+                    'id': generate_id(),
+                    'sourceId': minion.id,
+                    'targetId': previous['id'],
+                    'type': 'follows',
+                    'createdAt': now(),
+                    'metadata': {},
+                })
+            with self.storage.transaction():
+                if not inline_store and 'configBase' not in encoding:
+                    if config_json is not None:
+                        self.storage.put_blob(config_hash, config_json)
+                    else:
+                        self.storage.put_blob_stream(canonical_chunks(config))
+                self.storage.put_many(minions=[minion_dict], relations=relations)
+            self._chain_tips[instance_id] = minion.id
+            if previous:
+                self._tip_configs.pop(previous['id'], None)
+            if inline_config and not inline_store and self.tip_cache_size > 0:
+                # A private copy: the caller may go on mutating gateway_data
+                self._tip_configs[minion.id] = codec.loads(config_json)
+                while len(self._tip_configs) > self.tip_cache_size:
+                    self._tip_configs.popitem(last=False)
+            return minion
+
+    def _stored_fields(self, fields: Dict[str, Any], config_json: Optional[bytes]) -> Dict[str, Any]:
+        stored = {k: v for k, v in fields.items() if k != 'config'}
+        if self.storage.typescript_compatible and config_json is not None:
+            # The TypeScript SDK reads the config inline from data.json;
+            # share the returned minion's string rather than decode again
+            stored['config'] = fields.get('config') or config_json.decode()
+        return stored
+
+    def _latest_snapshot(self, instance_id: str) -> Optional[Dict[str, Any]]:
+        """Head of the instance's ``follows`` chain: the snapshot nothing follows.
+
+        Starts from the last snapshot captured here, or else the most recent
+        ``parent_of`` child, and walks forward along incoming ``follows``
+        relations, so the cost does not grow with the length of the history.
+        """
+        current = None
+        cached = self._chain_tips.get(instance_id)
+        if cached:
+            current = self._live_snapshot(cached)
+        if current is None:
+            for r in reversed(self.storage.list_relations(source_id=instance_id, type='parent_of')):
+                current = self._live_snapshot(r['targetId'])
+                if current is not None:
+                    break
+        while current is not None:
+            newer = next((
+                m for m in (
+                    self._live_snapshot(r['sourceId'])
+                    for r in self.storage.list_relations(target_id=current['id'], type='follows')
+                ) if m is not None
+            ), None)
+            if newer is None:
+                break
+            current = newer
+        return current
+
+    def _live_snapshot(self, id: str) -> Optional[Dict[str, Any]]:
+        m = self.storage.get_minion(id)
+        if m and m.get('minionTypeId') == openclaw_snapshot_type.id and not m.get('deletedAt'):
+            return m
+        return None
+
+    def _encode_config(
+        self, previous: Optional[Dict[str, Any]], config: Dict[str, Any], config_hash: str
+    ) -> Dict[str, Any]:
+        """Choose keyframe or delta storage for a new snapshot's config."""
+        if previous is None or self.storage.has_blob(config_hash):
+            return {}
+        prev_fields = previous.get('fields', {})
+        depth = prev_fields.get('configDepth', 0) + 1
+        if depth >= self.keyframe_interval:
+            return {}
+        prev_config = self._tip_configs.get(previous['id'])
+        if prev_config is None:
+            prev_config = self.get_config(previous)
+        return {
+            'configBase': previous['id'],
+            'configPatch': make_patch(prev_config, config),
+            'configDepth': depth,
         }
-        storage['minions'].append(minion_dict)
-        storage['relations'].append({
-            'id': generate_id(),
-            'sourceId': instance_id,
-            'targetId': minion.id,
-            'type': 'parent_of',
-            'createdAt': now(),
-            'metadata': {},
-        })
-        _write_storage(storage)
-        return minion
 
-    def list_snapshots(self, instance_id: str) -> List[Dict[str, Any]]:
-        storage = _read_storage()
-        snapshot_ids = {
-            r['targetId'] for r in storage['relations']
-            if r.get('sourceId') == instance_id and r.get('type') == 'parent_of'
+    def get_config(self, snapshot: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Load the config payload of a snapshot, given its id or stored record.
+
+        Delta-encoded snapshots are reconstructed by applying the patches
+        from the nearest keyframe forward. Snapshots that keep the JSON
+        inline in ``fields['config']``, on TypeScript-compatible stores or
+        from before configs moved to the blob store, are read from there.
+        """
+        with self.storage.reading():
+            record = self.storage.get_minion(snapshot) if isinstance(snapshot, str) else snapshot
+            if not record:
+                raise ValueError(f"Snapshot not found: {snapshot}")
+            patches: List[List[Dict[str, Any]]] = []
+            while 'configBase' in record.get('fields', {}) and 'config' not in record['fields']:
+                fields = record['fields']
+                patches.append(fields.get('configPatch', []))
+                base = self.storage.get_minion(fields['configBase'])
+                if not base:
+                    raise ValueError(f"Delta base {fields['configBase']} missing for snapshot {record['id']}")
+                record = base
+            fields = record.get('fields', {})
+            config_hash = fields.get('configHash')
+            if 'config' in fields or not config_hash:
+                config = codec.loads(fields.get('config') or '{}')
+            else:
+                payload = self.storage.get_blob(config_hash)
+                if payload is None:
+                    raise ValueError(f"Config blob {config_hash} missing for snapshot {record['id']}")
+                config = codec.loads(payload)
+            for patch in reversed(patches):
+                config = apply_patch(config, patch)
+            return config
+
+    def delete_snapshot(self, snapshot_id: str) -> None:
+        """Remove a snapshot, its relations and its reference to the config blob.
+
+        The ``follows`` chain is relinked around the removed snapshot, and a
+        successor that was delta-encoded against it is rewritten as a keyframe.
+        """
+        with self.storage.reading():
+            record = self.storage.get_minion(snapshot_id)
+            if not record or record.get('minionTypeId') != openclaw_snapshot_type.id:
+                raise ValueError(f"Snapshot not found: {snapshot_id}")
+            with self.storage.transaction():
+                newer = self.storage.list_relations(target_id=snapshot_id, type='follows')
+                older = self.storage.list_relations(source_id=snapshot_id, type='follows')
+                for r in newer:
+                    successor = self.storage.get_minion(r['sourceId'])
+                    if successor and successor.get('fields', {}).get('configBase') == snapshot_id:
+                        self._make_keyframe(successor)
+                    for o in older:
+                        self.storage.put_relation({**r, 'id': generate_id(), 'targetId': o['targetId']})
+                for r in self.storage.list_relations(target_id=snapshot_id) + self.storage.list_relations(source_id=snapshot_id):
+                    self.storage.delete_relation(r['id'])
+                self.storage.delete_minion(snapshot_id)
+                if holds_config_blob(record.get('fields', {})):
+                    self.storage.release_blob(record['fields']['configHash'])
+
+    def prune(
+        self,
+        policy: RetentionPolicy,
+        instance_id: Optional[str] = None,
+        dry_run: bool = False,
+        at: Optional[datetime] = None,
+    ) -> PruneReport:
+        """Delete the snapshots ``policy`` no longer retains, in one batched write.
+
+        Applies to ``instance_id`` only, or to every instance with snapshots.
+        With ``dry_run`` nothing is written and the report lists what would go.
+        """
+        with self.storage.reading():
+            by_instance: Dict[str, List[Dict[str, Any]]] = {}
+            if instance_id is not None:
+                by_instance[instance_id] = self._snapshots_of(instance_id)
+            else:
+                for m in self.storage.list_minions(openclaw_snapshot_type.id):
+                    if not m.get('deletedAt'):
+                        by_instance.setdefault(m.get('fields', {}).get('instanceId', ''), []).append(m)
+
+            report = PruneReport(dry_run=dry_run)
+            doomed: List[Dict[str, Any]] = []
+            for snapshots in by_instance.values():
+                expired = policy.select_expired(snapshots, at)
+                report.kept += len(snapshots) - len(expired)
+                doomed.extend(expired)
+            if not doomed:
+                return report
+
+            removed_ids = {s['id'] for s in doomed}
+            for s in doomed:
+                report.reclaimed_bytes += len(canonical_json(s))
+                for r in self.storage.list_relations(source_id=s['id']) + self.storage.list_relations(target_id=s['id']):
+                    # Count a relation between two removed snapshots once
+                    if r['sourceId'] == s['id'] or r['sourceId'] not in removed_ids:
+                        report.reclaimed_bytes += len(canonical_json(r))
+            report.reclaimed_bytes += self._orphaned_blob_bytes(removed_ids)
+            report.removed = [s['id'] for s in doomed]
+            if dry_run:
+                return report
+
+            # Newest first, so each removed run rebases at most one surviving delta
+            doomed.sort(key=lambda s: s.get('fields', {}).get('capturedAt', ''), reverse=True)
+            with self.storage.transaction():
+                for s in doomed:
+                    self.delete_snapshot(s['id'])
+            return report
+
+    def _orphaned_blob_bytes(self, removed_ids: set) -> int:
+        """Size of config blobs referenced only by keyframes in ``removed_ids``."""
+        referenced: Dict[str, bool] = {}
+        for m in self.storage.list_minions(openclaw_snapshot_type.id):
+            fields = m.get('fields', {})
+            if not holds_config_blob(fields):
+                continue
+            config_hash = fields['configHash']
+            referenced[config_hash] = referenced.get(config_hash, False) or m['id'] not in removed_ids
+        total = 0
+        for config_hash, still_used in referenced.items():
+            if not still_used:
+                payload = self.storage.get_blob(config_hash)
+                total += len(payload) if payload is not None else 0
+        return total
+
+    def _make_keyframe(self, record: Dict[str, Any]) -> None:
+        config = self.get_config(record)
+        config_json = canonical_json(config)
+        config_hash = content_digest(config_json)
+        fields = {
+            k: v for k, v in record.get('fields', {}).items()
+            if k not in _DELTA_FIELDS
         }
-        return [
-            m for m in storage['minions']
-            if m.get('id') in snapshot_ids
-            and m.get('minionTypeId') == openclaw_snapshot_type.id
-            and not m.get('deletedAt')
-        ]
+        fields['configHash'] = config_hash
+        if self.storage.typescript_compatible:
+            fields['config'] = config_json.decode()
+        elif 'config' not in fields:
+            self.storage.put_blob(config_hash, config_json)
+        self.storage.put_minion({**record, 'fields': fields})
+
+    def _snapshots_of(self, instance_id: str) -> List[Dict[str, Any]]:
+        snapshots: List[Dict[str, Any]] = []
+        for r in self.storage.list_relations(source_id=instance_id, type='parent_of'):
+            m = self.storage.get_minion(r['targetId'])
+            if m and m.get('minionTypeId') == openclaw_snapshot_type.id and not m.get('deletedAt'):
+                snapshots.append(m)
+        return snapshots
+
+    def list_snapshots(self, instance_id: str) -> List[Dict[str, Any]]:
+        with self.storage.reading():
+            # Records may be shared with the storage cache; hand out copies
+            return copy.deepcopy(self._snapshots_of(instance_id))
 
     def get_history(self, instance_id: str) -> List[Dict[str, Any]]:
         """Return snapshots for instance ordered newest → oldest via follows chain."""
-        storage = _read_storage()
-        snapshot_ids = {
-            r['targetId'] for r in storage['relations']
-            if r.get('sourceId') == instance_id and r.get('type') == 'parent_of'
-        }
-        snapshots = [
-            m for m in storage['minions']
-            if m.get('id') in snapshot_ids
-            and m.get('minionTypeId') == openclaw_snapshot_type.id
-            and not m.get('deletedAt')
-        ]
+        with self.storage.reading():
+            return copy.deepcopy(self._history(instance_id))
+
+    def _history(self, instance_id: str) -> List[Dict[str, Any]]:
+        snapshots = self._snapshots_of(instance_id)
 
         # Build follows map: snapshot_id → previous_snapshot_id
         follows_map: Dict[str, str] = {}
-        for r in storage['relations']:
-            if r.get('type') == 'follows' and r.get('sourceId') in snapshot_ids:
+        for s in snapshots:
+            for r in self.storage.list_relations(source_id=s['id'], type='follows'):
                 follows_map[r['sourceId']] = r['targetId']
 
         targets = set(follows_map.values())
@@ -114,30 +409,35 @@ class SnapshotManager:
 
     def compare(self, snapshot_id1: str, snapshot_id2: str) -> Dict[str, Dict[str, Any]]:
         """Load two snapshots by ID and return their diff."""
-        storage = _read_storage()
-        by_id = {m['id']: m for m in storage['minions']}
-        raw_a = by_id.get(snapshot_id1)
-        raw_b = by_id.get(snapshot_id2)
-        if not raw_a:
-            raise ValueError(f"Snapshot not found: {snapshot_id1}")
-        if not raw_b:
-            raise ValueError(f"Snapshot not found: {snapshot_id2}")
-
-        def _to_minion(d: Dict[str, Any]) -> Minion:
-            return Minion(
-                id=d['id'],
-                title=d.get('title', ''),
-                minion_type_id=d.get('minionTypeId', ''),
-                fields=d.get('fields', {}),
-                created_at=d.get('createdAt', ''),
-                updated_at=d.get('updatedAt', ''),
-                tags=d.get('tags', []),
-                status=d.get('status', 'active'),
-                priority=d.get('priority', 'medium'),
-                description=d.get('description', ''),
-            )
+        with self.storage.reading():
+            raw_a = self.storage.get_minion(snapshot_id1)
+            raw_b = self.storage.get_minion(snapshot_id2)
+            if not raw_a:
+                raise ValueError(f"Snapshot not found: {snapshot_id1}")
+            if not raw_b:
+                raise ValueError(f"Snapshot not found: {snapshot_id2}")
+
+            def _to_minion(d: Dict[str, Any]) -> Minion:
+                # Compare resolved configs rather than their hashes or deltas
+                fields = {
+                    k: v for k, v in d.get('fields', {}).items()
+                    if k != 'configHash' and k not in _DELTA_FIELDS
+                }
+                fields['config'] = canonical_json(self.get_config(d)).decode()
+                return Minion(
+                    id=d['id'],
+                    title=d.get('title', ''),
+                    minion_type_id=d.get('minionTypeId', ''),
+                    fields=fields,
+                    created_at=d.get('createdAt', ''),
+                    updated_at=d.get('updatedAt', ''),
+                    tags=d.get('tags', []),
+                    status=d.get('status', 'active'),
+                    priority=d.get('priority', 'medium'),
+                    description=d.get('description', ''),
+                )
 
-        return self.diff_snapshots(_to_minion(raw_a), _to_minion(raw_b))
+            return self.diff_snapshots(_to_minion(raw_a), _to_minion(raw_b))
 
     def diff_snapshots(self, a: Minion, b: Minion) -> Dict[str, Dict[str, Any]]:
         """Compare two snapshots and return a dict of changed fields.
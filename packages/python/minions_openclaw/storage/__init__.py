@@ -0,0 +1,94 @@
+"""Pluggable persistence for the OpenClaw managers."""
+from __future__ import annotations
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .backend import StorageBackend, empty_document
+from .blobs import canonical_chunks, canonical_digest, canonical_json, content_digest
+from .document import DocumentBackend
+from .json_file import JsonFileBackend
+from .journal import JournalBackend
+from .sqlite import SqliteBackend
+from .sharded import ShardedBackend
+from .migrate import migrate_json_to_sqlite
+
+DATA_DIR = Path.home() / '.openclaw-manager'
+DATA_FILE = DATA_DIR / 'data.json'
+SQLITE_FILE = DATA_DIR / 'data.db'
+SHARDED_DIR = DATA_DIR / 'shards'
+
+STORAGE_ENV = 'OPENCLAW_MANAGER_STORAGE'
+COMPACT_JSON_ENV = 'OPENCLAW_MANAGER_COMPACT_JSON'
+
+_BACKENDS = {
+    'json': (JsonFileBackend, DATA_FILE),
+    'journal': (JournalBackend, DATA_FILE),
+    'sqlite': (SqliteBackend, SQLITE_FILE),
+    'sharded': (ShardedBackend, SHARDED_DIR),
+}
+_shared: Dict[Tuple[str, Path], StorageBackend] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_backend(kind: str, path: os.PathLike | str) -> StorageBackend:
+    """Return the process-wide backend instance for ``kind`` at ``path``.
+
+    Managers constructed without an explicit backend share these instances,
+    so the parsed store and its cache are reused across all of them. With
+    ``$OPENCLAW_MANAGER_COMPACT_JSON`` set to ``1``, the JSON and journal
+    backends write their snapshot without indentation.
+    """
+    if kind not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    key = (kind, Path(path))
+    options = {}
+    if kind in ('json', 'journal') and os.environ.get(COMPACT_JSON_ENV, '').lower() in ('1', 'true', 'yes'):
+        options['compact_json'] = True
+    with _shared_lock:
+        backend = _shared.get(key)
+        if backend is None:
+            backend = _shared[key] = _BACKENDS[kind][0](path, **options)
+        return backend
+
+
+def default_backend() -> StorageBackend:
+    """Return the shared backend for ``~/.openclaw-manager``.
+
+    ``$OPENCLAW_MANAGER_STORAGE`` (``json``, ``journal``, ``sqlite`` or
+    ``sharded``) selects
+    the backend explicitly. Otherwise SQLite is used once ``data.db`` exists
+    (e.g. after :func:`migrate_json_to_sqlite`), falling back to the legacy
+    ``data.json`` file.
+    """
+    kind = os.environ.get(STORAGE_ENV, '').lower()
+    if not kind:
+        kind = 'sqlite' if SQLITE_FILE.exists() else 'json'
+    if kind not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend in ${STORAGE_ENV}: {kind}")
+    return shared_backend(kind, _BACKENDS[kind][1])
+
+
+__all__ = [
+    'StorageBackend',
+    'DocumentBackend',
+    'JsonFileBackend',
+    'JournalBackend',
+    'SqliteBackend',
+    'ShardedBackend',
+    'migrate_json_to_sqlite',
+    'default_backend',
+    'shared_backend',
+    'empty_document',
+    'canonical_json',
+    'canonical_chunks',
+    'canonical_digest',
+    'content_digest',
+    'DATA_DIR',
+    'DATA_FILE',
+    'SQLITE_FILE',
+    'SHARDED_DIR',
+    'STORAGE_ENV',
+    'COMPACT_JSON_ENV',
+]
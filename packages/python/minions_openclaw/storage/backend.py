@@ -0,0 +1,149 @@
+"""Storage backend contract shared by the managers."""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from minions import generate_id
+from .blobs import content_digest
+
+
+def empty_document() -> Dict[str, Any]:
+    return {'minions': [], 'relations': []}
+
+
+class StorageBackend(ABC):
+    """Persistence contract for minion and relation records.
+
+    Records are plain camelCase dicts in the same shape as ``data.json`` so
+    that backends stay interchangeable with the TypeScript SDK's file format.
+    Soft-deleted minions are returned like any other record; filtering on
+    ``deletedAt`` is left to the managers.
+
+    ``typescript_compatible`` is True for stores in the ``data.json`` layout
+    that the TypeScript SDK reads too; managers then also write the fields
+    it expects, such as a snapshot's inline ``config``.
+    """
+
+    typescript_compatible = False
+
+    @abstractmethod
+    def get_minion(self, id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def list_minions(self, minion_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put_minion(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a minion record, keyed by ``id``."""
+
+    @abstractmethod
+    def delete_minion(self, id: str) -> None:
+        """Physically remove a minion record. Missing ids are ignored."""
+
+    @abstractmethod
+    def list_relations(
+        self,
+        source_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put_relation(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a relation record, keyed by ``id``."""
+
+    @abstractmethod
+    def delete_relation(self, id: str) -> None:
+        """Physically remove a relation record. Missing ids are ignored."""
+
+    @abstractmethod
+    def export(self) -> Dict[str, Any]:
+        """Return the full ``{'minions': [...], 'relations': [...]}`` document."""
+
+    def put_many(
+        self,
+        minions: Iterable[Dict[str, Any]] = (),
+        relations: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        """Persist several records at once. Backends override this to write once."""
+        for record in minions:
+            self.put_minion(record)
+        for record in relations:
+            self.put_relation(record)
+
+    @abstractmethod
+    def put_blob(self, digest: str, data: bytes) -> None:
+        """Store ``data`` under its content digest and take a reference to it.
+
+        Storing an existing digest only increments its reference count.
+        """
+
+    def put_blob_stream(self, chunks: Iterable[bytes]) -> str:
+        """Store a payload given as byte chunks like :meth:`put_blob`; returns its digest.
+
+        The digest is computed while the chunks are consumed. Backends
+        override this to write the chunks out without joining them first.
+        """
+        data = b''.join(chunks)
+        digest = content_digest(data)
+        self.put_blob(digest, data)
+        return digest
+
+    @abstractmethod
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def has_blob(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def release_blob(self, digest: str) -> None:
+        """Drop one reference; the payload is deleted when none remain."""
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group mutations into one atomic write, rolled back on exception.
+
+        Transactions nest: an inner block that raises undoes only its own
+        changes, and everything is committed when the outermost block exits.
+        Backends without transactional support run the block as-is.
+        """
+        yield
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """Serve every read inside the block from one view of the store.
+
+        Caching backends revalidate against disk once on entry instead of
+        on every lookup, so a manager operation that touches many records
+        pays for one check. Writes made inside the block are still seen.
+        Backends that read from disk directly run the block as-is.
+        """
+        yield
+
+    def close(self) -> None:
+        pass
+
+
+def _ensure_relation_id(record: Dict[str, Any]) -> Dict[str, Any]:
+    if not record.get('id'):
+        record = {**record, 'id': generate_id()}
+    return record
+
+
+def _relation_matches(
+    r: Dict[str, Any],
+    source_id: Optional[str],
+    target_id: Optional[str],
+    type: Optional[str],
+) -> bool:
+    return (
+        (source_id is None or r.get('sourceId') == source_id)
+        and (target_id is None or r.get('targetId') == target_id)
+        and (type is None or r.get('type') == type)
+    )
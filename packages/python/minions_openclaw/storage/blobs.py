@@ -0,0 +1,146 @@
+"""Content addressing helpers for blob payloads."""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional
+
+# Target size of the pieces produced by canonical_chunks
+CHUNK_BYTES = 64 * 1024
+# Long lists, and dicts with many keys below the top levels, are encoded in
+# groups of elements; other containers near the top are split per element,
+# since a few keys there may hold large sections
+_SPLIT_DEPTH = 2
+_GROUP_ITEMS = 32
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def canonical_json(value: Any) -> bytes:
+    """Serialize ``value`` so that equal content always yields equal bytes."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _pieces(value: Any, depth: int = 0) -> Iterator[str]:
+    # Split containers and encode the parts with the C encoder; json's own
+    # iterencode() would fall back to the pure-Python one
+    encode = _ENCODER.encode
+    if isinstance(value, dict) and value and all(isinstance(k, str) for k in value):
+        keys = sorted(value)
+        if depth < _SPLIT_DEPTH:
+            yield '{'
+            for index, key in enumerate(keys):
+                yield (',' if index else '') + encode(key) + ':'
+                yield from _pieces(value[key], depth + 1)
+            yield '}'
+        elif len(keys) > _GROUP_ITEMS:
+            # Encoded sub-dicts of sorted key groups, braces stripped
+            yield '{'
+            for start in range(0, len(keys), _GROUP_ITEMS):
+                group = encode({k: value[k] for k in keys[start:start + _GROUP_ITEMS]})
+                yield (',' if start else '') + group[1:-1]
+            yield '}'
+        else:
+            yield encode(value)
+    elif isinstance(value, (list, tuple)) and value:
+        if len(value) > _GROUP_ITEMS:
+            yield '['
+            for start in range(0, len(value), _GROUP_ITEMS):
+                group = encode(list(value[start:start + _GROUP_ITEMS]))
+                yield (',' if start else '') + group[1:-1]
+            yield ']'
+        elif depth < _SPLIT_DEPTH:
+            yield '['
+            for index, item in enumerate(value):
+                if index:
+                    yield ','
+                yield from _pieces(item, depth + 1)
+            yield ']'
+        else:
+            yield encode(value)
+    else:
+        yield encode(value)
+
+
+def canonical_chunks(value: Any) -> Iterator[bytes]:
+    """Yield :func:`canonical_json` of ``value`` in pieces of about 64 KiB.
+
+    The joined pieces equal ``canonical_json(value)`` byte for byte, but the
+    whole encoding never has to exist in memory at once.
+    """
+    buffer: List[str] = []
+    size = 0
+    for piece in _pieces(value):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def canonical_digest(value: Any) -> str:
+    """``content_digest(canonical_json(value))`` without building the bytes."""
+    digest = hashlib.sha256()
+    for chunk in canonical_chunks(value):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobDirectory:
+    """Immutable blob files under ``<root>/<digest[:2]>/<digest>``.
+
+    Reference counts live in the owning backend; this class only moves bytes.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def write(self, digest: str, data: bytes) -> None:
+        path = self.path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def write_stream(self, chunks: Iterable[bytes]) -> str:
+        """Write a payload given in chunks, hashing as it goes; returns its digest."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            path = self.path(digest.hexdigest())
+            if path.exists():
+                os.unlink(tmp)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return digest.hexdigest()
+
+    def read(self, digest: str) -> Optional[bytes]:
+        try:
+            return self.path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, digest: str) -> None:
+        self.path(digest).unlink(missing_ok=True)
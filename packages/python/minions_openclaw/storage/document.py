@@ -0,0 +1,370 @@
+"""Base class for backends that keep the whole store as one parsed document."""
+from __future__ import annotations
+import os
+import threading
+from abc import abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .backend import StorageBackend, _ensure_relation_id, _relation_matches
+from .blobs import BlobDirectory
+
+Signature = Optional[Tuple[int, int, int]]
+
+
+def stat_signature(path: Path) -> Signature:
+    """Cheap change detector for a file: (mtime_ns, size, inode), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# Ordered id sets: dict keys keep insertion order, values are unused
+_IdSet = Dict[str, None]
+
+
+def _index_add(index: Dict[Any, _IdSet], key: Any, id: str) -> None:
+    index.setdefault(key, {})[id] = None
+
+
+def _index_remove(index: Dict[Any, _IdSet], key: Any, id: str) -> None:
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(id, None)
+        if not bucket:
+            del index[key]
+
+
+class Document:
+    """Parsed store contents with secondary indexes.
+
+    Records are keyed by id, minions are indexed by ``minionTypeId`` and
+    relations by source, target and type (alone and per endpoint), so lookups
+    cost O(matches) instead of a scan. Indexes are built once when the
+    document is parsed and updated incrementally by :meth:`apply`; every
+    index preserves insertion order.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None) -> None:
+        data = dict(data or {})
+        self.minions: Dict[str, Dict[str, Any]] = {}
+        self.relations: Dict[str, Dict[str, Any]] = {}
+        self._by_type: Dict[str, _IdSet] = {}
+        self._by_source: Dict[str, _IdSet] = {}
+        self._by_target: Dict[str, _IdSet] = {}
+        self._by_relation_type: Dict[str, _IdSet] = {}
+        self._by_source_type: Dict[Tuple[str, str], _IdSet] = {}
+        self._by_target_type: Dict[Tuple[str, str], _IdSet] = {}
+        for m in data.pop('minions', []):
+            self._put_minion(m)
+        for r in data.pop('relations', []):
+            self._put_relation(r)
+        self.blob_refs: Dict[str, int] = dict(data.pop('blobRefs', {}))
+        # Unknown top-level keys are carried through untouched
+        self.extra: Dict[str, Any] = data
+
+    def apply(self, entry: Dict[str, Any]) -> None:
+        op = entry.get('op')
+        if op == 'put_minion':
+            self._put_minion(entry['record'])
+        elif op == 'delete_minion':
+            self._delete_minion(entry['id'])
+        elif op == 'put_relation':
+            self._put_relation(entry['record'])
+        elif op == 'delete_relation':
+            self._delete_relation(entry['id'])
+        elif op == 'blob_ref':
+            if 'count' in entry:
+                count = entry['count']
+            else:
+                # Relative entries written by older versions
+                count = self.blob_refs.get(entry['digest'], 0) + entry['delta']
+            if count > 0:
+                self.blob_refs[entry['digest']] = count
+            else:
+                self.blob_refs.pop(entry['digest'], None)
+
+    def _put_minion(self, record: Dict[str, Any]) -> None:
+        id = record['id']
+        old = self.minions.get(id)
+        if old is not None and old.get('minionTypeId') != record.get('minionTypeId'):
+            _index_remove(self._by_type, old.get('minionTypeId'), id)
+        self.minions[id] = record
+        _index_add(self._by_type, record.get('minionTypeId'), id)
+
+    def _delete_minion(self, id: str) -> None:
+        old = self.minions.pop(id, None)
+        if old is not None:
+            _index_remove(self._by_type, old.get('minionTypeId'), id)
+
+    def _relation_keys(self, r: Dict[str, Any]) -> List[Tuple[Dict[Any, _IdSet], Any]]:
+        source, target, type = r.get('sourceId'), r.get('targetId'), r.get('type')
+        return [
+            (self._by_source, source),
+            (self._by_target, target),
+            (self._by_relation_type, type),
+            (self._by_source_type, (source, type)),
+            (self._by_target_type, (target, type)),
+        ]
+
+    def _put_relation(self, record: Dict[str, Any]) -> None:
+        id = record['id']
+        old = self.relations.get(id)
+        if old is not None:
+            for index, key in self._relation_keys(old):
+                _index_remove(index, key, id)
+        self.relations[id] = record
+        for index, key in self._relation_keys(record):
+            _index_add(index, key, id)
+
+    def _delete_relation(self, id: str) -> None:
+        old = self.relations.pop(id, None)
+        if old is not None:
+            for index, key in self._relation_keys(old):
+                _index_remove(index, key, id)
+
+    def minions_of_type(self, minion_type_id: str) -> List[Dict[str, Any]]:
+        return [self.minions[id] for id in self._by_type.get(minion_type_id, ())]
+
+    def find_relations(
+        self,
+        source_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return matching relations using the most selective index available."""
+        if source_id is not None and type is not None:
+            ids: Iterable[str] = self._by_source_type.get((source_id, type), ())
+        elif target_id is not None and type is not None:
+            ids = self._by_target_type.get((target_id, type), ())
+        elif source_id is not None:
+            ids = self._by_source.get(source_id, ())
+        elif target_id is not None:
+            ids = self._by_target.get(target_id, ())
+        elif type is not None:
+            ids = self._by_relation_type.get(type, ())
+        else:
+            ids = self.relations.keys()
+        return [
+            r for r in (self.relations[id] for id in ids)
+            if _relation_matches(r, source_id, target_id, type)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            **self.extra,
+            'minions': list(self.minions.values()),
+            'relations': list(self.relations.values()),
+        }
+        if self.blob_refs:
+            data['blobRefs'] = dict(self.blob_refs)
+        return data
+
+
+class DocumentBackend(StorageBackend):
+    """Caches the parsed document and revalidates it with ``stat()``.
+
+    Reads are served from memory as long as the files backing the store are
+    unchanged; when another process writes them the document is parsed again
+    on the next access. Returned records are shared with the cache and must
+    be treated as read-only.
+
+    Inside :meth:`transaction` mutations are applied to the cached document
+    and buffered; the backing files are written once when the outermost
+    block exits. The transaction holds the backend lock, so other threads
+    wait rather than observe uncommitted changes. If writing fails, the
+    cached document is dropped and re-read from disk, so no one sees
+    changes that were never persisted.
+
+    Blob payloads live as immutable files under ``blob_dir`` while their
+    reference counts are part of the document (``blobRefs``). A payload file
+    is only deleted once the release that dropped it to zero is committed;
+    a rolled-back ``put_blob`` can leave an unreferenced file behind, which
+    the next store of the same content simply reuses.
+    """
+
+    def __init__(self, blob_dir: Path) -> None:
+        self.blobs = BlobDirectory(blob_dir)
+        self._lock = threading.RLock()
+        self._doc: Optional[Document] = None
+        self._signature: Any = None
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        # Depth of open reading() blocks
+        self._reads = 0
+        self.parse_count = 0
+
+    @abstractmethod
+    def _current_signature(self) -> Any:
+        """Return a value that changes whenever the backing files change."""
+
+    @abstractmethod
+    def _parse(self) -> Document:
+        ...
+
+    @abstractmethod
+    def _persist(self, entries: List[Dict[str, Any]], doc: Document) -> None:
+        """Make ``entries`` (already applied to ``doc``) durable."""
+
+    def _refresh(self, signature: Any) -> Document:
+        self.parse_count += 1
+        return self._parse()
+
+    def _document(self) -> Document:
+        with self._lock:
+            if self._doc is not None and (self._pending is not None or self._reads):
+                # Inside a transaction the buffered document is authoritative,
+                # and inside reading() it was revalidated on entry
+                return self._doc
+            signature = self._current_signature()
+            if self._doc is None or signature != self._signature:
+                self._doc = self._refresh(signature)
+                self._signature = signature
+            return self._doc
+
+    def invalidate(self) -> None:
+        """Drop the cached document so the next access re-parses from disk."""
+        with self._lock:
+            self._doc = None
+            self._signature = None
+
+    def _mutate(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            doc = self._document()
+            for entry in entries:
+                doc.apply(entry)
+            if self._pending is not None:
+                self._pending.extend(entries)
+                return
+            self._commit(entries, doc)
+
+    def _commit(self, entries: List[Dict[str, Any]], doc: Document) -> None:
+        try:
+            self._persist(entries, doc)
+        except BaseException:
+            # ``doc`` already holds the entries; forget it so the next read sees the disk
+            self.invalidate()
+            raise
+        self._signature = self._current_signature()
+        for entry in entries:
+            if entry.get('op') == 'blob_ref' and entry['digest'] not in doc.blob_refs:
+                self.blobs.remove(entry['digest'])
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        with self._lock:
+            self._document()
+            self._reads += 1
+            try:
+                yield
+            finally:
+                self._reads -= 1
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            outermost = self._pending is None
+            if outermost:
+                # Revalidate before buffering so the batch builds on current data
+                self._document()
+                self._pending = []
+            mark = len(self._pending)
+            try:
+                yield
+            except BaseException:
+                self._rollback_to(mark)
+                if outermost:
+                    self._pending = None
+                raise
+            if outermost:
+                pending, self._pending = self._pending, None
+                if pending:
+                    self._commit(pending, self._document())
+
+    def _rollback_to(self, mark: int) -> None:
+        assert self._pending is not None
+        kept = self._pending[:mark]
+        self._pending = kept
+        # Nothing buffered has reached disk: re-read it and replay what survives
+        self._doc = None
+        self._signature = None
+        doc = self._document()
+        for entry in kept:
+            doc.apply(entry)
+
+    def get_minion(self, id: str) -> Optional[Dict[str, Any]]:
+        return self._document().minions.get(id)
+
+    def list_minions(self, minion_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        doc = self._document()
+        if minion_type_id is None:
+            return list(doc.minions.values())
+        return doc.minions_of_type(minion_type_id)
+
+    def put_minion(self, record: Dict[str, Any]) -> None:
+        self._mutate([{'op': 'put_minion', 'record': record}])
+
+    def delete_minion(self, id: str) -> None:
+        if id in self._document().minions:
+            self._mutate([{'op': 'delete_minion', 'id': id}])
+
+    def list_relations(
+        self,
+        source_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._document().find_relations(source_id, target_id, type)
+
+    def put_relation(self, record: Dict[str, Any]) -> None:
+        self._mutate([{'op': 'put_relation', 'record': _ensure_relation_id(record)}])
+
+    def delete_relation(self, id: str) -> None:
+        if id in self._document().relations:
+            self._mutate([{'op': 'delete_relation', 'id': id}])
+
+    def put_many(
+        self,
+        minions: Iterable[Dict[str, Any]] = (),
+        relations: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        entries = [{'op': 'put_minion', 'record': m} for m in minions]
+        entries += [{'op': 'put_relation', 'record': _ensure_relation_id(r)} for r in relations]
+        self._mutate(entries)
+
+    def put_blob(self, digest: str, data: bytes) -> None:
+        self.blobs.write(digest, data)
+        self.reference_blob(digest)
+
+    def put_blob_stream(self, chunks: Iterable[bytes]) -> str:
+        digest = self.blobs.write_stream(chunks)
+        self.reference_blob(digest)
+        return digest
+
+    def reference_blob(self, digest: str) -> None:
+        """Take a reference to a payload already in the blob directory."""
+        with self._lock:
+            self._set_refcount(digest, self._document().blob_refs.get(digest, 0) + 1)
+
+    def _set_refcount(self, digest: str, count: int) -> None:
+        # Absolute counts keep replaying an entry twice harmless
+        self._mutate([{'op': 'blob_ref', 'digest': digest, 'count': count}])
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        return self.blobs.read(digest)
+
+    def has_blob(self, digest: str) -> bool:
+        return digest in self._document().blob_refs
+
+    def release_blob(self, digest: str) -> None:
+        with self._lock:
+            count = self._document().blob_refs.get(digest)
+            if count:
+                self._set_refcount(digest, count - 1)
+
+    def export(self) -> Dict[str, Any]:
+        return self._document().to_dict()
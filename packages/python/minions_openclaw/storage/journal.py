@@ -0,0 +1,220 @@
+"""Append-only NDJSON journal on top of a ``data.json`` snapshot."""
+from __future__ import annotations
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from .. import codec
+from .document import Document, DocumentBackend, Signature, stat_signature
+from .json_file import read_document
+
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+
+class JournalBackend(DocumentBackend):
+    """Keeps ``data.json`` as a snapshot and appends mutations to a journal.
+
+    Every write appends one NDJSON line per upsert or tombstone to
+    ``<path>.journal``, so write cost is proportional to the record rather
+    than to the whole store. Loading replays the journal over the snapshot;
+    when only the journal has grown since the last read, just the new tail
+    is replayed. Once the journal passes ``compact_threshold`` bytes it is
+    folded into a fresh snapshot, on a background thread unless
+    ``background_compaction`` is False.
+
+    Replaying is idempotent, so a crash between replacing the snapshot and
+    trimming the journal only causes already-applied entries to be replayed;
+    this is why blob reference counts are logged as absolute values.
+    Journal lines are always compact; ``compact_json`` also drops the
+    indentation from the snapshot.
+
+    Appends and compaction hold an exclusive ``flock`` on ``<path>.lock``,
+    and loading holds it shared, so several processes can write the same
+    store: no append lands between compaction reading the journal and
+    replacing it. Platforms without ``fcntl`` get no cross-process locking.
+    """
+
+    typescript_compatible = True
+
+    def __init__(
+        self,
+        path: os.PathLike | str,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+        background_compaction: bool = True,
+        compact_json: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.compact_json = compact_json
+        super().__init__(self.path.parent / 'blobs')
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.compact_threshold = compact_threshold
+        self.background_compaction = background_compaction
+        self._journal_offset = 0
+        self._compacting = False
+        # Depth of held file locks; only touched under self._lock
+        self._flock_depth = 0
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True) -> Iterator[None]:
+        """Hold the advisory lock shared by every process using this store.
+
+        Callers hold ``self._lock``, so nested acquisitions by the same
+        backend reuse the outer lock instead of deadlocking on a second fd.
+        """
+        if fcntl is None or self._flock_depth:
+            self._flock_depth += 1
+            try:
+                yield
+            finally:
+                self._flock_depth -= 1
+            return
+        if not exclusive and not self.lock_path.parent.exists():
+            # Nothing has been written yet; don't create the directory on a read
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._flock_depth += 1
+            try:
+                yield
+            finally:
+                self._flock_depth -= 1
+        finally:
+            os.close(fd)
+
+    def _current_signature(self) -> Tuple[Signature, Signature]:
+        return (stat_signature(self.path), stat_signature(self.journal_path))
+
+    def _refresh(self, signature: Tuple[Signature, Signature]) -> Document:
+        with self._file_lock(exclusive=False):
+            return self._load(signature)
+
+    def _load(self, signature: Tuple[Signature, Signature]) -> Document:
+        snapshot_sig, journal_sig = signature
+        previous = self._signature
+        if (
+            self._doc is not None
+            and previous is not None
+            and previous[0] == snapshot_sig
+            and previous[1] is not None
+            and journal_sig is not None
+            and previous[1][2] == journal_sig[2]
+            and journal_sig[1] >= self._journal_offset
+        ):
+            # Another writer appended to the same journal: replay only the tail
+            self._replay(self._doc, self._journal_offset)
+            return self._doc
+        return super()._refresh(signature)
+
+    def _parse(self) -> Document:
+        doc = Document(read_document(self.path))
+        self._journal_offset = 0
+        self._replay(doc, 0)
+        return doc
+
+    def _replay(self, doc: Document, offset: int) -> None:
+        try:
+            with self.journal_path.open('rb') as f:
+                f.seek(offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+        # Leave a torn trailing line for the next read to pick up once complete
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            try:
+                doc.apply(codec.loads(line))
+            except codec.DecodeError:
+                continue
+        self._journal_offset = offset + end
+
+    def _persist(self, entries: List[Dict[str, Any]], doc: Document) -> None:
+        payload = b''.join(codec.dumps(e) + b'\n' for e in entries)
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock():
+            # Another process wrote since the last load: the cached document
+            # misses its entries, so drop it once ours are on disk
+            stale = self._signature != self._current_signature()
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                start = os.lseek(fd, 0, os.SEEK_END)
+                try:
+                    view = memoryview(payload)
+                    while view:
+                        view = view[os.write(fd, view):]
+                except BaseException:
+                    # Drop a partial append so the next one starts on a fresh line
+                    os.ftruncate(fd, start)
+                    raise
+                self._journal_offset = start + len(payload)
+            finally:
+                os.close(fd)
+        if stale:
+            self._doc = None
+        if self._journal_offset > self.compact_threshold and not self._compacting:
+            self._compacting = True
+            if self.background_compaction:
+                threading.Thread(target=self._compact_guarded, daemon=True).start()
+            else:
+                self._compact_guarded()
+
+    def _compact_guarded(self) -> None:
+        try:
+            self.compact()
+        finally:
+            self._compacting = False
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot and trim the applied entries.
+
+        Writers in other processes wait on the file lock until the new
+        snapshot and journal are in place.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock():
+            if self._pending is not None:
+                raise RuntimeError("compact() cannot run inside a transaction")
+            # Under the lock nothing is appended, so this sees every entry
+            signature = self._current_signature()
+            if self._doc is None or signature != self._signature:
+                self._doc = self._load(signature)
+                self._signature = signature
+            offset = self._journal_offset
+            self._write_atomic(self.path, codec.dumps(self._doc.to_dict(), indent=not self.compact_json))
+            try:
+                with self.journal_path.open('rb') as f:
+                    f.seek(offset)
+                    # At most a torn line left by a writer that crashed
+                    tail = f.read()
+            except FileNotFoundError:
+                tail = b''
+            self._write_atomic(self.journal_path, tail)
+            self._journal_offset = 0
+            self._replay(self._doc, 0)
+            self._signature = self._current_signature()
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def journal_size(self) -> int:
+        signature = stat_signature(self.journal_path)
+        return signature[1] if signature else 0
@@ -0,0 +1,60 @@
+"""Whole-file JSON backend - the original ``data.json`` layout."""
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .. import codec
+from .document import Document, DocumentBackend, Signature, stat_signature
+
+
+class JsonFileBackend(DocumentBackend):
+    """Stores every minion and relation in a single JSON document.
+
+    Each mutation rewrites the file via write-to-temp-then-rename, so a crash
+    mid-write leaves the previous ``data.json`` intact. The file is indented
+    for readability unless ``compact_json`` is set, which makes it smaller
+    and faster to write and parse.
+    """
+
+    typescript_compatible = True
+
+    def __init__(self, path: os.PathLike | str, compact_json: bool = False) -> None:
+        self.path = Path(path)
+        self.compact_json = compact_json
+        super().__init__(self.path.parent / 'blobs')
+
+    def _current_signature(self) -> Signature:
+        return stat_signature(self.path)
+
+    def _parse(self) -> Document:
+        return Document(read_document(self.path))
+
+    def _persist(self, entries: List[Dict[str, Any]], doc: Document) -> None:
+        write_document(self.path, doc.to_dict(), self.compact_json)
+
+
+def read_document(path: Path) -> Dict[str, Any]:
+    """Load a store file; a missing or empty file is an empty store.
+
+    Raises:
+        codec.DecodeError: if the file exists but cannot be parsed. It is
+            never treated as empty, so the next write cannot overwrite it.
+    """
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return {}
+    if not raw.strip():
+        return {}
+    try:
+        return codec.loads(raw)
+    except codec.DecodeError as exc:
+        raise codec.DecodeError(f"{path} is not valid JSON, refusing to use it as an empty store: {exc}") from exc
+
+
+def write_document(path: Path, data: Dict[str, Any], compact_json: bool = False) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(codec.dumps(data, indent=not compact_json))
+    os.replace(tmp, path)
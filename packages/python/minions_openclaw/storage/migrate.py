@@ -0,0 +1,65 @@
+"""One-shot migration from ``data.json`` (and its journal) to SQLite."""
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Dict
+
+from .journal import JournalBackend
+from .sqlite import SqliteBackend
+
+
+def migrate_json_to_sqlite(
+    json_path: os.PathLike | str,
+    sqlite_path: os.PathLike | str,
+    keep_source: bool = False,
+) -> Dict[str, int]:
+    """Copy every record from a JSON store into a SQLite database.
+
+    Entries still pending in ``<name>.journal`` are compacted into the
+    snapshot first, so stores written by :class:`JournalBackend` migrate
+    whole. Records are upserted by id, so re-running after a partial failure
+    is safe. Blob payloads referenced from ``blobRefs`` are copied with
+    their counts. On success the JSON file and its journal are renamed to
+    ``<name>.migrated`` (unless ``keep_source`` is set) so the default
+    backend selection switches to SQLite.
+
+    Raises:
+        RuntimeError: if the journal gained entries while copying; the
+            source is left in place and the migration can be re-run.
+
+    Returns:
+        Dict with the number of ``minions`` and ``relations`` migrated.
+    """
+    source = Path(json_path)
+    store = JournalBackend(source, background_compaction=False)
+    if store.journal_size():
+        store.compact()
+    data = store.export()
+    minions = data.get('minions', [])
+    relations = data.get('relations', [])
+    blobs = store.blobs
+
+    backend = SqliteBackend(sqlite_path)
+    try:
+        with backend.transaction():
+            backend.put_many(minions=minions, relations=relations)
+            for digest, refcount in data.get('blobRefs', {}).items():
+                payload = blobs.read(digest)
+                if payload is None:
+                    continue
+                backend.conn.execute(
+                    'INSERT INTO blobs (digest, refcount, data) VALUES (?, ?, ?) '
+                    'ON CONFLICT (digest) DO UPDATE SET refcount = excluded.refcount',
+                    (digest, refcount, payload),
+                )
+    finally:
+        backend.close()
+
+    if store.journal_size():
+        raise RuntimeError(
+            f"{store.journal_path} was written to during the migration; re-run it once writers have stopped")
+    if not keep_source:
+        if source.exists():
+            os.replace(source, source.with_name(source.name + '.migrated'))
+        store.journal_path.unlink(missing_ok=True)
+    return {'minions': len(minions), 'relations': len(relations)}
@@ -0,0 +1,348 @@
+"""Per-instance sharded layout for large fleets."""
+from __future__ import annotations
+import os
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from ..types import openclaw_instance_type
+from .backend import StorageBackend, _ensure_relation_id
+from .blobs import content_digest
+from .journal import JournalBackend
+from .json_file import JsonFileBackend
+
+GLOBAL_SHARD = '_global'
+
+_SAFE_KEY = re.compile(r'[A-Za-z0-9_.-]{1,64}')
+
+
+def instance_shard_key(record: Dict[str, Any]) -> Optional[str]:
+    """Shard of a minion by its own content: instances and their snapshots."""
+    if record.get('minionTypeId') == openclaw_instance_type.id:
+        return record['id']
+    instance_id = record.get('fields', {}).get('instanceId')
+    return instance_id if isinstance(instance_id, str) and instance_id else None
+
+
+@dataclass
+class _Level:
+    stack: ExitStack = field(default_factory=ExitStack)
+    shards: Set[str] = field(default_factory=set)
+    deferred: List[Callable[[], None]] = field(default_factory=list)
+    # Index entries written in this block, by record id
+    routes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+class ShardedBackend(StorageBackend):
+    """Stores each instance's subtree in its own shard under ``root``.
+
+    An instance minion, its snapshots and its decomposed config children live
+    in ``shards/<instance id>/data.json`` together with the relations between
+    them, so per-instance reads and writes only load and rewrite that shard.
+    Records that belong to no instance, and relations whose endpoints are not
+    in the same shard, go to the ``_global`` shard.
+
+    A global index (``index.json``, kept as an append-only
+    :class:`JournalBackend`) has one small entry per minion and relation,
+    mapping its id to its shard, and also holds the content-addressed blob
+    store shared by all shards. A minion is placed by ``shard_key`` when
+    first written, else under the shard of a relation source pointing at it
+    in the same ``put_many``; records never move once placed.
+
+    Each shard has its own lock, so shard reads and rewrites for different
+    instances proceed concurrently. Every new record and blob reference
+    still appends to the single index journal, so those short appends are
+    serialized across instances. :meth:`transaction` enlists every shard
+    touched inside the block; each shard commits atomically, but a crash
+    between two shard commits may persist only some of them. New index
+    entries are written just before the shards commit, so a stored record
+    is always routable; index removals and blob reference changes are
+    applied after. Nothing reaches the index if the block raises. Blocks in
+    different threads that touch the same shards in a different order can
+    deadlock, as with any per-resource locking.
+    """
+
+    def __init__(
+        self,
+        root: os.PathLike | str,
+        shard_factory: Callable[[Path], StorageBackend] = JsonFileBackend,
+        shard_key: Callable[[Dict[str, Any]], Optional[str]] = instance_shard_key,
+    ) -> None:
+        self.root = Path(root)
+        self.index = JournalBackend(self.root / 'index.json')
+        self.shard_factory = shard_factory
+        self.shard_key = shard_key
+        self._shards: Dict[str, StorageBackend] = {}
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+
+    # ─── Shards and transactions ──────────────────────────────────────────
+
+    def shard_path(self, key: str) -> Path:
+        name = key if _SAFE_KEY.fullmatch(key) else content_digest(key.encode())[:32]
+        return self.root / 'shards' / name / 'data.json'
+
+    def shard(self, key: str) -> StorageBackend:
+        """Return the backend for shard ``key``, enlisted in any open transaction."""
+        with self._shards_lock:
+            backend = self._shards.get(key)
+            if backend is None:
+                backend = self._shards[key] = self.shard_factory(self.shard_path(key))
+        for level in self._levels():
+            if key not in level.shards:
+                level.shards.add(key)
+                level.stack.enter_context(backend.transaction())
+        reads = getattr(self._local, 'reads', None)
+        if reads is not None and key not in reads.shards:
+            reads.shards.add(key)
+            reads.stack.enter_context(backend.reading())
+        return backend
+
+    def shard_keys(self) -> List[str]:
+        """Every shard holding at least one record, in first-use order."""
+        return list(dict.fromkeys(e['shard'] for e in self._index_entries()))
+
+    def _levels(self) -> List[_Level]:
+        levels = getattr(self._local, 'levels', None)
+        if levels is None:
+            levels = self._local.levels = []
+        return levels
+
+    def _defer(self, action: Callable[[], None]) -> None:
+        levels = self._levels()
+        if levels:
+            levels[-1].deferred.append(action)
+        else:
+            action()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        levels = self._levels()
+        level = _Level()
+        levels.append(level)
+        try:
+            with level.stack:
+                yield
+                if len(levels) == 1 and level.routes:
+                    # Route before the shards commit, so a record is never stored without being findable
+                    self.index.put_many(minions=level.routes.values())
+        finally:
+            levels.pop()
+        if levels:
+            levels[-1].deferred.extend(level.deferred)
+            levels[-1].routes.update(level.routes)
+        else:
+            for action in level.deferred:
+                action()
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        if getattr(self._local, 'reads', None) is not None:
+            yield
+            return
+        # Shards are enlisted as they are first touched, like transaction()
+        reads = self._local.reads = _Level()
+        try:
+            with reads.stack:
+                reads.stack.enter_context(self.index.reading())
+                yield
+        finally:
+            self._local.reads = None
+
+    # ─── Routing ──────────────────────────────────────────────────────────
+
+    def _route(self, id: Optional[str]) -> Optional[str]:
+        entry = self._index_entry_of(id) if id else None
+        return entry['shard'] if entry else None
+
+    def _index_entry_of(self, id: str) -> Optional[Dict[str, Any]]:
+        for level in reversed(self._levels()):
+            entry = level.routes.get(id)
+            if entry is not None:
+                return entry
+        return self.index.get_minion(id)
+
+    def _index_entries(self, minion_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries, including those not yet written by open transactions."""
+        entries = {e['id']: e for e in self.index.list_minions(minion_type_id)}
+        for level in self._levels():
+            for id, entry in level.routes.items():
+                if minion_type_id is None or entry.get('minionTypeId') == minion_type_id:
+                    entries[id] = entry
+                else:
+                    entries.pop(id, None)
+        return list(entries.values())
+
+    def _relation_shard(self, record: Dict[str, Any], placed: Dict[str, str]) -> str:
+        source = placed.get(record.get('sourceId')) or self._route(record.get('sourceId'))
+        target = placed.get(record.get('targetId')) or self._route(record.get('targetId'))
+        # Only a relation whose endpoints share a shard can live in it; any
+        # other is found from either endpoint by also searching _global
+        return source if source and source == target else GLOBAL_SHARD
+
+    def _place_minions(
+        self, minions: List[Dict[str, Any]], relations: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        placed: Dict[str, str] = {}
+        unplaced: List[Dict[str, Any]] = []
+        for record in minions:
+            key = self._route(record['id']) or self.shard_key(record)
+            if key:
+                placed[record['id']] = key
+            else:
+                unplaced.append(record)
+        # Children inherit the shard of their parent, level by level
+        while unplaced:
+            remaining = []
+            for record in unplaced:
+                parent = next((
+                    placed.get(r.get('sourceId')) or self._route(r.get('sourceId'))
+                    for r in relations
+                    if r.get('targetId') == record['id']
+                    and (r.get('sourceId') in placed or self._route(r.get('sourceId')))
+                ), None)
+                if parent:
+                    placed[record['id']] = parent
+                else:
+                    remaining.append(record)
+            if len(remaining) == len(unplaced):
+                for record in remaining:
+                    placed[record['id']] = GLOBAL_SHARD
+                break
+            unplaced = remaining
+        return placed
+
+    def _index_entry(self, record: Dict[str, Any], shard: str, kind: str) -> Dict[str, Any]:
+        entry = {'id': record['id'], 'kind': kind, 'shard': shard}
+        if kind == 'minion':
+            entry['minionTypeId'] = record.get('minionTypeId')
+        return entry
+
+    # ─── Records ──────────────────────────────────────────────────────────
+
+    def get_minion(self, id: str) -> Optional[Dict[str, Any]]:
+        shard = self._route(id)
+        return self.shard(shard).get_minion(id) if shard else None
+
+    def list_minions(self, minion_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if minion_type_id is None:
+            entries = [e for e in self._index_entries() if e.get('kind') == 'minion']
+        else:
+            entries = self._index_entries(minion_type_id)
+        records = []
+        for entry in entries:
+            record = self.shard(entry['shard']).get_minion(entry['id'])
+            if record is not None:
+                records.append(record)
+        return records
+
+    def put_minion(self, record: Dict[str, Any]) -> None:
+        self.put_many(minions=[record])
+
+    def delete_minion(self, id: str) -> None:
+        shard = self._route(id)
+        if shard:
+            self.shard(shard).delete_minion(id)
+            self._defer(lambda: self._drop_route(id, shard))
+
+    def _drop_route(self, id: str, shard: str) -> None:
+        # The id may have been written again later in the same transaction
+        if self.shard(shard).get_minion(id) is None:
+            self.index.delete_minion(id)
+
+    def list_relations(
+        self,
+        source_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        endpoint = source_id if source_id is not None else target_id
+        if endpoint is not None:
+            keys = list(dict.fromkeys(k for k in (self._route(endpoint), GLOBAL_SHARD) if k))
+        else:
+            keys = self.shard_keys()
+        relations: List[Dict[str, Any]] = []
+        for key in keys:
+            relations.extend(self.shard(key).list_relations(source_id, target_id, type))
+        return relations
+
+    def put_relation(self, record: Dict[str, Any]) -> None:
+        self.put_many(relations=[record])
+
+    def delete_relation(self, id: str) -> None:
+        shard = self._route(id)
+        if shard:
+            self.shard(shard).delete_relation(id)
+            self._defer(lambda: self.index.delete_minion(id))
+
+    def put_many(
+        self,
+        minions: Iterable[Dict[str, Any]] = (),
+        relations: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        minions = list(minions)
+        relations = [_ensure_relation_id(r) for r in relations]
+        placed = self._place_minions(minions, relations)
+        by_shard: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        entries: List[Dict[str, Any]] = []
+        for record in minions:
+            shard = placed[record['id']]
+            by_shard.setdefault(shard, {'minions': [], 'relations': []})['minions'].append(record)
+            entry = self._index_entry(record, shard, 'minion')
+            if self._index_entry_of(record['id']) != entry:
+                entries.append(entry)
+        for record in relations:
+            shard = self._relation_shard(record, placed)
+            previous = self._route(record['id'])
+            if previous and previous != shard:
+                # Endpoints changed shards: move the relation
+                self.shard(previous).delete_relation(record['id'])
+            by_shard.setdefault(shard, {'minions': [], 'relations': []})['relations'].append(record)
+            if previous != shard:
+                entries.append(self._index_entry(record, shard, 'relation'))
+        levels = self._levels()
+        if levels:
+            levels[-1].routes.update((e['id'], e) for e in entries)
+        elif entries:
+            # Route first, so a record is never stored without being findable
+            self.index.put_many(minions=entries)
+        for shard, records in by_shard.items():
+            self.shard(shard).put_many(**records)
+
+    def export(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {'minions': self.list_minions(), 'relations': self.list_relations()}
+        blob_refs = self.index.export().get('blobRefs')
+        if blob_refs:
+            data['blobRefs'] = blob_refs
+        return data
+
+    # ─── Blobs ────────────────────────────────────────────────────────────
+
+    def put_blob(self, digest: str, data: bytes) -> None:
+        # The payload is readable at once; the reference is taken on commit
+        self.index.blobs.write(digest, data)
+        self._defer(lambda: self.index.put_blob(digest, data))
+
+    def put_blob_stream(self, chunks: Iterable[bytes]) -> str:
+        digest = self.index.blobs.write_stream(chunks)
+        self._defer(lambda: self.index.reference_blob(digest))
+        return digest
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        return self.index.get_blob(digest)
+
+    def has_blob(self, digest: str) -> bool:
+        return self.index.has_blob(digest)
+
+    def release_blob(self, digest: str) -> None:
+        self._defer(lambda: self.index.release_blob(digest))
+
+    def close(self) -> None:
+        with self._shards_lock:
+            shards = list(self._shards.values())
+        for backend in shards:
+            backend.close()
+        self.index.close()
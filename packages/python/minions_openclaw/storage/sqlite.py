@@ -0,0 +1,220 @@
+"""SQLite backend - indexed ``minions`` / ``relations`` tables in WAL mode."""
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .. import codec
+from .backend import StorageBackend, _ensure_relation_id
+from .blobs import CHUNK_BYTES
+
+# Streamed blobs larger than this are spooled to a temporary file
+_SPOOL_BYTES = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS minions (
+    id TEXT PRIMARY KEY,
+    minion_type_id TEXT NOT NULL,
+    deleted_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_minions_type ON minions (minion_type_id);
+CREATE TABLE IF NOT EXISTS relations (
+    id TEXT PRIMARY KEY,
+    source_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relations_source ON relations (source_id, type);
+CREATE INDEX IF NOT EXISTS idx_relations_target ON relations (target_id, type);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    refcount INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+_UPSERT_MINION = """
+INSERT INTO minions (id, minion_type_id, deleted_at, data) VALUES (?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    minion_type_id = excluded.minion_type_id,
+    deleted_at = excluded.deleted_at,
+    data = excluded.data
+"""
+
+_UPSERT_RELATION = """
+INSERT INTO relations (id, source_id, target_id, type, data) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    source_id = excluded.source_id,
+    target_id = excluded.target_id,
+    type = excluded.type,
+    data = excluded.data
+"""
+
+
+class SqliteBackend(StorageBackend):
+    """Stores records as JSON rows with indexed type and relation columns.
+
+    The connection is opened lazily on first use so constructing a manager
+    never touches disk. Rows are returned in insertion order (``rowid``),
+    matching the ordering of the JSON file backend.
+    """
+
+    def __init__(self, path: os.PathLike | str) -> None:
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_minion(self, id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute('SELECT data FROM minions WHERE id = ?', (id,)).fetchone()
+        return codec.loads(row[0]) if row else None
+
+    def list_minions(self, minion_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            if minion_type_id is None:
+                rows = self.conn.execute('SELECT data FROM minions ORDER BY rowid').fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT data FROM minions WHERE minion_type_id = ? ORDER BY rowid',
+                    (minion_type_id,),
+                ).fetchall()
+        return [codec.loads(r[0]) for r in rows]
+
+    def put_minion(self, record: Dict[str, Any]) -> None:
+        self.put_many(minions=[record])
+
+    def delete_minion(self, id: str) -> None:
+        with self._lock:
+            self.conn.execute('DELETE FROM minions WHERE id = ?', (id,))
+
+    def list_relations(
+        self,
+        source_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        clauses: List[str] = []
+        params: List[str] = []
+        for column, value in (('source_id', source_id), ('target_id', target_id), ('type', type)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self.conn.execute(f'SELECT data FROM relations{where} ORDER BY rowid', params).fetchall()
+        return [codec.loads(r[0]) for r in rows]
+
+    def put_relation(self, record: Dict[str, Any]) -> None:
+        self.put_many(relations=[record])
+
+    def delete_relation(self, id: str) -> None:
+        with self._lock:
+            self.conn.execute('DELETE FROM relations WHERE id = ?', (id,))
+
+    def put_many(
+        self,
+        minions: Iterable[Dict[str, Any]] = (),
+        relations: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        minion_rows = [
+            (m['id'], m.get('minionTypeId', ''), m.get('deletedAt'), codec.dumps_str(m))
+            for m in minions
+        ]
+        relation_rows = []
+        for r in relations:
+            r = _ensure_relation_id(r)
+            relation_rows.append((r['id'], r.get('sourceId', ''), r.get('targetId', ''), r.get('type', ''), codec.dumps_str(r)))
+        with self.transaction():
+            self.conn.executemany(_UPSERT_MINION, minion_rows)
+            self.conn.executemany(_UPSERT_RELATION, relation_rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            conn = self.conn
+            savepoint = f'sp{self._depth}'
+            conn.execute('BEGIN IMMEDIATE' if self._depth == 0 else f'SAVEPOINT {savepoint}')
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    conn.execute('ROLLBACK')
+                else:
+                    conn.execute(f'ROLLBACK TO {savepoint}')
+                    conn.execute(f'RELEASE {savepoint}')
+                raise
+            self._depth -= 1
+            conn.execute('COMMIT' if self._depth == 0 else f'RELEASE {savepoint}')
+
+    def put_blob(self, digest: str, data: bytes) -> None:
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO blobs (digest, refcount, data) VALUES (?, 1, ?) '
+                'ON CONFLICT (digest) DO UPDATE SET refcount = refcount + 1',
+                (digest, data),
+            )
+
+    def put_blob_stream(self, chunks: Iterable[bytes]) -> str:
+        # The row must be sized up front, so spool first, then fill it in place
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as spool:
+            hasher = hashlib.sha256()
+            size = 0
+            for chunk in chunks:
+                hasher.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+            digest = hasher.hexdigest()
+            with self.transaction():
+                cursor = self.conn.execute('UPDATE blobs SET refcount = refcount + 1 WHERE digest = ?', (digest,))
+                if cursor.rowcount == 0:
+                    cursor = self.conn.execute(
+                        'INSERT INTO blobs (digest, refcount, data) VALUES (?, 1, zeroblob(?))', (digest, size))
+                    spool.seek(0)
+                    with self.conn.blobopen('blobs', 'data', cursor.lastrowid) as blob:
+                        while chunk := spool.read(CHUNK_BYTES):
+                            blob.write(chunk)
+        return digest
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.conn.execute('SELECT data FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def has_blob(self, digest: str) -> bool:
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone() is not None
+
+    def release_blob(self, digest: str) -> None:
+        with self.transaction():
+            self.conn.execute('UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?', (digest,))
+            self.conn.execute('DELETE FROM blobs WHERE digest = ? AND refcount <= 0', (digest,))
+
+    def export(self) -> Dict[str, Any]:
+        return {'minions': self.list_minions(), 'relations': self.list_relations()}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
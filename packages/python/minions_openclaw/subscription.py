@@ -0,0 +1,108 @@
+"""Bounded per-subscriber queues for server-pushed gateway frames."""
+from __future__ import annotations
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+RAISE = 'raise'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, RAISE)
+
+
+class SubscriptionOverflow(RuntimeError):
+    """A ``raise``-policy subscription fell more than ``maxsize`` frames behind."""
+
+
+class Subscription:
+    """Async iterator over pushed frames matching ``event`` (all frames if None).
+
+    Frames are buffered up to ``maxsize``. When the consumer falls behind,
+    ``overflow`` decides what happens: ``drop_oldest`` discards the oldest
+    buffered frame, ``drop_newest`` discards the incoming one, and ``raise``
+    ends the subscription with :class:`SubscriptionOverflow`. ``dropped``
+    counts discarded frames. Iteration stops once the subscription is
+    closed and drained; if it ended because the connection was lost, the
+    error is raised instead.
+    """
+
+    def __init__(
+        self,
+        event: Optional[str],
+        maxsize: int = 100,
+        overflow: str = DROP_OLDEST,
+        on_close: Optional[Callable[['Subscription'], None]] = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.event = event
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._on_close = on_close
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def matches(self, name: Optional[str]) -> bool:
+        return self.event is None or self.event == name
+
+    def push(self, frame: Dict[str, Any]) -> None:
+        if self._closed:
+            return
+        if len(self._frames) >= self.maxsize:
+            if self.overflow == DROP_NEWEST:
+                self.dropped += 1
+                return
+            if self.overflow == RAISE:
+                self.close(SubscriptionOverflow(
+                    f"Subscription to {self.event or 'all events'} exceeded {self.maxsize} queued frames"
+                ))
+                return
+            self._frames.popleft()
+            self.dropped += 1
+        self._frames.append(frame)
+        self._wake()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Stop receiving frames; buffered frames can still be drained."""
+        if self._closed:
+            return
+        self._closed = True
+        self._error = error
+        if self._on_close is not None:
+            self._on_close(self)
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while not self._frames:
+            if self._closed:
+                if self._error is not None:
+                    raise self._error
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._frames.popleft()
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
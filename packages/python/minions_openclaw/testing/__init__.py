@@ -0,0 +1,12 @@
+"""Local stand-in gateway for exercising the SDK.
+
+The load driver lives in :mod:`minions_openclaw.testing.load` and is run
+with ``python -m minions_openclaw.testing.load``.
+"""
+from .mock_gateway import MockGateway, MockGatewayStats, MockSocket
+
+__all__ = [
+    'MockGateway',
+    'MockGatewayStats',
+    'MockSocket',
+]
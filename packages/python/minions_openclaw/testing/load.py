@@ -0,0 +1,178 @@
+"""Load driver for :class:`GatewayClient` and :class:`FleetCollector`.
+
+Usage::
+
+    python -m minions_openclaw.testing.load [--instances 20] [--calls 200]
+        [--concurrency 8] [--latency 0.005] [--jitter 0.002] [--drop-rate 0]
+        [--items 10] [--item-bytes 64] [--websocket]
+
+Starts ``--instances`` :class:`MockGateway` instances, opens one client to
+each and drives ``--calls`` calls per client, ``--concurrency`` in flight at
+a time. Then it registers the instances in a temporary store and runs one
+fleet collection over them. Connections are in-process unless
+``--websocket`` is given, in which case every gateway listens on a local port.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import tempfile
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..fleet import FleetCollector
+from ..gateway_client import GatewayClient
+from ..instance_manager import InstanceManager
+from ..metrics import LatencyHistogram
+from ..storage import JsonFileBackend
+from .mock_gateway import MockGateway
+
+
+@dataclass
+class LoadReport:
+    """Results of :func:`run_load`; latencies are in milliseconds."""
+    instances: int = 0
+    calls: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    connect: LatencyHistogram = field(default_factory=LatencyHistogram)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    fleet_ms: Optional[float] = None
+    fleet_ok: int = 0
+
+    @property
+    def calls_per_sec(self) -> float:
+        return self.calls / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'instances': self.instances,
+            'calls': self.calls,
+            'errors': self.errors,
+            'elapsed_s': self.elapsed_s,
+            'calls_per_sec': self.calls_per_sec,
+            'connect': self.connect.as_dict(),
+            'latency': self.latency.as_dict(),
+            'fleet_ms': self.fleet_ms,
+            'fleet_ok': self.fleet_ok,
+        }
+
+    def format(self) -> str:
+        lines = [
+            f"instances      {self.instances}",
+            f"connect        p50 {self.connect.quantile(0.5):.2f} ms   p99 {self.connect.quantile(0.99):.2f} ms",
+            f"calls          {self.calls} in {self.elapsed_s:.2f} s ({self.calls_per_sec:.0f}/s), {self.errors} failed",
+            f"call latency   p50 {self.latency.quantile(0.5):.2f} ms   p99 {self.latency.quantile(0.99):.2f} ms",
+        ]
+        if self.fleet_ms is not None:
+            lines.append(f"fleet collect  {self.fleet_ms:.1f} ms, {self.fleet_ok}/{self.instances} ok")
+        return '\n'.join(lines)
+
+
+async def run_load(
+    instances: int = 10,
+    calls: int = 100,
+    concurrency: int = 8,
+    method: str = 'agents.list',
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    drop_rate: float = 0.0,
+    items: int = 10,
+    item_bytes: int = 64,
+    websocket: bool = False,
+    fleet: bool = True,
+    call_timeout: float = 5.0,
+) -> LoadReport:
+    """Drive ``calls`` calls of ``method`` against each of ``instances`` mock gateways."""
+    report = LoadReport(instances=instances)
+    gateways = [
+        MockGateway(latency=latency, jitter=jitter, drop_rate=drop_rate, items=items,
+                    item_bytes=item_bytes, seed=i)
+        for i in range(instances)
+    ]
+    async with AsyncExitStack() as stack:
+        if websocket:
+            urls = [await stack.enter_async_context(gw.serve()) for gw in gateways]
+            by_url: Dict[str, MockGateway] = {}
+        else:
+            urls = [f'ws://instance-{i}.mock' for i in range(instances)]
+            by_url = dict(zip(urls, gateways))
+
+        def factory(url: str, token: Optional[str] = None, key: Optional[str] = None) -> GatewayClient:
+            gateway = by_url.get(url)
+            return GatewayClient(url, token, key, connect=gateway.connect if gateway else None,
+                                 call_timeout=call_timeout)
+
+        async def drive(url: str) -> None:
+            client = factory(url)
+            start = time.perf_counter()
+            try:
+                await client.open_connection()
+            except Exception:
+                report.errors += calls
+                return
+            report.connect.observe((time.perf_counter() - start) * 1000)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one() -> None:
+                async with semaphore:
+                    begin = time.perf_counter()
+                    try:
+                        await client.call(method, use_cache=False)
+                    except Exception:
+                        report.errors += 1
+                    else:
+                        report.latency.observe((time.perf_counter() - begin) * 1000)
+                    report.calls += 1
+
+            try:
+                await asyncio.gather(*(one() for _ in range(calls)))
+            finally:
+                await client.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(drive(url) for url in urls))
+        report.elapsed_s = time.perf_counter() - start
+
+        if fleet:
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = InstanceManager(JsonFileBackend(Path(tmp) / 'data.json'))
+                with manager.batch():
+                    for i, url in enumerate(urls):
+                        manager.register(f'load-{i}', url)
+                collector = FleetCollector(manager, concurrency=max(instances, 1),
+                                           timeout=call_timeout, client_factory=factory)
+                fleet_report = await collector.collect()
+                report.fleet_ms = fleet_report.elapsed_ms
+                report.fleet_ok = len(fleet_report.succeeded)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--instances', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=200, help='calls per instance')
+    parser.add_argument('--concurrency', type=int, default=8, help='calls in flight per client')
+    parser.add_argument('--method', default='agents.list')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='seconds')
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--items', type=int, default=10)
+    parser.add_argument('--item-bytes', type=int, default=64)
+    parser.add_argument('--call-timeout', type=float, default=5.0)
+    parser.add_argument('--websocket', action='store_true', help='use real local WebSocket servers')
+    parser.add_argument('--no-fleet', action='store_true', help='skip the fleet collection round')
+    args = parser.parse_args(argv)
+    report = asyncio.run(run_load(
+        instances=args.instances, calls=args.calls, concurrency=args.concurrency, method=args.method,
+        latency=args.latency, jitter=args.jitter, drop_rate=args.drop_rate, items=args.items,
+        item_bytes=args.item_bytes, websocket=args.websocket, fleet=not args.no_fleet,
+        call_timeout=args.call_timeout,
+    ))
+    print(report.format())
+
+
+if __name__ == '__main__':
+    main()
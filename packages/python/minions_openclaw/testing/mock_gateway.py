@@ -0,0 +1,250 @@
+"""Local stand-in for an OpenClaw gateway."""
+from __future__ import annotations
+import asyncio
+import random
+import secrets
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .. import codec
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class MockGatewayStats:
+    connections: int = 0
+    calls: int = 0
+    errors: int = 0
+    dropped: int = 0
+    pushed: int = 0
+
+
+class _Session:
+    """One authenticated connection; transport-agnostic."""
+
+    def __init__(self, gateway: 'MockGateway', send: Callable[[str], Awaitable[None]]) -> None:
+        self.gateway = gateway
+        self._send = send
+        self.authenticated = False
+        self.closed = False
+        self._tasks: set = set()
+
+    async def start(self) -> None:
+        await self.send({'type': 'connect.challenge', 'payload': {
+            'nonce': secrets.token_hex(8),
+            'timestamp': str(int(time.time() * 1000)),
+            'algorithms': list(self.gateway.algorithms),
+        }})
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        if not self.closed:
+            await self._send(codec.dumps_str(frame))
+
+    async def handle(self, raw: Any) -> None:
+        msg = codec.loads(raw)
+        kind = msg.get('type')
+        if kind == 'connect':
+            await self._hello(msg.get('payload') or {})
+        elif not self.authenticated:
+            await self.send({'type': 'error', 'id': msg.get('id'), 'error': 'not authenticated'})
+        elif kind == 'call':
+            self._spawn(self._answer(msg))
+        elif kind == 'batch':
+            for call in msg.get('calls', []):
+                self._spawn(self._answer(call))
+
+    async def _hello(self, payload: Dict[str, Any]) -> None:
+        token = payload.get('deviceToken')
+        if token and not payload.get('signature') and token not in self.gateway.device_tokens:
+            await self.send({'type': 'hello-error', 'payload': {'reason': 'unknown device token'}})
+            return
+        token = token if token in self.gateway.device_tokens else secrets.token_hex(16)
+        self.gateway.device_tokens.add(token)
+        self.authenticated = True
+        self.gateway.stats.connections += 1
+        await self.send({'type': 'hello-ok', 'payload': {
+            'deviceToken': token, 'features': list(self.gateway.features),
+        }})
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _answer(self, msg: Dict[str, Any]) -> None:
+        gateway = self.gateway
+        gateway.stats.calls += 1
+        await asyncio.sleep(gateway.delay())
+        if gateway.rng.random() < gateway.drop_rate:
+            gateway.stats.dropped += 1
+            return
+        handler = gateway.handlers.get(msg.get('method', ''))
+        try:
+            if handler is None:
+                raise ValueError(f"unknown method {msg.get('method')}")
+            payload = await handler(msg.get('params') or {})
+        except Exception as exc:
+            gateway.stats.errors += 1
+            await self.send({'type': 'error', 'id': msg.get('id'), 'error': str(exc)})
+        else:
+            await self.send({'type': 'result', 'id': msg.get('id'), 'payload': payload})
+
+    def close(self) -> None:
+        self.closed = True
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class MockSocket:
+    """In-memory client end of a :class:`MockGateway` connection."""
+
+    def __init__(self, gateway: 'MockGateway') -> None:
+        self._incoming: asyncio.Queue = asyncio.Queue()
+        self.session = _Session(gateway, self._deliver)
+        self.closed = False
+
+    async def _deliver(self, raw: str) -> None:
+        self._incoming.put_nowait(raw)
+
+    async def send(self, raw: Any) -> None:
+        if self.closed:
+            raise ConnectionError("Socket closed")
+        await self.session.handle(raw)
+
+    async def recv(self) -> Any:
+        item = await self._incoming.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def drop(self) -> None:
+        """End the connection from the gateway side."""
+        self.session.close()
+        self._incoming.put_nowait(ConnectionError("Connection closed by gateway"))
+
+    async def close(self) -> None:
+        self.closed = True
+        self.session.close()
+
+
+class MockGateway:
+    """Asyncio gateway speaking the OpenClaw challenge / call protocol.
+
+    It answers ``agents.list``, ``channels.list`` and ``models.list`` with
+    ``items`` generated entries of roughly ``item_bytes`` bytes each, and
+    ``system-presence`` with a small config. Every response waits
+    ``latency`` seconds plus up to ``jitter`` in either direction, and with
+    probability ``drop_rate`` is never sent. Add or replace methods through
+    ``handlers``. With a ``page_size`` the list methods are paginated: each
+    response holds at most that many items (or the request's ``limit``)
+    and a ``nextCursor`` for the rest. Device tokens issued in ``hello-ok``
+    are accepted for unsigned resumption; signatures are not verified.
+
+    Connect in-process with ``GatewayClient(url, connect=gateway.connect)``,
+    or over a real WebSocket with ``async with gateway.serve() as url``.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        items: int = 10,
+        item_bytes: int = 64,
+        features: Iterable[str] = (),
+        algorithms: Iterable[str] = ('rsa-sha256', 'ed25519'),
+        seed: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.items = items
+        self.item_bytes = item_bytes
+        self.page_size = page_size
+        self.features = tuple(features)
+        self.algorithms = tuple(algorithms)
+        self.rng = random.Random(seed)
+        self.stats = MockGatewayStats()
+        self.device_tokens: set = set()
+        self.sockets: List[MockSocket] = []
+        self._sessions: List[_Session] = []
+        self.handlers: Dict[str, Handler] = {
+            'agents.list': self._list('agent'),
+            'channels.list': self._list('channel'),
+            'models.list': self._list('model'),
+            'system-presence': self._presence,
+        }
+
+    def delay(self) -> float:
+        return max(self.latency + self.rng.uniform(-self.jitter, self.jitter), 0.0)
+
+    def _list(self, kind: str) -> Handler:
+        async def handler(params: Dict[str, Any]) -> Dict[str, Any]:
+            filler = 'x' * self.item_bytes
+            start = int(params.get('cursor') or 0)
+            end = self.items
+            limit = params.get('limit') or self.page_size
+            if limit:
+                end = min(start + int(limit), self.items)
+            page: Dict[str, Any] = {'items': [
+                {'id': f'{kind}-{i}', 'name': f'{kind} {i}', 'description': filler} for i in range(start, end)
+            ]}
+            if end < self.items:
+                page['nextCursor'] = str(end)
+            return page
+        return handler
+
+    async def _presence(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'version': 'mock', 'port': 18789, 'sessions': len(self._sessions)}
+
+    async def connect(self, url: str, additional_headers: Optional[Dict[str, str]] = None) -> MockSocket:
+        """In-process transport, usable as ``GatewayClient(connect=...)``."""
+        socket = MockSocket(self)
+        self.sockets.append(socket)
+        self._sessions.append(socket.session)
+        await socket.session.start()
+        return socket
+
+    async def push(self, event: str, payload: Any = None) -> int:
+        """Send an event frame to every authenticated connection; returns how many got it."""
+        live = [s for s in self._sessions if s.authenticated and not s.closed]
+        for session in live:
+            await session.send({'type': 'event', 'event': event, 'payload': payload})
+        self.stats.pushed += len(live)
+        return len(live)
+
+    def disconnect_all(self) -> None:
+        """Drop every in-process connection, as a gateway restart would."""
+        for socket in self.sockets:
+            if not socket.closed:
+                socket.drop()
+        self.sockets = []
+        self._sessions = [s for s in self._sessions if not s.closed]
+
+    @asynccontextmanager
+    async def serve(self, host: str = '127.0.0.1', port: int = 0) -> AsyncIterator[str]:
+        """Listen for real WebSocket connections; yields the ``ws://`` URL."""
+        import websockets
+
+        async def handle(connection: Any) -> None:
+            async def send(raw: str) -> None:
+                await connection.send(raw)
+            session = _Session(self, send)
+            self._sessions.append(session)
+            try:
+                await session.start()
+                async for raw in connection:
+                    await session.handle(raw)
+            except websockets.ConnectionClosed:
+                pass
+            finally:
+                session.close()
+                self._sessions.remove(session)
+
+        async with websockets.serve(handle, host, port) as server:
+            bound = next(iter(server.sockets)).getsockname()
+            yield f'ws://{bound[0]}:{bound[1]}'
@@ -21,6 +21,8 @@ openclaw_instance_type = MinionType(
         FieldDefinition('status', 'string', label='Status'),
         FieldDefinition('lastPingAt', 'date', label='Last Ping At'),
         FieldDefinition('lastPingLatencyMs', 'number', label='Last Ping Latency (ms)'),
+        FieldDefinition('consecutiveFailures', 'number', label='Consecutive Failures'),
+        FieldDefinition('circuitRetryAt', 'date', label='Circuit Retry At'),
         FieldDefinition('version', 'string', label='Version'),
     ],
 )
@@ -36,6 +38,10 @@ openclaw_snapshot_type = MinionType(
         FieldDefinition('instanceId', 'string', required=True, label='Instance ID'),
         FieldDefinition('capturedAt', 'date', label='Captured At'),
         FieldDefinition('config', 'textarea', label='Config JSON'),
+        FieldDefinition('configHash', 'string', label='Config Hash'),
+        FieldDefinition('configBase', 'string', label='Config Delta Base'),
+        FieldDefinition('configPatch', 'json', label='Config Delta (JSON Patch)'),
+        FieldDefinition('configDepth', 'number', label='Config Delta Depth'),
         FieldDefinition('agentCount', 'number', label='Agent Count'),
         FieldDefinition('channelCount', 'number', label='Channel Count'),
         FieldDefinition('modelCount', 'number', label='Model Count'),
@@ -1,16 +1,29 @@
 """Shared pytest fixtures for minions_openclaw tests."""
+import asyncio
+import json
+
 import pytest
-from pathlib import Path
 
-DATA_FILE = Path.home() / '.openclaw-manager' / 'data.json'
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Point the default backend at a temporary directory, never ``~/.openclaw-manager``."""
+    from minions_openclaw import storage
+    root = tmp_path / '.openclaw-manager'
+    monkeypatch.setattr(storage, 'SQLITE_FILE', root / 'data.db')
+    monkeypatch.setattr(storage, '_BACKENDS', {
+        kind: (backend, root / path.relative_to(storage.DATA_DIR))
+        for kind, (backend, path) in storage._BACKENDS.items()
+    })
+    monkeypatch.setattr(storage, '_shared', {})
+    monkeypatch.delenv(storage.STORAGE_ENV, raising=False)
+    return root
 
 
 @pytest.fixture
-def clean_storage():
-    """Remove storage file before and after the test."""
-    DATA_FILE.unlink(missing_ok=True)
+def clean_storage(data_dir):
+    """Kept for older tests: storage is already isolated per test."""
     yield
-    DATA_FILE.unlink(missing_ok=True)
 
 
 @pytest.fixture
@@ -23,3 +36,83 @@ def instance_manager():
 def snapshot_manager():
     from minions_openclaw.snapshot_manager import SnapshotManager
     return SnapshotManager()
+
+
+class FakeSocket:
+    """In-memory stand-in for a gateway WebSocket.
+
+    ``handlers`` maps a method name to ``async (params) -> payload``; a
+    handler raising ``ValueError`` is answered with an error frame. Each call
+    is answered from its own task, so slow handlers reply out of order.
+
+    Kept for protocol tests that script frames or inspect what was sent;
+    anything that just needs a working gateway should use
+    :class:`minions_openclaw.testing.MockGateway`.
+    """
+
+    def __init__(self, handlers, hello=True, challenge=None, welcome=None):
+        self.handlers = handlers
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.closed = False
+        self.awaiting_connect = hello
+        self.welcome = welcome or {}
+        if hello:
+            payload = {'nonce': 'n', 'timestamp': 't', **(challenge or {})}
+            self.incoming.put_nowait(json.dumps({'type': 'connect.challenge', 'payload': payload}))
+
+    async def send(self, raw):
+        msg = json.loads(raw)
+        self.sent.append(msg)
+        if msg.get('type') == 'connect':
+            self.incoming.put_nowait(json.dumps({'type': 'hello-ok', 'payload': self.welcome}))
+        elif msg.get('type') == 'call':
+            asyncio.get_running_loop().create_task(self._answer(msg))
+        elif msg.get('type') == 'batch':
+            for call in msg['calls']:
+                asyncio.get_running_loop().create_task(self._answer(call))
+
+    async def _answer(self, msg):
+        handler = self.handlers.get(msg['method'])
+        try:
+            if handler is None:
+                raise ValueError(f"unknown method {msg['method']}")
+            payload = await handler(msg.get('params', {}))
+        except ValueError as exc:
+            frame = {'type': 'error', 'id': msg['id'], 'error': str(exc)}
+        else:
+            frame = {'type': 'result', 'id': msg['id'], 'payload': payload}
+        self.incoming.put_nowait(json.dumps(frame))
+
+    def push(self, frame):
+        self.incoming.put_nowait(json.dumps(frame))
+
+    def drop(self):
+        """Simulate the server closing the connection."""
+        self.incoming.put_nowait(ConnectionError('closed by peer'))
+
+    async def recv(self):
+        item = await self.incoming.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_gateway():
+    """Return ``(connect, sockets)``; ``connect`` builds a FakeSocket per connection."""
+    sockets = []
+    handlers = {}
+
+    async def connect(url, additional_headers=None):
+        socket = FakeSocket(handlers, challenge=connect.challenge, welcome=connect.welcome)
+        sockets.append(socket)
+        return socket
+
+    connect.handlers = handlers
+    connect.challenge = {}
+    connect.welcome = {}
+    return connect, sockets
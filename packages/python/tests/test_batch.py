@@ -0,0 +1,121 @@
+"""Tests for batched (transactional) writes across managers."""
+import pytest
+from minions_openclaw.storage import JsonFileBackend, JournalBackend, SqliteBackend
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.snapshot_manager import SnapshotManager
+from minions_openclaw.config_decomposer import ConfigDecomposer
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'json':
+        b = JsonFileBackend(tmp_path / 'data.json')
+    elif request.param == 'journal':
+        b = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    else:
+        b = SqliteBackend(tmp_path / 'data.db')
+    yield b
+    b.close()
+
+
+def _reopen(backend):
+    return type(backend)(backend.path)
+
+
+def test_batch_commits_all_registrations(backend):
+    manager = InstanceManager(storage=backend)
+    with manager.batch():
+        for i in range(20):
+            manager.register(f'gw-{i}', f'ws://10.0.0.{i}:18789')
+    assert len(InstanceManager(storage=_reopen(backend)).list()) == 20
+
+
+def test_batch_writes_file_once(tmp_path, monkeypatch):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    writes = []
+    original = backend._persist
+    monkeypatch.setattr(backend, '_persist', lambda entries, doc: (writes.append(len(entries)), original(entries, doc)))
+    manager = InstanceManager(storage=backend)
+    with manager.batch():
+        for i in range(10):
+            manager.register(f'gw-{i}', 'ws://localhost:8080')
+    assert writes == [10]
+
+
+def test_reads_inside_batch_see_buffered_changes(backend):
+    manager = InstanceManager(storage=backend)
+    with manager.batch():
+        m = manager.register('gw', 'ws://localhost:8080')
+        assert manager.get_by_id(m.id) is not None
+
+
+def test_batch_rolls_back_on_exception(backend):
+    manager = InstanceManager(storage=backend)
+    manager.register('keep', 'ws://localhost:8080')
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.register('discard', 'ws://localhost:8081')
+            raise RuntimeError('boom')
+    assert [m.title for m in manager.list()] == ['keep']
+    assert [m.title for m in InstanceManager(storage=_reopen(backend)).list()] == ['keep']
+
+
+def test_nested_batch_failure_only_undoes_inner_block(backend):
+    manager = InstanceManager(storage=backend)
+    with manager.batch():
+        manager.register('outer', 'ws://localhost:8080')
+        with pytest.raises(RuntimeError):
+            with manager.batch():
+                manager.register('inner', 'ws://localhost:8081')
+                raise RuntimeError('boom')
+    assert [m.title for m in InstanceManager(storage=_reopen(backend)).list()] == ['outer']
+
+
+def test_managers_sharing_backend_join_one_batch(backend):
+    instances = InstanceManager(storage=backend)
+    snapshots = SnapshotManager(storage=backend)
+    decomposer = ConfigDecomposer(storage=backend)
+    with pytest.raises(RuntimeError):
+        with instances.batch():
+            inst = instances.register('gw', 'ws://localhost:8080')
+            snapshots.capture_snapshot(inst.id, {'config': {}})
+            decomposer.decompose_and_save({'agents': [{'name': 'a', 'model': 'm'}]}, inst.id)
+            raise RuntimeError('boom')
+    assert backend.export() == {'minions': [], 'relations': []}
+
+
+def test_decompose_and_save_persists_tree(backend):
+    decomposer = ConfigDecomposer(storage=backend)
+    decomposer.decompose_and_save({
+        'agents': [{'name': 'a1', 'model': 'gpt-4'}],
+        'sessionConfig': {'maxSessions': 3},
+    }, 'inst-1')
+    composed = ConfigDecomposer(storage=_reopen(backend)).compose('inst-1')
+    assert composed['agents'][0]['name'] == 'a1'
+    assert composed['sessionConfig']['maxSessions'] == 3
+
+
+def _failing_writes(backend, monkeypatch):
+    import errno
+
+    def persist(entries, doc):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+    monkeypatch.setattr(backend, '_persist', persist)
+
+
+@pytest.mark.parametrize('kind', [JsonFileBackend, JournalBackend])
+def test_failed_write_leaves_no_phantom_records(tmp_path, monkeypatch, kind):
+    backend = kind(tmp_path / 'data.json')
+    manager = InstanceManager(storage=backend)
+    manager.register('a', 'ws://localhost:8080')
+    _failing_writes(backend, monkeypatch)
+    with pytest.raises(OSError):
+        manager.register('b', 'ws://localhost:8081')
+    with pytest.raises(OSError):
+        with manager.batch():
+            manager.register('c', 'ws://localhost:8082')
+            manager.register('d', 'ws://localhost:8083')
+    assert [m.title for m in manager.list()] == ['a']
+    monkeypatch.undo()
+    manager.register('e', 'ws://localhost:8084')
+    assert [m.title for m in InstanceManager(storage=_reopen(backend)).list()] == ['a', 'e']
@@ -0,0 +1,225 @@
+"""Tests for circuit breakers and token-bucket rate limits."""
+import asyncio
+import time
+
+import pytest
+
+from minions_openclaw.circuit_breaker import (
+    CIRCUIT_OPEN_STATUS, CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker, CircuitOpenError,
+)
+from minions_openclaw.deadline import Deadline
+from minions_openclaw.fleet import FleetCollector
+from minions_openclaw.gateway_client import GatewayClient, GatewayError
+from minions_openclaw.health import HealthCheckScheduler
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.rate_limit import TokenBucket
+from minions_openclaw.storage import JsonFileBackend
+from minions_openclaw.testing import MockGateway
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_bursts_then_refills():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.try_acquire() and not bucket.try_acquire()
+    clock.now += 100
+    assert bucket.tokens == 3
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+async def test_token_bucket_spreads_waiters_and_refunds_cancelled():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+    assert time.monotonic() - start >= 0.055
+    waiter = asyncio.ensure_future(bucket.acquire(5))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bucket.tokens > -1
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.allow()
+    assert info.value.retry_at == clock.now + 10
+    clock.now += 10
+    assert breaker.state == HALF_OPEN
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.retry_at == clock.now + 10
+    clock.now += 10
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_lost_half_open_trial_frees_its_slot():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    breaker.allow()
+    clock.now += 5
+    breaker.allow()
+
+
+def test_breaker_state_round_trips_through_fields():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30, clock=clock)
+    breaker.record_failure()
+    fields = {'status': CIRCUIT_OPEN_STATUS, **breaker.to_fields()}
+    restored = CircuitBreaker(cooldown=30, clock=clock)
+    restored.restore(fields)
+    assert restored.state == OPEN and restored.failures == 1
+    assert restored.retry_at == pytest.approx(breaker.retry_at)
+    restored.restore({'status': 'online', 'consecutiveFailures': 2})
+    assert restored.state == CLOSED and restored.failures == 2
+
+
+async def test_client_fails_fast_once_open():
+    gateway = MockGateway(drop_rate=1.0)
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    client = GatewayClient('ws://mock', connect=gateway.connect, call_timeout=0.02, breaker=breaker)
+    await client.open_connection()
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await client.call('agents.list')
+    calls = gateway.stats.calls
+    with pytest.raises(CircuitOpenError):
+        await client.call('agents.list')
+    results = await client.call_many([('agents.list', None), ('models.list', None)])
+    assert all(isinstance(r, CircuitOpenError) for r in results)
+    assert gateway.stats.calls == calls
+    await client.close()
+    with pytest.raises(CircuitOpenError):
+        await client.open_connection()
+
+
+async def test_deadline_timeouts_leave_the_breaker_closed():
+    gateway = MockGateway(latency=1)
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = GatewayClient('ws://mock', connect=gateway.connect, call_timeout=10, breaker=breaker)
+    await client.open_connection()
+    # Tasks started inside the block inherit its deadline, which caps their timeouts
+    async with Deadline(0.05):
+        call = asyncio.ensure_future(client.call('agents.list'))
+        many = asyncio.ensure_future(client.call_many([('agents.list', None), ('models.list', None)]))
+    with pytest.raises(asyncio.TimeoutError):
+        await call
+    assert all(isinstance(r, asyncio.TimeoutError) for r in await many)
+    assert breaker.state == CLOSED and breaker.failures == 0
+    # The host's own timeout still counts
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('agents.list', timeout=0.02)
+    assert breaker.state == OPEN
+    await client.close()
+
+
+async def test_client_error_frames_count_as_success_and_rate_limit_paces_calls():
+    gateway = MockGateway()
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = GatewayClient('ws://mock', connect=gateway.connect, breaker=breaker,
+                           rate_limit=TokenBucket(rate=100, burst=1))
+    await client.open_connection()
+    with pytest.raises(GatewayError):
+        await client.call('nope')
+    assert breaker.state == CLOSED
+    start = time.monotonic()
+    await asyncio.gather(*(client.call('models.list') for _ in range(5)))
+    assert time.monotonic() - start >= 0.035
+    await client.close()
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    gateway = MockGateway()
+
+    async def connect(url, additional_headers=None):
+        if url == 'ws://down':
+            raise ConnectionRefusedError('refused')
+        return await gateway.connect(url, additional_headers)
+    instances = InstanceManager(storage=JsonFileBackend(tmp_path / 'data.json'))
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=connect)
+    return instances, factory
+
+
+async def test_fleet_persists_open_breakers_and_skips_dead_hosts(fleet):
+    instances, factory = fleet
+    up = instances.register('up', 'ws://up').id
+    down = instances.register('down', 'ws://down').id
+    clock = Clock(time.time())
+    collector = FleetCollector(instances, client_factory=factory,
+                               breakers=BreakerRegistry(failure_threshold=1, cooldown=60, clock=clock))
+    report = await collector.collect()
+    assert [r.instance_id for r in report.succeeded] == [up]
+    fields = instances.get_by_id(down).fields
+    assert fields['status'] == CIRCUIT_OPEN_STATUS and fields['consecutiveFailures'] == 1
+    assert fields['circuitRetryAt']
+
+    # A fresh registry, e.g. in another process, restores the open breaker
+    fresh = FleetCollector(instances, client_factory=factory,
+                           breakers=BreakerRegistry(failure_threshold=1, cooldown=60, clock=clock))
+    report = await fresh.collect()
+    skipped = report.results[1]
+    assert skipped.skipped and skipped.error.startswith('Circuit open until')
+    clock.now += 61
+    report = await fresh.collect()
+    assert not report.results[1].skipped
+    assert instances.get_by_id(down).fields['status'] == CIRCUIT_OPEN_STATUS
+
+
+async def test_registry_bucket_takes_one_token_per_contact(fleet):
+    instances, factory = fleet
+    up = instances.register('up', 'ws://up')
+    breakers = BreakerRegistry(rate=0.001, burst=5)
+    report = await FleetCollector(instances, client_factory=factory, breakers=breakers).collect()
+    assert report.results[0].ok
+    # fetch_presence made four calls, but the sweep contacted the instance once
+    assert breakers.bucket(up.id).tokens == pytest.approx(4, abs=0.01)
+
+
+async def test_fleet_recovery_restores_online_status(fleet):
+    instances, factory = fleet
+    id = instances.register('flaky', 'ws://flaky').id
+    clock = Clock(time.time())
+    registry = BreakerRegistry(failure_threshold=1, cooldown=60, clock=clock)
+    breaker = registry.breaker(instances.get_by_id(id))
+    breaker.record_failure()
+    instances.record_breakers({id: breaker})
+    clock.now += 60
+    report = await FleetCollector(instances, client_factory=factory, breakers=registry).collect()
+    assert report.results[0].ok
+    fields = instances.get_by_id(id).fields
+    assert fields['status'] == 'online' and 'circuitRetryAt' not in fields
+
+
+async def test_health_checks_skip_open_circuits(fleet):
+    instances, factory = fleet
+    down = instances.register('down', 'ws://down').id
+    registry = BreakerRegistry(failure_threshold=1, cooldown=60)
+    scheduler = HealthCheckScheduler(instances, client_factory=factory, breakers=registry)
+    first = await scheduler.check()
+    assert not first[0].ok and not first[0].skipped
+    second = await scheduler.check()
+    assert second[0].skipped
+    assert instances.get_by_id(down).fields['status'] == CIRCUIT_OPEN_STATUS
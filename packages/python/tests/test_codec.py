@@ -0,0 +1,125 @@
+"""Tests for the pluggable JSON codec."""
+import json
+
+import pytest
+
+from minions_openclaw import codec
+from minions_openclaw.codec import DecodeError, JsonCodec, get_codec, set_codec
+from minions_openclaw.storage import JournalBackend, JsonFileBackend
+
+
+def _available():
+    names = []
+    for name in ('stdlib', 'orjson', 'msgspec'):
+        try:
+            get_codec(name)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
+
+
+DOC = {'minions': [{'id': 'a', 'title': 'Überwachung ✓', 'fields': {'n': 1, 'x': 1.5, 'ok': True, 'none': None}}]}
+
+
+@pytest.fixture(params=_available())
+def each_codec(request):
+    previous = set_codec(request.param)
+    yield codec.current_codec()
+    set_codec(previous)
+
+
+def test_round_trip_and_compact_output(each_codec):
+    data = each_codec.dumps(DOC)
+    assert isinstance(data, bytes) and b'\n' not in data
+    assert each_codec.loads(data) == DOC
+    assert each_codec.loads(data.decode()) == DOC
+    assert json.loads(each_codec.dumps(DOC, indent=True)) == DOC
+
+
+def test_decode_errors_are_uniform(each_codec):
+    with pytest.raises(DecodeError):
+        each_codec.loads(b'{"broken":')
+    with pytest.raises(ValueError):
+        each_codec.loads('nope')
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec('yaml')
+
+
+def test_auto_prefers_an_installed_fast_codec():
+    auto = get_codec('auto')
+    assert auto.name == (_available()[1] if len(_available()) > 1 else 'stdlib')
+    assert isinstance(auto, JsonCodec)
+
+
+def test_compact_json_store_is_smaller_and_interchangeable(tmp_path, each_codec):
+    pretty = JsonFileBackend(tmp_path / 'pretty' / 'data.json')
+    compact = JsonFileBackend(tmp_path / 'compact' / 'data.json', compact_json=True)
+    for backend in (pretty, compact):
+        for i in range(20):
+            backend.put_minion({'id': f'm{i}', 'minionTypeId': 't', 'fields': {'name': f'ñ{i}'}})
+    assert compact.path.stat().st_size < pretty.path.stat().st_size
+    previous = set_codec('stdlib')
+    try:
+        assert JsonFileBackend(compact.path).get_minion('m3')['fields'] == {'name': 'ñ3'}
+    finally:
+        set_codec(previous)
+
+
+def test_journal_snapshot_honours_compact_json(tmp_path, each_codec):
+    backend = JournalBackend(tmp_path / 'data.json', compact_json=True, background_compaction=False)
+    backend.put_minion({'id': 'a', 'minionTypeId': 't', 'fields': {}})
+    backend.compact()
+    assert b'\n' not in backend.path.read_bytes()
+    assert JournalBackend(backend.path).get_minion('a')['id'] == 'a'
+
+
+async def test_gateway_frames_are_sent_as_text(each_codec):
+    from minions_openclaw.gateway_client import GatewayClient
+    from minions_openclaw.testing import MockGateway
+    gateway = MockGateway()
+
+    async def echo(params):
+        return params
+    gateway.handlers['echo'] = echo
+    sent = []
+    client = GatewayClient('ws://gw', connect=gateway.connect)
+    await client.open_connection()
+    original = gateway.sockets[0].send
+
+    async def send(raw):
+        sent.append(raw)
+        await original(raw)
+    gateway.sockets[0].send = send
+    assert await client.call('echo', {'text': 'ü'}) == {'text': 'ü'}
+    assert isinstance(sent[0], str)
+    await client.close()
+
+
+def test_stdlib_only_values_fall_back(each_codec):
+    big = 2 ** 70
+    assert each_codec.loads(b'{"n":NaN,"big":%d}' % big)['big'] == big
+    assert json.loads(each_codec.dumps({'big': big})) == {'big': big}
+
+
+def test_store_written_by_stdlib_with_nan_survives(tmp_path, each_codec):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'minions': [{'id': 'old', 'minionTypeId': 't', 'fields': {'x': float('nan')}}]}))
+    backend = JsonFileBackend(path)
+    backend.put_minion({'id': 'new', 'minionTypeId': 't', 'fields': {}})
+    assert [m['id'] for m in JsonFileBackend(path).list_minions()] == ['old', 'new']
+
+
+@pytest.mark.parametrize('kind', [JsonFileBackend, JournalBackend])
+def test_unparseable_store_is_never_overwritten(tmp_path, kind):
+    path = tmp_path / 'data.json'
+    path.write_bytes(b'{"minions": [')
+    backend = kind(path)
+    with pytest.raises(DecodeError):
+        backend.put_minion({'id': 'new', 'minionTypeId': 't', 'fields': {}})
+    with pytest.raises(DecodeError):
+        backend.list_minions()
+    assert path.read_bytes() == b'{"minions": ['
@@ -0,0 +1,118 @@
+"""Tests for Deadline and timeout budgets on gateway operations."""
+import asyncio
+import time
+
+import pytest
+
+from minions_openclaw.circuit_breaker import CLOSED, BreakerRegistry
+from minions_openclaw.deadline import Deadline, DeadlineExceeded, budget, current_deadline
+from minions_openclaw.fleet import FleetCollector
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.storage import JsonFileBackend
+from minions_openclaw.testing import MockGateway
+
+
+def _sleeper(delay, payload=None):
+    async def handler(params):
+        await asyncio.sleep(delay)
+        return payload
+    return handler
+
+
+async def test_deadline_cancels_outstanding_work():
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        async with Deadline(0.02):
+            await asyncio.sleep(1)
+    assert time.monotonic() - start < 0.5
+    assert current_deadline() is None
+
+
+async def test_nested_deadline_never_extends_outer():
+    async with Deadline(0.5) as outer:
+        async with Deadline(10) as inner:
+            assert inner.expires_at == outer.expires_at
+            assert current_deadline() is inner
+        assert current_deadline() is outer
+
+
+async def test_budget_caps_timeout_and_fails_fast_when_spent():
+    assert budget(3.0) == 3.0
+    async with Deadline(0.05):
+        assert budget(3.0) <= 0.05
+    with pytest.raises(DeadlineExceeded):
+        async with Deadline(0):
+            budget(3.0, 'call')
+
+
+async def test_per_call_timeout_overrides_client_default():
+    gateway = MockGateway()
+    gateway.handlers['slow'] = _sleeper(0.05, 'ok')
+    client = GatewayClient('ws://gw', connect=gateway.connect, call_timeout=0.01)
+    await client.open_connection()
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('slow')
+    assert await client.call('slow', timeout=1.0) == 'ok'
+    await client.close()
+
+
+async def test_deadline_caps_calls_and_fetch_presence():
+    gateway = MockGateway(latency=1)
+    client = GatewayClient('ws://gw', connect=gateway.connect, call_timeout=10)
+    await client.open_connection()
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        async with Deadline(0.05):
+            await client.fetch_presence()
+    assert time.monotonic() - start < 0.5
+    assert client._calls == {}
+    # The reader was started outside the deadline and keeps running
+    assert client.connected
+    await client.close()
+
+
+async def test_connect_timeout_bounds_the_handshake():
+    gateway = MockGateway()
+
+    async def silent(url, additional_headers=None):
+        socket = await gateway.connect(url, additional_headers)
+        await socket.recv()  # swallow the challenge
+        return socket
+
+    client = GatewayClient('ws://gw', connect=silent, connect_timeout=0.02)
+    with pytest.raises(asyncio.TimeoutError):
+        await client.open_connection()
+    assert not client.connected
+    with pytest.raises(DeadlineExceeded):
+        async with Deadline(0.02):
+            await client.open_connection(timeout=5)
+
+
+async def test_fleet_deadline_bounds_the_sweep(tmp_path):
+    gateway = MockGateway(items=0)
+    gateway.handlers['system-presence'] = _sleeper(1, {})
+    instances = InstanceManager(storage=JsonFileBackend(tmp_path / 'data.json'))
+    for i in range(3):
+        instances.register(f'gw{i}', f'ws://gw{i}')
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=gateway.connect)
+    collector = FleetCollector(instances, client_factory=factory, concurrency=1, timeout=10)
+    start = time.monotonic()
+    report = await collector.collect(deadline=Deadline(0.05))
+    assert time.monotonic() - start < 0.5
+    assert len(report.failed) == 3
+    assert all(r.error == 'Deadline exceeded' for r in report.results)
+
+
+async def test_fleet_deadline_leaves_breakers_closed(tmp_path):
+    gateway = MockGateway(items=0)
+    gateway.handlers['system-presence'] = _sleeper(1, {})
+    instances = InstanceManager(storage=JsonFileBackend(tmp_path / 'data.json'))
+    slow = instances.register('slow', 'ws://slow').id
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=gateway.connect)
+    breakers = BreakerRegistry(failure_threshold=1)
+    collector = FleetCollector(instances, client_factory=factory, timeout=10, breakers=breakers)
+    report = await collector.collect(deadline=Deadline(0.05))
+    assert report.results[0].error == 'Deadline exceeded'
+    assert breakers.breaker(instances.get_by_id(slow)).state == CLOSED
+    assert instances.get_by_id(slow).fields.get('consecutiveFailures') == 0
@@ -0,0 +1,77 @@
+"""Tests for the indexed in-memory document behind the file backends."""
+import random
+from minions_openclaw.storage.document import Document
+
+
+def _relation(id, source, target, type='parent_of'):
+    return {'id': id, 'sourceId': source, 'targetId': target, 'type': type}
+
+
+def _scan(doc, source_id=None, target_id=None, type=None):
+    return sorted(
+        r['id'] for r in doc.relations.values()
+        if (source_id is None or r['sourceId'] == source_id)
+        and (target_id is None or r['targetId'] == target_id)
+        and (type is None or r['type'] == type)
+    )
+
+
+def _ids(relations):
+    return sorted(r['id'] for r in relations)
+
+
+def test_indexes_built_from_parsed_data():
+    doc = Document({
+        'minions': [
+            {'id': 'a', 'minionTypeId': 't1'},
+            {'id': 'b', 'minionTypeId': 't2'},
+            {'id': 'c', 'minionTypeId': 't1'},
+        ],
+        'relations': [_relation('r1', 'a', 'b'), _relation('r2', 'a', 'c', 'follows')],
+    })
+    assert [m['id'] for m in doc.minions_of_type('t1')] == ['a', 'c']
+    assert [r['id'] for r in doc.find_relations(source_id='a', type='follows')] == ['r2']
+    assert [r['id'] for r in doc.find_relations(target_id='b')] == ['r1']
+
+
+def test_changing_minion_type_moves_it_between_indexes():
+    doc = Document()
+    doc.apply({'op': 'put_minion', 'record': {'id': 'a', 'minionTypeId': 't1'}})
+    doc.apply({'op': 'put_minion', 'record': {'id': 'a', 'minionTypeId': 't2'}})
+    assert doc.minions_of_type('t1') == []
+    assert [m['id'] for m in doc.minions_of_type('t2')] == ['a']
+
+
+def test_deleted_records_leave_no_index_entries():
+    doc = Document({'minions': [{'id': 'a', 'minionTypeId': 't1'}], 'relations': [_relation('r1', 'a', 'b')]})
+    doc.apply({'op': 'delete_minion', 'id': 'a'})
+    doc.apply({'op': 'delete_relation', 'id': 'r1'})
+    assert doc.minions_of_type('t1') == []
+    assert doc.find_relations(source_id='a') == []
+    assert doc._by_source == {} and doc._by_source_type == {} and doc._by_type == {}
+
+
+def test_relation_endpoint_change_reindexes():
+    doc = Document({'relations': [_relation('r1', 'a', 'b')]})
+    doc.apply({'op': 'put_relation', 'record': _relation('r1', 'x', 'b')})
+    assert doc.find_relations(source_id='a') == []
+    assert [r['id'] for r in doc.find_relations(source_id='x', type='parent_of')] == ['r1']
+
+
+def test_index_lookups_match_full_scan_after_random_updates():
+    rng = random.Random(7)
+    doc = Document()
+    nodes = [f'n{i}' for i in range(8)]
+    for step in range(500):
+        rid = f'r{rng.randrange(60)}'
+        if rng.random() < 0.25:
+            doc.apply({'op': 'delete_relation', 'id': rid})
+        else:
+            doc.apply({'op': 'put_relation', 'record': _relation(
+                rid, rng.choice(nodes), rng.choice(nodes), rng.choice(['parent_of', 'follows']),
+            )})
+    for node in nodes:
+        for type in (None, 'parent_of', 'follows'):
+            assert _ids(doc.find_relations(source_id=node, type=type)) == _scan(doc, source_id=node, type=type)
+            assert _ids(doc.find_relations(target_id=node, type=type)) == _scan(doc, target_id=node, type=type)
+    assert _ids(doc.find_relations(type='follows')) == _scan(doc, type='follows')
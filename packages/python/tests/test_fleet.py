@@ -0,0 +1,108 @@
+"""Tests for fleet-wide presence collection."""
+import asyncio
+import time
+
+import pytest
+
+from minions_openclaw.deadline import Deadline
+from minions_openclaw.fleet import FleetCollector
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.gateway_pool import GatewayPool
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.snapshot_manager import SnapshotManager
+from minions_openclaw.storage import JsonFileBackend
+from minions_openclaw.testing import MockGateway
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    gateway = MockGateway(items=1)
+
+    async def presence(params):
+        await asyncio.sleep(0.05)
+        return {'port': 1}
+    gateway.handlers['system-presence'] = presence
+    opened = []
+
+    async def connect_by_url(url, additional_headers=None):
+        opened.append(url)
+        if url == 'ws://down':
+            raise ConnectionRefusedError('refused')
+        if url == 'ws://slow':
+            await asyncio.sleep(5)
+        return await gateway.connect(url, additional_headers)
+
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    instances = InstanceManager(storage=backend)
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=connect_by_url)
+    return instances, backend, factory, opened
+
+
+async def test_collects_all_instances_concurrently(fleet):
+    instances, backend, factory, _ = fleet
+    ids = [instances.register(f'gw{i}', f'ws://gw{i}').id for i in range(6)]
+    collector = FleetCollector(instances, client_factory=factory)
+    start = time.monotonic()
+    report = await collector.collect()
+    assert time.monotonic() - start < 0.25
+    assert [r.instance_id for r in report.succeeded] == ids
+    assert all(r.total_ms >= r.connect_ms for r in report.results)
+    snapshots = SnapshotManager(storage=backend)
+    assert all(len(snapshots.list_snapshots(i)) == 1 for i in ids)
+    assert snapshots.get_config(report.results[0].snapshot_id) == {'port': 1}
+
+
+async def test_failures_are_isolated_per_host(fleet):
+    instances, _, factory, _ = fleet
+    good = instances.register('good', 'ws://good').id
+    down = instances.register('down', 'ws://down').id
+    slow = instances.register('slow', 'ws://slow').id
+    report = await FleetCollector(instances, client_factory=factory, timeout=0.2).collect()
+    by_id = {r.instance_id: r for r in report.results}
+    assert by_id[good].ok and by_id[good].snapshot_id
+    assert 'ConnectionRefusedError' in by_id[down].error
+    assert 'Timed out' in by_id[slow].error and by_id[slow].snapshot_id is None
+    assert len(report.failed) == 2
+
+
+async def test_timeout_error_reports_the_capped_budget(fleet):
+    instances, _, factory, _ = fleet
+    slow = instances.register('slow', 'ws://slow').id
+
+    class Capped(Deadline):
+        def cap(self, timeout):
+            return min(timeout, 0.05)
+    report = await FleetCollector(instances, client_factory=factory, timeout=10).collect(deadline=Capped(10))
+    assert report.results[0].instance_id == slow
+    assert report.results[0].error == 'Timed out after 0.05s'
+
+
+async def test_semaphore_bounds_concurrency(fleet):
+    instances, _, factory, _ = fleet
+    for i in range(4):
+        instances.register(f'gw{i}', f'ws://gw{i}')
+    start = time.monotonic()
+    await FleetCollector(instances, client_factory=factory, concurrency=1).collect(capture=False)
+    assert time.monotonic() - start >= 0.2
+
+
+async def test_snapshots_written_in_one_batch(fleet):
+    instances, backend, factory, _ = fleet
+    for i in range(3):
+        instances.register(f'gw{i}', f'ws://gw{i}')
+    writes = []
+    original = backend._persist
+    backend._persist = lambda entries, doc: (writes.append(len(entries)), original(entries, doc))
+    await FleetCollector(instances, client_factory=factory).collect()
+    assert len(writes) == 1
+
+
+async def test_pooled_connections_are_reused(fleet):
+    instances, _, factory, opened = fleet
+    instances.register('a', 'ws://a')
+    pool = GatewayPool(client_factory=factory)
+    collector = FleetCollector(instances, pool=pool)
+    await collector.collect(capture=False)
+    await collector.collect(capture=False)
+    assert opened == ['ws://a'] and pool.stats.hits == 1
+    await pool.close()
@@ -30,3 +30,260 @@ def test_fetch_presence_is_async_callable():
     client = GatewayClient(url='ws://localhost:18789')
     assert callable(client.fetch_presence)
     assert inspect.iscoroutinefunction(client.fetch_presence)
+
+
+# ─── Multiplexed calls ───────────────────────────────────────────────────────
+
+import time
+
+import pytest
+
+from minions_openclaw.gateway_client import GatewayError
+
+
+def _reply(payload, delay=0.0):
+    async def handler(params):
+        await asyncio.sleep(delay)
+        return payload
+    return handler
+
+
+async def _open(connect, **kwargs):
+    client = GatewayClient(url='ws://gw', connect=connect, **kwargs)
+    await client.open_connection()
+    return client
+
+
+async def test_out_of_order_responses_reach_their_callers(fake_gateway):
+    connect, _ = fake_gateway
+    connect.handlers.update({'slow': _reply('s', 0.05), 'fast': _reply('f')})
+    client = await _open(connect)
+    assert await asyncio.gather(client.call('slow'), client.call('fast')) == ['s', 'f']
+    await client.close()
+
+
+async def test_fetch_presence_completes_in_one_round_trip(fake_gateway):
+    connect, _ = fake_gateway
+    connect.handlers.update({
+        'agents.list': _reply({'items': [{'id': 'a'}]}, 0.05),
+        'channels.list': _reply({'items': []}, 0.05),
+        'models.list': _reply({'items': [{'id': 'm'}]}, 0.05),
+        'system-presence': _reply({'port': 1}, 0.05),
+    })
+    client = await _open(connect)
+    start = time.monotonic()
+    presence = await client.fetch_presence()
+    assert time.monotonic() - start < 0.15
+    assert presence == {'agents': [{'id': 'a'}], 'channels': [], 'models': [{'id': 'm'}], 'config': {'port': 1}}
+    await client.close()
+
+
+async def test_error_frame_raises_gateway_error(fake_gateway):
+    connect, _ = fake_gateway
+    client = await _open(connect)
+    with pytest.raises(GatewayError) as info:
+        await client.call('nope')
+    assert info.value.method == 'nope'
+    await client.close()
+
+
+async def test_unsolicited_frames_are_ignored(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.handlers['ping'] = _reply('pong', 0.01)
+    client = await _open(connect)
+    sockets[0].push({'type': 'event', 'event': 'tick'})
+    sockets[0].push({'type': 'result', 'id': 'stale', 'payload': 1})
+    assert await client.call('ping') == 'pong'
+    await client.close()
+
+
+async def test_dropped_connection_fails_pending_calls(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.handlers['hang'] = _reply(None, 10)
+    client = await _open(connect)
+    pending = asyncio.ensure_future(client.call('hang'))
+    await asyncio.sleep(0)
+    sockets[0].drop()
+    with pytest.raises(ConnectionError):
+        await pending
+    with pytest.raises(RuntimeError):
+        await client.call('hang')
+
+
+async def test_call_timeout(fake_gateway):
+    connect, _ = fake_gateway
+    connect.handlers['hang'] = _reply(None, 10)
+    client = await _open(connect, call_timeout=0.02)
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('hang')
+    assert client._calls == {}
+    await client.close()
+
+
+# ─── call_many ───────────────────────────────────────────────────────────────
+
+
+async def test_call_many_keeps_order_and_per_call_errors(fake_gateway):
+    connect, _ = fake_gateway
+    connect.handlers.update({'slow': _reply('s', 0.03), 'fast': _reply('f')})
+    client = await _open(connect)
+    results = await client.call_many([('slow', None), ('nope', {'x': 1}), ('fast', None)])
+    assert results[0] == 's' and results[2] == 'f'
+    assert isinstance(results[1], GatewayError) and results[1].method == 'nope'
+    with pytest.raises(GatewayError):
+        await client.call_many([('fast', None), ('nope', None)], return_exceptions=False)
+    await client.close()
+
+
+async def test_call_many_writes_every_frame_before_waiting(fake_gateway):
+    connect, sockets = fake_gateway
+    gate = asyncio.Event()
+
+    async def held(params):
+        await gate.wait()
+        return params['n']
+
+    connect.handlers['held'] = held
+    client = await _open(connect)
+    task = asyncio.ensure_future(client.call_many([('held', {'n': n}) for n in range(3)]))
+    await asyncio.sleep(0.01)
+    assert [m['params']['n'] for m in sockets[0].sent if m['type'] == 'call'] == [0, 1, 2]
+    gate.set()
+    assert await task == [0, 1, 2]
+    await client.close()
+
+
+async def test_call_many_uses_batch_frame_when_advertised(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.welcome['features'] = ['batch']
+    connect.handlers.update({
+        'agents.list': _reply({'items': [{'id': 'a'}]}),
+        'channels.list': _reply({'items': []}),
+        'models.list': _reply({'items': []}),
+        'system-presence': _reply({'port': 1}),
+    })
+    client = await _open(connect)
+    presence = await client.fetch_presence()
+    frames = sockets[0].sent[1:]
+    assert [f['type'] for f in frames] == ['batch'] and len(frames[0]['calls']) == 4
+    assert presence['agents'] == [{'id': 'a'}] and presence['config'] == {'port': 1}
+    await client.close()
+
+
+async def test_batched_result_frame_is_unpacked(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.handlers.update({'a': _reply(None, 10), 'b': _reply(None, 10)})
+    client = await _open(connect)
+    task = asyncio.ensure_future(client.call_many([('a', None), ('b', None)]))
+    await asyncio.sleep(0.01)
+    ids = [m['id'] for m in sockets[0].sent if m['type'] == 'call']
+    sockets[0].push({'type': 'batch', 'results': [
+        {'type': 'result', 'id': ids[1], 'payload': 2},
+        {'type': 'result', 'id': ids[0], 'payload': 1},
+    ]})
+    assert await task == [1, 2]
+    await client.close()
+
+
+async def test_call_many_times_out_per_call(fake_gateway):
+    connect, _ = fake_gateway
+    connect.handlers.update({'hang': _reply(None, 10), 'fast': _reply('f')})
+    client = await _open(connect, call_timeout=0.03)
+    results = await client.call_many([('hang', None), ('fast', None)])
+    assert isinstance(results[0], asyncio.TimeoutError) and results[1] == 'f'
+    assert client._calls == {}
+    await client.close()
+
+
+# ─── Reconnect ───────────────────────────────────────────────────────────────
+
+from minions_openclaw.gateway_client import ReconnectPolicy
+
+FAST = ReconnectPolicy(base_delay=0.001, max_delay=0.005)
+
+
+def _connects(sockets):
+    return [m for s in sockets for m in s.sent if m['type'] == 'connect']
+
+
+async def test_reconnect_resumes_with_device_token(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.handlers['system-presence'] = _reply({'ok': True})
+    client = await _open(connect, reconnect=FAST)
+    client._device_token = 'tok'
+    sockets[0].drop()
+    assert await client.call('system-presence') == {'ok': True}
+    resume = _connects(sockets)[1]['payload']
+    assert resume['deviceToken'] == 'tok' and resume['signature'] == ''
+    assert (client.stats.reconnects, client.stats.resumed_sessions) == (1, 1)
+    await client.close()
+
+
+async def test_idempotent_in_flight_call_is_reissued(fake_gateway):
+    connect, sockets = fake_gateway
+    answer = {'delay': 10}
+
+    async def presence(params):
+        await asyncio.sleep(answer['delay'])
+        return 'done'
+    connect.handlers['system-presence'] = presence
+    client = await _open(connect, reconnect=FAST)
+    pending = asyncio.ensure_future(client.call('system-presence'))
+    await asyncio.sleep(0.01)
+    answer['delay'] = 0
+    sockets[0].drop()
+    assert await pending == 'done'
+    assert client.stats.reissued_calls == 1
+    await client.close()
+
+
+async def test_non_idempotent_in_flight_call_fails(fake_gateway):
+    connect, sockets = fake_gateway
+    connect.handlers['config.apply'] = _reply(None, 10)
+    connect.handlers['agents.list'] = _reply({'items': []})
+    client = await _open(connect, reconnect=FAST)
+    pending = asyncio.ensure_future(client.call('config.apply'))
+    await asyncio.sleep(0.01)
+    sockets[0].drop()
+    with pytest.raises(ConnectionError):
+        await pending
+    assert await client.call('agents.list') == {'items': []}
+    assert client.stats.failed_calls == 1
+    await client.close()
+
+
+async def test_subscriptions_survive_reconnect(fake_gateway):
+    connect, sockets = fake_gateway
+    client = await _open(connect, reconnect=FAST)
+    sub = client.subscribe('presence')
+    sockets[0].drop()
+    while client.stats.reconnects == 0:
+        await asyncio.sleep(0.001)
+    sockets[1].push({'type': 'event', 'event': 'presence', 'payload': 2})
+    assert (await asyncio.wait_for(sub.__anext__(), 1))['payload'] == 2
+    await client.close()
+
+
+async def test_reconnect_gives_up_after_max_attempts(fake_gateway):
+    connect, sockets = fake_gateway
+    state = {'up': True}
+
+    async def flaky(url, additional_headers=None):
+        if not state['up']:
+            raise ConnectionRefusedError('down')
+        return await connect(url, additional_headers)
+    client = GatewayClient(url='ws://gw', connect=flaky,
+                           reconnect=ReconnectPolicy(base_delay=0.001, max_attempts=3))
+    await client.open_connection()
+    state['up'] = False
+    sockets[0].drop()
+    with pytest.raises(ConnectionError):
+        await client.call('system-presence')
+    assert client.stats.failed_attempts == 3
+    await client.close()
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = ReconnectPolicy(base_delay=1, max_delay=8)
+    delays = [policy.delay(n) for n in range(6)]
+    assert all(0.5 * min(8, 2 ** n) <= d <= min(8, 2 ** n) for n, d in enumerate(delays))
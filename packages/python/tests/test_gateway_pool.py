@@ -0,0 +1,144 @@
+"""Tests for the pooled gateway connections."""
+import asyncio
+
+import pytest
+
+from minions import create_minion
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.gateway_pool import GatewayPool
+from minions_openclaw.testing import MockGateway
+from minions_openclaw.types import openclaw_instance_type
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def pool_factory():
+    gateway = MockGateway()
+    clock = Clock()
+
+    def make(**kwargs):
+        factory = lambda url, token, key: GatewayClient(url, token, key, connect=gateway.connect)
+        return GatewayPool(client_factory=factory, clock=clock, **kwargs)
+    return make, gateway, clock
+
+
+async def test_second_lease_reuses_connection(pool_factory):
+    make, gateway, _ = pool_factory
+    pool = make()
+    async with pool.lease('ws://a') as first:
+        pass
+    async with pool.lease('ws://a') as second:
+        assert second is first
+    assert len(gateway.sockets) == 1
+    assert (pool.stats.hits, pool.stats.misses) == (1, 1)
+    assert pool.stats.hit_rate == 0.5
+    await pool.close()
+
+
+async def test_concurrent_misses_open_one_connection(pool_factory):
+    make, gateway, _ = pool_factory
+    pool = make()
+    clients = await asyncio.gather(*(pool.acquire('ws://a') for _ in range(5)))
+    assert len({id(c) for c in clients}) == 1 and len(gateway.sockets) == 1
+    for c in clients:
+        await pool.release(c)
+    await pool.close()
+
+
+async def test_lru_idle_connection_evicted_past_max_size(pool_factory):
+    make, gateway, clock = pool_factory
+    pool = make(max_size=2)
+    for url in ('ws://a', 'ws://b'):
+        async with pool.lease(url):
+            clock.now += 1
+    async with pool.lease('ws://a'):
+        pass
+    async with pool.lease('ws://c'):
+        pass
+    assert len(pool) == 2 and pool.stats.evictions == 1
+    assert gateway.sockets[1].closed and not gateway.sockets[0].closed
+    await pool.close()
+
+
+async def test_leased_connection_is_never_evicted(pool_factory):
+    make, gateway, _ = pool_factory
+    pool = make(max_size=1)
+    held = await pool.acquire('ws://a')
+    async with pool.lease('ws://b'):
+        assert not gateway.sockets[0].closed
+    assert held.connected
+    await pool.release(held)
+    await pool.close()
+
+
+async def test_idle_timeout_closes_connection(pool_factory):
+    make, gateway, clock = pool_factory
+    pool = make(idle_timeout=10)
+    async with pool.lease('ws://a'):
+        pass
+    clock.now = 11
+    async with pool.lease('ws://b'):
+        pass
+    assert gateway.sockets[0].closed and len(pool) == 1
+    await pool.close()
+
+
+async def test_dead_connection_replaced_on_next_lease(pool_factory):
+    make, gateway, clock = pool_factory
+    pool = make()
+    async with pool.lease('ws://a') as first:
+        pass
+    gateway.sockets[0].drop()
+    await asyncio.sleep(0)
+    async with pool.lease('ws://a') as second:
+        assert second is not first and second.connected
+    assert pool.stats.health_check_failures == 1
+    await pool.close()
+
+
+async def test_stale_idle_connection_is_pinged(pool_factory):
+    make, gateway, clock = pool_factory
+    pool = make(health_check_after=5)
+    async with pool.lease('ws://a'):
+        pass
+    clock.now = 6
+    async with pool.lease('ws://a'):
+        pass
+    assert gateway.stats.calls == 1 and len(gateway.sockets) == 1
+    await pool.close()
+
+
+async def test_pool_ping_method_is_configurable(pool_factory):
+    make, gateway, clock = pool_factory
+    probes = []
+
+    async def presence(params):
+        probes.append(params)
+        return {}
+    gateway.handlers['system-presence'] = presence
+    pool = make(health_check_after=5, ping_method='system-presence', ping_params={'brief': True})
+    async with pool.lease('ws://a'):
+        pass
+    clock.now = 6
+    async with pool.lease('ws://a'):
+        pass
+    assert probes == [{'brief': True}]
+    await pool.close()
+
+
+async def test_lease_instance_keys_by_instance_id(pool_factory):
+    make, gateway, _ = pool_factory
+    pool = make()
+    a, _ = create_minion({'title': 'a', 'fields': {'url': 'ws://same'}}, openclaw_instance_type)
+    b, _ = create_minion({'title': 'b', 'fields': {'url': 'ws://same'}}, openclaw_instance_type)
+    async with pool.lease_instance(a), pool.lease_instance(b):
+        pass
+    assert len(gateway.sockets) == 2
+    await pool.close()
@@ -0,0 +1,137 @@
+"""Tests for client metrics and the health-check scheduler."""
+import asyncio
+
+import pytest
+
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.gateway_pool import GatewayPool
+from minions_openclaw.health import HealthCheckScheduler
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.metrics import LatencyHistogram
+from minions_openclaw.storage import JsonFileBackend
+from minions_openclaw.testing import MockGateway
+
+
+def test_histogram_quantiles_stay_within_observed_range():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(float(ms))
+    assert histogram.count == 100 and histogram.mean == 50.5
+    assert 40 <= histogram.quantile(0.5) <= 60
+    assert 90 <= histogram.quantile(0.99) <= 100
+    assert histogram.quantile(0) == 1 and histogram.quantile(1) == 100
+    with pytest.raises(ValueError):
+        histogram.quantile(1.5)
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) == 0.0
+    assert histogram.as_dict()['min'] == 0.0
+
+
+async def test_client_records_latency_bytes_and_timeouts():
+    gateway = MockGateway()
+
+    async def slow(params):
+        await asyncio.sleep(0.02)
+        return {'ok': True}
+
+    async def hang(params):
+        await asyncio.sleep(10)
+
+    gateway.handlers.update({'slow': slow, 'hang': hang})
+    client = GatewayClient('ws://gw', connect=gateway.connect, call_timeout=0.1)
+    await client.open_connection()
+    await client.call('slow')
+    await client.call_many([('slow', None), ('hang', None)])
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('hang')
+    metrics = client.metrics
+    assert metrics.histogram('slow').count == 2
+    assert metrics.histogram('slow').min >= 20
+    assert metrics.histogram('hang') is None
+    assert metrics.timeouts == {'hang': 2}
+    # challenge + hello-ok + two responses in; connect + four calls out
+    assert (metrics.frames_in, metrics.frames_out) == (4, 5)
+    assert metrics.bytes_in > 0 and metrics.bytes_out > 0
+    assert metrics.as_dict()['latency']['slow']['count'] == 2
+    await client.close()
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    gateway = MockGateway()
+
+    async def connect_by_url(url, additional_headers=None):
+        if url == 'ws://down':
+            raise ConnectionRefusedError('refused')
+        return await gateway.connect(url, additional_headers)
+
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=connect_by_url)
+    return InstanceManager(storage=backend), backend, factory
+
+
+async def test_check_writes_ping_fields_in_one_batch(fleet):
+    instances, backend, factory = fleet
+    up = instances.register('up', 'ws://up').id
+    down = instances.register('down', 'ws://down').id
+    writes = []
+    original = backend._persist
+    backend._persist = lambda entries, doc: (writes.append(len(entries)), original(entries, doc))
+    results = await HealthCheckScheduler(instances, client_factory=factory).check()
+    assert len(writes) == 1
+    assert {r.instance_id: r.ok for r in results} == {up: True, down: False}
+    fields = instances.get_by_id(up).fields
+    assert fields['status'] == 'online' and fields['lastPingAt']
+    assert fields['lastPingLatencyMs'] >= 0
+    down_fields = instances.get_by_id(down).fields
+    assert down_fields['status'] == 'offline' and 'lastPingAt' not in down_fields
+
+
+async def test_ping_is_a_one_item_list_by_default(tmp_path):
+    gateway = MockGateway(items=50)
+    probes = []
+    for method in ('models.list', 'system-presence'):
+        async def record(params, method=method, handler=gateway.handlers[method]):
+            probes.append((method, params))
+            return await handler(params)
+        gateway.handlers[method] = record
+    instances = InstanceManager(storage=JsonFileBackend(tmp_path / 'data.json'))
+    instances.register('gw', 'ws://gw')
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=gateway.connect)
+    await HealthCheckScheduler(instances, client_factory=factory).check()
+    await HealthCheckScheduler(instances, client_factory=factory, ping_method='system-presence').check()
+    assert probes == [('models.list', {'limit': 1}), ('system-presence', {})]
+
+
+def test_record_pings_skips_removed_instances(fleet):
+    instances, _, _ = fleet
+    kept = instances.register('a', 'ws://a').id
+    gone = instances.register('b', 'ws://b').id
+    instances.remove(gone)
+    assert instances.record_pings({kept: 1.5, gone: 2.0, 'missing': 3.0}) == 1
+    assert instances.get_by_id(kept).fields['lastPingLatencyMs'] == 1.5
+
+
+def test_offline_instance_keeps_last_successful_ping(fleet):
+    instances, _, _ = fleet
+    id = instances.register('a', 'ws://a').id
+    instances.record_pings({id: 4.0}, at='2026-01-01T00:00:00+00:00')
+    instances.record_pings({id: None})
+    fields = instances.get_by_id(id).fields
+    assert fields['status'] == 'offline'
+    assert (fields['lastPingAt'], fields['lastPingLatencyMs']) == ('2026-01-01T00:00:00+00:00', 4.0)
+
+
+async def test_scheduler_runs_rounds_until_stopped(fleet):
+    instances, _, factory = fleet
+    instances.register('up', 'ws://up')
+    pool = GatewayPool(client_factory=factory)
+    async with HealthCheckScheduler(instances, interval=0.01, pool=pool) as scheduler:
+        assert scheduler.running
+        await asyncio.sleep(0.05)
+    assert not scheduler.running and scheduler.rounds >= 2
+    assert pool.stats.hits >= 1
+    await pool.close()
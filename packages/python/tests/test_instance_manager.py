@@ -1,17 +1,10 @@
 import pytest
 import json
 from pathlib import Path
-from minions_openclaw.instance_manager import InstanceManager, DATA_FILE
+from minions_openclaw.instance_manager import InstanceManager
 from minions_openclaw.types import openclaw_instance_type
 
 
-@pytest.fixture(autouse=True)
-def clean_storage():
-    yield
-    if DATA_FILE.exists():
-        DATA_FILE.unlink()
-
-
 # ─── Original 4 tests ─────────────────────────────────────────────────────────
 
 def test_register_instance():
@@ -117,3 +110,75 @@ def test_registered_instance_title_matches_name():
     manager = InstanceManager()
     m = manager.register('MyGateway', 'ws://localhost:8080')
     assert m.title == 'MyGateway'
+
+
+# ─── vacuum() ────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def store(tmp_path):
+    # Snapshot configs are only kept as blobs on stores without the inline copy
+    from minions_openclaw.storage import ShardedBackend
+    return ShardedBackend(tmp_path / 'shards')
+
+
+def _populate(store):
+    from minions_openclaw.config_decomposer import ConfigDecomposer
+    from minions_openclaw.snapshot_manager import SnapshotManager
+    manager = InstanceManager(storage=store)
+    gone = manager.register('gone', 'ws://a')
+    kept = manager.register('kept', 'ws://b')
+    for inst in (gone, kept):
+        ConfigDecomposer(storage=store).decompose_and_save({'agents': [{'name': 'main'}]}, inst.id)
+        SnapshotManager(storage=store).capture_snapshot(inst.id, {'config': {'owner': inst.id}})
+    manager.remove(gone.id)
+    return manager, gone, kept
+
+
+def test_vacuum_cascades_from_tombstoned_instance(store):
+    manager, gone, kept = _populate(store)
+    before = store.export()
+    report = manager.vacuum()
+    assert gone.id in report.minions and len(report.minions) == 3
+    assert report.records_scanned == len(before['minions']) + len(before['relations'])
+    assert report.bytes_reclaimed > 0
+    remaining = store.export()
+    assert {m['id'] for m in remaining['minions']} == {m['id'] for m in before['minions']} - set(report.minions)
+    assert all(r['sourceId'] == kept.id or r['targetId'] == kept.id for r in remaining['relations'])
+    assert len(remaining['blobRefs']) == 1
+    assert manager.get_by_id(kept.id) is not None
+
+
+def test_vacuum_dry_run_writes_nothing(store):
+    manager, gone, _ = _populate(store)
+    before = store.export()
+    report = manager.vacuum(dry_run=True)
+    assert report.dry_run and gone.id in report.minions
+    assert store.export() == before
+
+
+def test_vacuum_respects_age_threshold(store):
+    from datetime import datetime, timedelta, timezone
+    manager, gone, _ = _populate(store)
+    assert manager.vacuum(older_than=timedelta(days=1)).minions == []
+    later = datetime.now(timezone.utc) + timedelta(days=2)
+    assert gone.id in manager.vacuum(older_than=timedelta(days=1), at=later).minions
+
+
+def test_vacuum_keeps_child_with_live_parent(store):
+    manager, gone, kept = _populate(store)
+    shared = {'id': 'shared', 'title': 'shared', 'minionTypeId': 'openclaw-agent', 'fields': {}}
+    store.put_many(minions=[shared], relations=[
+        {'sourceId': gone.id, 'targetId': 'shared', 'type': 'parent_of'},
+        {'sourceId': kept.id, 'targetId': 'shared', 'type': 'parent_of'},
+    ])
+    manager.vacuum()
+    assert store.get_minion('shared') is not None
+    assert [r['sourceId'] for r in store.list_relations(target_id='shared')] == [kept.id]
+
+
+def test_vacuum_removes_dangling_relations(store):
+    manager = InstanceManager(storage=store)
+    inst = manager.register('x', 'ws://x')
+    store.put_relation({'id': 'dangling', 'sourceId': inst.id, 'targetId': 'missing', 'type': 'parent_of'})
+    assert manager.vacuum().relations == ['dangling']
+    assert store.list_relations() == []
@@ -0,0 +1,124 @@
+"""Tests for the append-only journal backend."""
+import json
+import threading
+import time
+
+from minions_openclaw.storage import JournalBackend
+from minions_openclaw.snapshot_manager import SnapshotManager
+
+
+def _minion(id, **extra):
+    return {'id': id, 'title': id, 'minionTypeId': 't1', 'fields': {}, **extra}
+
+
+def test_writes_append_to_journal_without_touching_snapshot(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_minion(_minion('a'))
+    backend.put_minion(_minion('b'))
+    assert not (tmp_path / 'data.json').exists()
+    lines = backend.journal_path.read_text().splitlines()
+    assert [json.loads(l)['record']['id'] for l in lines] == ['a', 'b']
+
+
+def test_journal_replays_over_snapshot(tmp_path):
+    (tmp_path / 'data.json').write_text(json.dumps({'minions': [_minion('a'), _minion('b')], 'relations': []}))
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_minion(_minion('a', title='updated'))
+    backend.delete_minion('b')
+    reopened = JournalBackend(tmp_path / 'data.json')
+    assert reopened.export()['minions'] == [_minion('a', title='updated')]
+
+
+def test_write_cost_is_independent_of_history(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', compact_threshold=10 ** 9)
+    snapshots = SnapshotManager(storage=backend)
+    snapshots.capture_snapshot('inst', {'config': {'port': 1}})
+    start = backend.journal_size()
+    snapshots.capture_snapshot('inst', {'config': {'port': 1}})
+    first = backend.journal_size() - start
+    for _ in range(20):
+        snapshots.capture_snapshot('inst', {'config': {'port': 1}})
+    before = backend.journal_size()
+    snapshots.capture_snapshot('inst', {'config': {'port': 1}})
+    assert abs((backend.journal_size() - before) - first) < 16
+
+
+def test_torn_trailing_line_is_ignored(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_minion(_minion('a'))
+    with backend.journal_path.open('a') as f:
+        f.write('{"op": "put_minion", "rec')
+    assert [m['id'] for m in backend.list_minions()] == ['a']
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_many(minions=[_minion('a'), _minion('b')], relations=[{'id': 'r1', 'sourceId': 'a', 'targetId': 'b', 'type': 'parent_of'}])
+    backend.delete_minion('b')
+    backend.compact()
+    assert backend.journal_size() == 0
+    snapshot = json.loads((tmp_path / 'data.json').read_text())
+    assert [m['id'] for m in snapshot['minions']] == ['a']
+    assert [r['id'] for r in snapshot['relations']] == ['r1']
+
+
+def test_threshold_triggers_compaction(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', compact_threshold=200, background_compaction=False)
+    for i in range(5):
+        backend.put_minion(_minion(f'm{i}', fields={'pad': 'x' * 50}))
+    assert backend.journal_size() < 200
+    assert len(json.loads((tmp_path / 'data.json').read_text())['minions']) >= 2
+    assert len(backend.list_minions()) == 5
+
+
+def test_replaying_journal_after_compaction_is_idempotent(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_minion(_minion('a'))
+    journal = backend.journal_path.read_bytes()
+    backend.compact()
+    # Simulate a crash after the snapshot was replaced but before the journal was trimmed
+    backend.journal_path.write_bytes(journal)
+    assert [m['id'] for m in backend.list_minions()] == ['a']
+
+
+def test_blob_refcounts_survive_crash_during_compaction(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_blob('d1', b'payload')
+    journal = backend.journal_path.read_bytes()
+    backend.compact()
+    # Crash after the snapshot was replaced but before the journal was trimmed
+    backend.journal_path.write_bytes(journal)
+    reopened = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    assert reopened.export()['blobRefs'] == {'d1': 1}
+    reopened.release_blob('d1')
+    assert not reopened.has_blob('d1')
+    assert reopened.get_blob('d1') is None
+
+
+def test_relative_blob_refs_from_older_journals_still_apply(tmp_path):
+    path = tmp_path / 'data.json'
+    lines = [{'op': 'blob_ref', 'digest': 'd1', 'delta': 1}] * 2 + [{'op': 'blob_ref', 'digest': 'd1', 'delta': -1}]
+    path.with_name('data.json.journal').write_text(''.join(json.dumps(e) + '\n' for e in lines))
+    assert JournalBackend(path).export()['blobRefs'] == {'d1': 1}
+
+
+def test_append_from_another_writer_during_compaction_is_kept(tmp_path):
+    path = tmp_path / 'data.json'
+    compactor = JournalBackend(path, background_compaction=False)
+    writer = JournalBackend(path, background_compaction=False)
+    compactor.put_minion(_minion('a'))
+    thread = threading.Thread(target=writer.put_minion, args=(_minion('b'),))
+    write_atomic = compactor._write_atomic
+
+    def write_then_race(target, data):
+        if not thread.is_alive() and target == path:
+            # The second writer tries to append while the snapshot is being replaced
+            thread.start()
+            time.sleep(0.1)
+        write_atomic(target, data)
+    compactor._write_atomic = write_then_race
+    compactor.compact()
+    thread.join()
+    assert sorted(m['id'] for m in JournalBackend(path).list_minions()) == ['a', 'b']
+    assert sorted(m['id'] for m in compactor.list_minions()) == ['a', 'b']
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,55 @@
+"""Tests for the structural JSON diff/patch used by snapshot delta chains."""
+import random
+
+from minions_openclaw.json_patch import apply_patch, make_patch
+
+
+def test_identical_values_yield_empty_patch():
+    assert make_patch({'a': [1, {'b': 2}]}, {'a': [1, {'b': 2}]}) == []
+
+
+def test_nested_change_is_a_single_replace():
+    patch = make_patch({'gateway': {'port': 1, 'host': 'x'}}, {'gateway': {'port': 2, 'host': 'x'}})
+    assert patch == [{'op': 'replace', 'path': '/gateway/port', 'value': 2}]
+
+
+def test_keys_needing_escapes_round_trip():
+    a = {'a/b': 1, 'c~d': {'e': 1}}
+    b = {'a/b': 2, 'c~d': {}}
+    assert apply_patch(a, make_patch(a, b)) == b
+
+
+def test_list_shrink_and_grow_round_trip():
+    for a, b in [([1, 2, 3, 4], [1]), ([1], [1, 2, 3]), ([{'x': 1}, 2], [{'x': 2}, 2, 5])]:
+        assert apply_patch(a, make_patch(a, b)) == b
+
+
+def test_type_change_replaces_whole_value():
+    a = {'agents': {'main': {}}}
+    b = {'agents': [{'id': 'main'}]}
+    assert make_patch(a, b) == [{'op': 'replace', 'path': '/agents', 'value': b['agents']}]
+    assert apply_patch(a, make_patch(a, b)) == b
+
+
+def test_apply_does_not_mutate_input():
+    a = {'list': [1, 2], 'n': {'k': 1}}
+    apply_patch(a, make_patch(a, {'list': [1], 'n': {'k': 2}}))
+    assert a == {'list': [1, 2], 'n': {'k': 1}}
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randrange(4 if depth < 3 else 2)
+    if kind == 0:
+        return rng.randrange(5)
+    if kind == 1:
+        return rng.choice(['a', 'b', None, True])
+    if kind == 2:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {rng.choice('pqrs'): _random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+
+
+def test_random_documents_round_trip():
+    rng = random.Random(11)
+    for _ in range(300):
+        a, b = _random_value(rng), _random_value(rng)
+        assert apply_patch(a, make_patch(a, b)) == b
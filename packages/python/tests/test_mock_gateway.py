@@ -0,0 +1,163 @@
+"""Tests for the local stand-in gateway and the load driver."""
+import asyncio
+import time
+
+import pytest
+
+from minions_openclaw.gateway_client import FrameTooLarge, GatewayClient, GatewayError, ReconnectPolicy
+from minions_openclaw.testing import MockGateway
+from minions_openclaw.testing.load import run_load
+
+
+async def test_handshake_and_presence_in_process():
+    gateway = MockGateway(items=3, item_bytes=5)
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    assert client.device_token in gateway.device_tokens
+    presence = await client.fetch_presence()
+    assert [a['id'] for a in presence['agents']] == ['agent-0', 'agent-1', 'agent-2']
+    assert presence['agents'][0]['description'] == 'xxxxx'
+    assert presence['config']['version'] == 'mock'
+    assert gateway.stats.connections == 1 and gateway.stats.calls == 4
+    await client.close()
+
+
+async def test_unknown_method_and_custom_handler():
+    gateway = MockGateway()
+
+    async def echo(params):
+        return params
+    gateway.handlers['echo'] = echo
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    assert await client.call('echo', {'a': 1}) == {'a': 1}
+    with pytest.raises(GatewayError):
+        await client.call('nope')
+    assert gateway.stats.errors == 1
+    await client.close()
+
+
+async def test_latency_is_applied():
+    gateway = MockGateway(latency=0.05)
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    start = time.monotonic()
+    await client.call('models.list')
+    assert time.monotonic() - start >= 0.045
+    await client.close()
+
+
+async def test_dropped_responses_time_out():
+    gateway = MockGateway(drop_rate=1.0)
+    client = GatewayClient('ws://mock', connect=gateway.connect, call_timeout=0.05)
+    await client.open_connection()
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('agents.list')
+    assert gateway.stats.dropped == 1
+    await client.close()
+
+
+async def test_batch_feature_is_served():
+    gateway = MockGateway(features=['batch'])
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    results = await client.call_many([('agents.list', None), ('channels.list', None)])
+    assert results[1]['items'][0]['id'] == 'channel-0'
+    await client.close()
+
+
+async def test_push_reaches_subscribers():
+    gateway = MockGateway()
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    received = asyncio.get_running_loop().create_future()
+    client.on('presence', lambda payload: received.done() or received.set_result(payload))
+    assert await gateway.push('presence', {'online': True}) == 1
+    assert (await asyncio.wait_for(received, 1))['payload'] == {'online': True}
+    await client.close()
+
+
+async def test_reconnect_resumes_with_device_token():
+    gateway = MockGateway()
+    client = GatewayClient('ws://mock', connect=gateway.connect,
+                           reconnect=ReconnectPolicy(base_delay=0.01, max_delay=0.01))
+    await client.open_connection()
+    token = client.device_token
+    gateway.disconnect_all()
+    assert (await client.call('models.list'))['items']
+    assert client.device_token == token and gateway.stats.connections == 2
+    await client.close()
+
+
+async def test_serves_real_websockets():
+    gateway = MockGateway(items=2)
+    async with gateway.serve() as url:
+        assert url.startswith('ws://127.0.0.1:')
+        client = GatewayClient(url)
+        await client.open_connection()
+        assert len((await client.call('agents.list'))['items']) == 2
+        await client.close()
+
+
+async def test_run_load_reports_throughput_and_quantiles():
+    report = await run_load(instances=3, calls=20, concurrency=4, latency=0.001)
+    assert report.calls == 60 and report.errors == 0
+    assert report.connect.count == 3 and report.latency.count == 60
+    assert report.calls_per_sec > 0
+    assert report.latency.quantile(0.5) <= report.latency.quantile(0.99)
+    assert report.fleet_ok == 3 and report.fleet_ms > 0
+    assert 'p99' in report.format()
+
+
+async def test_paginate_follows_cursors():
+    gateway = MockGateway(items=25, page_size=10)
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    ids = [item['id'] async for item in client.paginate('agents.list')]
+    assert ids == [f'agent-{i}' for i in range(25)]
+    assert gateway.stats.calls == 3
+    assert len([item async for item in client.paginate('models.list', page_size=4)]) == 25
+    await client.close()
+
+
+async def test_paginate_stops_early_without_leaking_requests():
+    gateway = MockGateway(items=100, page_size=10)
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    pages = client.paginate('channels.list')
+    assert (await pages.__anext__())['id'] == 'channel-0'
+    await pages.aclose()
+    await asyncio.sleep(0)
+    assert gateway.stats.calls <= 2 and not client._calls
+    await client.close()
+
+
+async def test_fetch_presence_collects_every_page():
+    gateway = MockGateway(items=23, page_size=5)
+    client = GatewayClient('ws://mock', connect=gateway.connect)
+    await client.open_connection()
+    presence = await client.fetch_presence()
+    assert [len(presence[k]) for k in ('agents', 'channels', 'models')] == [23, 23, 23]
+    assert presence['models'][-1]['id'] == 'model-22'
+    await client.close()
+
+
+async def test_oversized_frame_drops_connection():
+    gateway = MockGateway(items=50, item_bytes=100)
+    client = GatewayClient('ws://mock', connect=gateway.connect, max_frame_size=1024)
+    await client.open_connection()
+    with pytest.raises(FrameTooLarge) as info:
+        await client.call('agents.list')
+    assert info.value.size > 1024 and info.value.limit == 1024
+    assert not client.connected
+    await client.close()
+
+
+async def test_oversized_frame_over_websocket():
+    gateway = MockGateway(items=50, item_bytes=100)
+    async with gateway.serve() as url:
+        client = GatewayClient(url, max_frame_size=1024)
+        await client.open_connection()
+        with pytest.raises(FrameTooLarge):
+            await client.call('agents.list')
+        await client.close()
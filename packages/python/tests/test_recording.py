@@ -0,0 +1,118 @@
+"""Tests for traffic recording and replay."""
+import asyncio
+import time
+
+import pytest
+
+from minions_openclaw.gateway_client import GatewayClient, ReconnectPolicy
+from minions_openclaw.recording import Recording, TrafficRecorder
+from minions_openclaw.testing import MockGateway
+
+
+async def _record(path, gateway, session, **kwargs):
+    with TrafficRecorder(path, url='ws://mock') as recorder:
+        client = GatewayClient('ws://mock', connect=gateway.connect, recorder=recorder, **kwargs)
+        await client.open_connection()
+        try:
+            await session(client)
+        finally:
+            await client.close()
+    return Recording.load(path)
+
+
+async def test_recording_captures_frames_per_connection(tmp_path):
+    async def session(client):
+        await client.fetch_presence()
+    recording = await _record(tmp_path / 'rec.ndjson', MockGateway(items=2), session)
+    assert recording.url == 'ws://mock' and len(recording.connections) == 1
+    incoming = [frame for frame in recording.incoming()]
+    assert '"connect.challenge"' in incoming[0] and '"hello-ok"' in incoming[1]
+    assert sorted(m for m, _ in recording.calls()) == ['agents.list', 'channels.list', 'models.list', 'system-presence']
+    assert all(line.count('\n') == 0 for line in (tmp_path / 'rec.ndjson').read_text().splitlines())
+
+
+async def test_replay_remaps_call_ids_and_replays_pushes(tmp_path):
+    gateway = MockGateway(items=3)
+
+    async def session(client):
+        await client.call('agents.list', {'limit': 3})
+        await gateway.push('presence', {'online': True})
+        await asyncio.sleep(0.01)
+    recording = await _record(tmp_path / 'rec.ndjson', gateway, session)
+
+    client = GatewayClient('ws://replay', connect=recording.connector(speed=None))
+    events = []
+    client.on('presence', events.append)
+    await client.open_connection()
+    result = await client.call('agents.list', {'limit': 3})
+    assert [a['id'] for a in result['items']] == ['agent-0', 'agent-1', 'agent-2']
+    await asyncio.sleep(0.01)
+    assert events[0]['payload'] == {'online': True}
+    await client.close()
+
+
+async def test_replay_keeps_or_accelerates_timing(tmp_path):
+    async def session(client):
+        await client.call('models.list')
+    recording = await _record(tmp_path / 'rec.ndjson', MockGateway(latency=0.1), session)
+
+    async def replay(speed):
+        client = GatewayClient('ws://replay', connect=recording.connector(speed=speed))
+        await client.open_connection()
+        start = time.monotonic()
+        await client.call('models.list')
+        elapsed = time.monotonic() - start
+        await client.close()
+        return elapsed
+    assert await replay(1.0) >= 0.08
+    assert await replay(None) < 0.05
+
+
+async def test_response_waits_for_matching_call(tmp_path):
+    async def session(client):
+        await client.call('models.list')
+    recording = await _record(tmp_path / 'rec.ndjson', MockGateway(), session)
+    client = GatewayClient('ws://replay', connect=recording.connector(speed=None), call_timeout=0.05)
+    await client.open_connection()
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('agents.list')
+    await client.close()
+
+
+async def test_batch_frames_replay(tmp_path):
+    async def session(client):
+        await client.call_many([('agents.list', None), ('models.list', None)])
+    recording = await _record(tmp_path / 'rec.ndjson', MockGateway(features=['batch']), session)
+    client = GatewayClient('ws://replay', connect=recording.connector(speed=None))
+    await client.open_connection()
+    agents, models = await client.call_many([('agents.list', None), ('models.list', None)])
+    assert agents['items'][0]['id'] == 'agent-0' and models['items'][0]['id'] == 'model-0'
+    await client.close()
+
+
+async def test_recorded_reconnect_is_replayed(tmp_path):
+    gateway = MockGateway()
+    policy = ReconnectPolicy(base_delay=0.01, max_delay=0.01)
+
+    async def session(client):
+        await client.call('models.list')
+        gateway.disconnect_all()
+        await client.call('models.list')
+    recording = await _record(tmp_path / 'rec.ndjson', gateway, session, reconnect=policy)
+    assert len(recording.connections) == 2
+    assert recording.connections[0][-1][1] == 'e'
+
+    connector = recording.connector(speed=None)
+    client = GatewayClient('ws://replay', connect=connector, reconnect=policy)
+    await client.open_connection()
+    await client.call('models.list')
+    await client.call('models.list')
+    assert client.stats.reconnects == 1 and len(connector.sockets) == 2
+    await client.close()
+
+
+def test_unknown_recording_version_is_rejected(tmp_path):
+    path = tmp_path / 'rec.ndjson'
+    path.write_text('{"recording": 99}\n')
+    with pytest.raises(ValueError):
+        Recording.load(path)
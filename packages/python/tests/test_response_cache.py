@@ -0,0 +1,137 @@
+"""Tests for ResponseCache and cached gateway calls."""
+import asyncio
+
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.gateway_pool import GatewayPool
+from minions_openclaw.response_cache import MISSING, ResponseCache
+from minions_openclaw.testing import MockGateway
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put('i', 'agents.list', None, {'items': [1]})
+    clock.now = 9.9
+    assert cache.get('i', 'agents.list') == {'items': [1]}
+    clock.now = 10.0
+    assert cache.get('i', 'agents.list') is MISSING
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_params_are_keyed_canonically():
+    cache = ResponseCache()
+    cache.put('i', 'models.list', {'a': 1, 'b': 2}, 'x')
+    assert cache.get('i', 'models.list', {'b': 2, 'a': 1}) == 'x'
+    assert cache.get('i', 'models.list', {'a': 2}) is MISSING
+    assert cache.get('other', 'models.list', {'a': 1, 'b': 2}) is MISSING
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put('i', 'a', None, 1)
+    cache.put('i', 'b', None, 2)
+    cache.get('i', 'a')
+    cache.put('i', 'c', None, 3)
+    assert cache.get('i', 'b') is MISSING
+    assert cache.get('i', 'a') == 1 and len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_values_are_copied():
+    cache = ResponseCache()
+    value = {'items': [1]}
+    cache.put('i', 'agents.list', None, value)
+    value['items'].append(2)
+    cache.get('i', 'agents.list')['items'].append(3)
+    assert cache.get('i', 'agents.list') == {'items': [1]}
+
+
+def test_events_invalidate_mapped_methods_for_their_instance():
+    cache = ResponseCache()
+    for instance in ('i', 'j'):
+        cache.put(instance, 'agents.list', None, 1)
+        cache.put(instance, 'models.list', None, 2)
+    assert cache.handle_event('i', 'agents.changed') == 1
+    assert cache.get('i', 'agents.list') is MISSING
+    assert cache.get('i', 'models.list') == 2 and cache.get('j', 'agents.list') == 1
+    assert cache.handle_event('j', 'config.changed') == 2
+    assert cache.handle_event('j', 'tick') == 0
+
+
+def test_put_after_invalidation_is_skipped():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate('i')
+    cache.put('i', 'agents.list', None, 'stale', generation)
+    assert cache.get('i', 'agents.list') is MISSING
+
+
+def _presence_handlers(gateway, counts):
+    def handler(method, payload):
+        async def answer(params):
+            counts[method] = counts.get(method, 0) + 1
+            return payload
+        return answer
+
+    for method in ('agents.list', 'channels.list', 'models.list'):
+        gateway.handlers[method] = handler(method, {'items': [method]})
+    gateway.handlers['system-presence'] = handler('system-presence', {'port': 1})
+
+
+async def test_fetch_presence_is_served_from_cache():
+    gateway = MockGateway()
+    counts = {}
+    _presence_handlers(gateway, counts)
+    client = GatewayClient('ws://gw', connect=gateway.connect, cache=ResponseCache())
+    await client.open_connection()
+    first = await client.fetch_presence()
+    calls = gateway.stats.calls
+    assert await client.fetch_presence() == first
+    assert gateway.stats.calls == calls
+    await gateway.push('agents.changed')
+    await asyncio.sleep(0.01)
+    await client.fetch_presence()
+    assert counts['agents.list'] == 2 and counts['models.list'] == 1
+    await client.ping()
+    assert counts['models.list'] == 2
+    await client.close()
+
+
+async def test_pool_shares_cache_across_connections():
+    gateway = MockGateway()
+    counts = {}
+    _presence_handlers(gateway, counts)
+    cache = ResponseCache()
+    factory = lambda url, token, key: GatewayClient(url, token, key, connect=gateway.connect)
+    pool = GatewayPool(cache=cache, client_factory=factory)
+    async with pool.lease('ws://gw', key='inst-1') as client:
+        await client.call('models.list')
+    await pool.close()
+    async with pool.lease('ws://gw', key='inst-1') as client:
+        assert await client.call('models.list') == {'items': ['models.list']}
+    assert len(gateway.sockets) == 2 and counts['models.list'] == 1
+    assert cache.stats.hits == 1
+    await pool.close()
+
+
+async def test_dropped_connection_invalidates_instance():
+    gateway = MockGateway()
+    counts = {}
+    _presence_handlers(gateway, counts)
+    cache = ResponseCache()
+    client = GatewayClient('ws://gw', connect=gateway.connect, cache=cache)
+    await client.open_connection()
+    await client.call('agents.list')
+    gateway.sockets[0].drop()
+    await asyncio.sleep(0.01)
+    assert len(cache) == 0
+    await client.close()
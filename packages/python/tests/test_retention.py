@@ -0,0 +1,94 @@
+"""Tests for snapshot retention policies and SnapshotManager.prune()."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from minions_openclaw import PruneReport, RetentionPolicy, SnapshotManager
+from minions_openclaw.storage import JsonFileBackend
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _snap(id, age):
+    return {'id': id, 'fields': {'capturedAt': (NOW - age).isoformat()}}
+
+
+def _expired_ids(policy, snapshots):
+    return sorted(s['id'] for s in policy.select_expired(snapshots, NOW))
+
+
+def test_recent_snapshots_are_all_kept():
+    snaps = [_snap(f's{i}', timedelta(minutes=i)) for i in range(10)]
+    assert _expired_ids(RetentionPolicy(), snaps) == []
+
+
+def test_hourly_tier_keeps_newest_per_hour():
+    snaps = [_snap('a', timedelta(days=2, minutes=10)), _snap('b', timedelta(days=2, minutes=40)),
+             _snap('c', timedelta(days=2, hours=1, minutes=30)), _snap('latest', timedelta(0))]
+    assert _expired_ids(RetentionPolicy(), snaps) == ['b']
+
+
+def test_daily_tier_and_expiry():
+    snaps = [_snap('latest', timedelta(0)),
+             _snap('d1', timedelta(days=40, hours=1)), _snap('d2', timedelta(days=40, hours=2)),
+             _snap('old', timedelta(days=400))]
+    assert _expired_ids(RetentionPolicy(), snaps) == ['d2']
+    assert _expired_ids(RetentionPolicy(daily=timedelta(days=365)), snaps) == ['d2', 'old']
+
+
+def test_max_per_instance_caps_survivors_newest_first():
+    snaps = [_snap(f's{i}', timedelta(minutes=i)) for i in range(5)]
+    assert _expired_ids(RetentionPolicy(max_per_instance=2), snaps) == ['s2', 's3', 's4']
+
+
+def test_latest_snapshot_is_never_pruned():
+    snaps = [_snap('only', timedelta(days=1000))]
+    assert _expired_ids(RetentionPolicy(daily=timedelta(days=1), max_per_instance=0), snaps) == []
+
+
+@pytest.fixture
+def store(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    return backend, SnapshotManager(storage=backend)
+
+
+def _capture(mgr, backend, instance_id, config, age):
+    snap = mgr.capture_snapshot(instance_id, {'config': config})
+    record = backend.get_minion(snap.id)
+    record['fields']['capturedAt'] = (NOW - age).isoformat()
+    backend.put_minion(record)
+    return snap
+
+
+def test_prune_removes_snapshots_relations_and_keeps_chain_readable(store):
+    backend, mgr = store
+    snaps = [_capture(mgr, backend, 'inst', {'v': i, 'pad': 'x' * 100}, timedelta(hours=50 - i * 10 / 60))
+             for i in range(6)]
+    report = mgr.prune(RetentionPolicy(max_per_instance=2), at=NOW)
+    assert isinstance(report, PruneReport)
+    assert sorted(report.removed) == sorted(s.id for s in snaps[:4])
+    assert report.kept == 2 and report.reclaimed_bytes > 0
+    assert [s['id'] for s in mgr.get_history('inst')] == [snaps[5].id, snaps[4].id]
+    assert mgr.get_config(snaps[5].id) == {'v': 5, 'pad': 'x' * 100}
+    remaining = {r['sourceId'] for r in backend.list_relations()} | {r['targetId'] for r in backend.list_relations()}
+    assert remaining <= {'inst', snaps[4].id, snaps[5].id}
+
+
+def test_prune_dry_run_reports_without_writing(store):
+    backend, mgr = store
+    for i in range(3):
+        _capture(mgr, backend, 'inst', {'v': i}, timedelta(minutes=i))
+    before = backend.export()
+    report = mgr.prune(RetentionPolicy(max_per_instance=1), dry_run=True, at=NOW)
+    assert report.dry_run and len(report.removed) == 2
+    assert backend.export() == before
+
+
+def test_prune_counts_orphaned_blobs(store):
+    backend, mgr = store
+    a = _capture(mgr, backend, 'a', {'big': 'y' * 5000}, timedelta(days=500))
+    _capture(mgr, backend, 'a', {'small': 1}, timedelta(0))
+    report = mgr.prune(RetentionPolicy(daily=timedelta(days=365)), at=NOW)
+    assert report.removed == [a.id]
+    assert report.reclaimed_bytes > 5000
+    assert backend.get_blob(a.fields['configHash']) is None
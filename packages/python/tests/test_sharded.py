@@ -0,0 +1,121 @@
+"""Tests for the per-instance sharded storage layout."""
+import threading
+
+import pytest
+
+from minions_openclaw.config_decomposer import ConfigDecomposer
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.snapshot_manager import SnapshotManager
+from minions_openclaw.storage import ShardedBackend
+from minions_openclaw.storage.sharded import GLOBAL_SHARD
+
+
+@pytest.fixture
+def backend(tmp_path):
+    b = ShardedBackend(tmp_path)
+    yield b
+    b.close()
+
+
+def _fleet(backend, n=3):
+    instances = InstanceManager(storage=backend)
+    snapshots = SnapshotManager(storage=backend)
+    ids = []
+    for i in range(n):
+        inst = instances.register(f'gw{i}', f'ws://gw{i}:18789')
+        snapshots.capture_snapshot(inst.id, {'config': {'port': i}})
+        snapshots.capture_snapshot(inst.id, {'config': {'port': i + 100}})
+        ids.append(inst.id)
+    return ids
+
+
+def test_instance_subtree_lives_in_its_own_shard(backend):
+    ids = _fleet(backend)
+    ConfigDecomposer(storage=backend).decompose_and_save({'agents': [{'name': 'main', 'model': 'x'}]}, ids[0])
+    for inst_id in ids:
+        shard = backend.shard(inst_id).export()
+        assert any(m['id'] == inst_id for m in shard['minions'])
+        assert all(r['sourceId'] in {m['id'] for m in shard['minions']} for r in shard['relations'])
+    assert len(backend.shard(ids[0]).export()['minions']) > len(backend.shard(ids[1]).export()['minions'])
+    assert not backend.shard_path(GLOBAL_SHARD).exists()
+
+
+def test_write_to_one_instance_leaves_other_shards_untouched(backend):
+    ids = _fleet(backend)
+    before = {i: backend.shard_path(i).stat().st_mtime_ns for i in ids[1:]}
+    SnapshotManager(storage=backend).capture_snapshot(ids[0], {'config': {'port': 7}})
+    assert {i: backend.shard_path(i).stat().st_mtime_ns for i in ids[1:]} == before
+
+
+def test_managers_work_across_shards(backend):
+    ids = _fleet(backend)
+    snapshots = SnapshotManager(storage=backend)
+    assert [i.id for i in InstanceManager(storage=backend).list()] == ids
+    history = snapshots.get_history(ids[1])
+    assert [snapshots.get_config(s) for s in history] == [{'port': 101}, {'port': 1}]
+
+
+def test_reopened_backend_finds_records_through_index(backend, tmp_path):
+    ids = _fleet(backend)
+    reopened = ShardedBackend(tmp_path)
+    assert reopened.get_minion(ids[2])['title'] == 'gw2'
+    assert len(SnapshotManager(storage=reopened).list_snapshots(ids[2])) == 2
+    reopened.close()
+
+
+def test_cross_shard_relation_is_found_from_both_ends(backend):
+    a, b = _fleet(backend, 2)
+    backend.put_relation({'id': 'x', 'sourceId': a, 'targetId': b, 'type': 'peer_of'})
+    assert [r['id'] for r in backend.list_relations(source_id=a, type='peer_of')] == ['x']
+    assert [r['id'] for r in backend.list_relations(target_id=b, type='peer_of')] == ['x']
+
+
+def test_transaction_spanning_shards_rolls_back_everywhere(backend):
+    a, b = _fleet(backend, 2)
+    before = backend.export()
+    with pytest.raises(RuntimeError):
+        with backend.transaction():
+            SnapshotManager(storage=backend).delete_snapshot(SnapshotManager(storage=backend).list_snapshots(a)[0]['id'])
+            InstanceManager(storage=backend).remove(b)
+            raise RuntimeError('boom')
+    assert backend.export() == before
+
+
+def test_concurrent_writes_to_different_instances(backend):
+    ids = _fleet(backend, 4)
+    snapshots = SnapshotManager(storage=backend)
+
+    def capture(inst_id):
+        for n in range(10):
+            snapshots.capture_snapshot(inst_id, {'config': {'n': n}})
+
+    threads = [threading.Thread(target=capture, args=(i,)) for i in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(len(snapshots.list_snapshots(i)) == 12 for i in ids)
+
+
+def test_rolled_back_registration_leaves_no_index_entry(backend, tmp_path):
+    _fleet(backend, 2)
+    instances = InstanceManager(storage=backend)
+    count = len(backend.index.list_minions())
+    with pytest.raises(RuntimeError):
+        with instances.batch():
+            inst = instances.register('discard', 'ws://discard:18789')
+            assert instances.get_by_id(inst.id) is not None
+            assert inst.id in [i.id for i in instances.list()]
+            raise RuntimeError('boom')
+    assert len(backend.index.list_minions()) == count
+    assert len(ShardedBackend(tmp_path).index.list_minions()) == count
+
+
+def test_batched_records_are_routed_on_commit(backend, tmp_path):
+    instances = InstanceManager(storage=backend)
+    with instances.batch():
+        with instances.batch():
+            inst = instances.register('kept', 'ws://kept:18789')
+        assert backend.index.get_minion(inst.id) is None
+    assert backend.index.get_minion(inst.id)['shard'] == inst.id
+    assert ShardedBackend(tmp_path).get_minion(inst.id)['title'] == 'kept'
@@ -0,0 +1,105 @@
+"""Tests for ChallengeSigner and signed gateway handshakes."""
+import base64
+import threading
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.signing import ED25519, RSA_SHA256, ChallengeSigner, SigningError
+
+
+def _pem(key):
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture(scope='module')
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope='module')
+def ed_key():
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def test_rsa_signature_verifies(rsa_key):
+    signer = ChallengeSigner()
+    signature = signer.sign(_pem(rsa_key), b'n:t')
+    rsa_key.public_key().verify(base64.b64decode(signature), b'n:t', padding.PKCS1v15(), hashes.SHA256())
+    assert signer.algorithm(_pem(rsa_key)) == RSA_SHA256
+
+
+def test_loaded_key_is_cached(rsa_key):
+    signer = ChallengeSigner()
+    pem = _pem(rsa_key)
+    assert signer.load_key(pem) is signer.load_key(pem)
+    signer.clear()
+    assert signer.load_key(pem) is not None
+
+
+def test_ed25519_requires_gateway_support(ed_key):
+    signer = ChallengeSigner()
+    pem = _pem(ed_key)
+    with pytest.raises(SigningError):
+        signer.sign(pem, b'n:t')
+    signature = signer.sign(pem, b'n:t', accepted=[RSA_SHA256, ED25519])
+    ed_key.public_key().verify(base64.b64decode(signature), b'n:t')
+
+
+def test_invalid_key_raises_signing_error():
+    with pytest.raises(SigningError):
+        ChallengeSigner().load_key('not a pem')
+
+
+async def test_sign_async_runs_off_the_event_loop(rsa_key):
+    signer = ChallengeSigner()
+    threads = []
+    original = signer.sign
+
+    def sign(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    signer.sign = sign
+    await signer.sign_async(_pem(rsa_key), b'n:t')
+    assert threads and threads[0] is not threading.main_thread()
+
+
+async def test_handshake_sends_verifiable_signature(fake_gateway, rsa_key):
+    connect, sockets = fake_gateway
+    client = GatewayClient('ws://gw', device_private_key=_pem(rsa_key), connect=connect)
+    await client.open_connection()
+    payload = sockets[0].sent[0]['payload']
+    assert 'algorithm' not in payload
+    rsa_key.public_key().verify(
+        base64.b64decode(payload['signature']), b'n:t', padding.PKCS1v15(), hashes.SHA256()
+    )
+    await client.close()
+
+
+async def test_handshake_announces_ed25519(fake_gateway, ed_key):
+    connect, sockets = fake_gateway
+    connect.challenge['algorithms'] = [RSA_SHA256, ED25519]
+    client = GatewayClient('ws://gw', device_private_key=_pem(ed_key), connect=connect)
+    await client.open_connection()
+    payload = sockets[0].sent[0]['payload']
+    assert payload['algorithm'] == ED25519
+    ed_key.public_key().verify(base64.b64decode(payload['signature']), b'n:t')
+    await client.close()
+
+
+async def test_handshake_surfaces_unusable_key(fake_gateway):
+    connect, sockets = fake_gateway
+    client = GatewayClient('ws://gw', device_private_key='garbage', connect=connect)
+    with pytest.raises(SigningError):
+        await client.open_connection()
+    assert sockets[0].closed and not sockets[0].sent
@@ -9,8 +9,6 @@ from minions_openclaw.types import openclaw_snapshot_type
 from minions import Minion
 from datetime import datetime, timezone
 
-DATA_FILE = Path.home() / '.openclaw-manager' / 'data.json'
-
 SAMPLE_GATEWAY_DATA = {
     'agents': [{'id': 'a1', 'name': 'Main'}, {'id': 'a2', 'name': 'Sub'}],
     'channels': [{'id': 'c1', 'type': 'telegram'}],
@@ -19,13 +17,6 @@ SAMPLE_GATEWAY_DATA = {
 }
 
 
-@pytest.fixture(autouse=True)
-def clean_storage():
-    DATA_FILE.unlink(missing_ok=True)
-    yield
-    DATA_FILE.unlink(missing_ok=True)
-
-
 @pytest.fixture
 def manager():
     return SnapshotManager()
@@ -240,3 +231,235 @@ def test_diff_snapshots_identical_snapshots_returns_empty_diff():
     )
     diff = mgr.diff_snapshots(snap1, snap2)
     assert diff == {}
+
+
+# ─── Content-addressed config storage ─────────────────────────────────────────
+
+@pytest.fixture
+def isolated(tmp_path):
+    # A store without the TypeScript SDK's inline copy, so configs are
+    # delta-encoded and kept as blobs
+    from minions_openclaw.storage import ShardedBackend
+    backend = ShardedBackend(tmp_path / 'shards')
+    return backend, SnapshotManager(storage=backend)
+
+
+@pytest.fixture
+def data_json(tmp_path):
+    from minions_openclaw.storage import JsonFileBackend
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    return backend, SnapshotManager(storage=backend)
+
+
+def test_stored_snapshot_references_config_by_hash(tmp_path):
+    from minions_openclaw.storage import SqliteBackend
+    backend = SqliteBackend(tmp_path / 'data.db')
+    mgr = SnapshotManager(storage=backend)
+    snap = mgr.capture_snapshot('inst', SAMPLE_GATEWAY_DATA)
+    stored = backend.get_minion(snap.id)
+    assert 'config' not in stored['fields']
+    assert stored['fields']['configHash'] == snap.fields['configHash']
+    assert mgr.get_config(snap.id) == SAMPLE_GATEWAY_DATA['config']
+    backend.close()
+
+
+@pytest.mark.parametrize('inline_config', [True, False])
+def test_data_json_keeps_inline_config_for_typescript(data_json, inline_config):
+    backend, mgr = data_json
+    mgr.capture_snapshot('inst', {'config': _config(0)})
+    snap = mgr.capture_snapshot('inst', {'config': _config(1)}, inline_config=inline_config)
+    on_disk = {m['id']: m for m in json.loads(backend.path.read_text())['minions']}
+    assert json.loads(on_disk[snap.id]['fields']['config']) == _config(1)
+    assert mgr.get_config(snap.id) == _config(1)
+
+
+def test_data_json_is_no_larger_than_inline_copies(data_json):
+    backend, mgr = data_json
+    for i in range(10):
+        mgr.capture_snapshot('inst', {'config': _config(i % 2)})
+    stored = [m['fields'] for m in backend.list_minions()]
+    assert not any('configPatch' in f or 'configBase' in f for f in stored)
+    assert backend.export().get('blobRefs', {}) == {}
+    assert not backend.blobs.root.exists() or not any(backend.blobs.root.rglob('*'))
+    mgr.delete_snapshot(mgr.list_snapshots('inst')[0]['id'])
+    assert [mgr.get_config(s['id']) for s in mgr.get_history('inst')] == [_config(i % 2) for i in range(9, 0, -1)]
+
+
+def test_identical_configs_are_stored_once(isolated):
+    backend, mgr = isolated
+    for _ in range(5):
+        mgr.capture_snapshot('inst', SAMPLE_GATEWAY_DATA)
+    reordered = {'port': 18789, 'version': '1.0'}
+    mgr.capture_snapshot('inst', {'config': reordered})
+    assert backend.export()['blobRefs'] == {mgr.list_snapshots('inst')[0]['fields']['configHash']: 6}
+
+
+def test_deleting_last_snapshot_collects_blob(isolated):
+    backend, mgr = isolated
+    a = mgr.capture_snapshot('inst', SAMPLE_GATEWAY_DATA)
+    b = mgr.capture_snapshot('inst', SAMPLE_GATEWAY_DATA)
+    digest = a.fields['configHash']
+    mgr.delete_snapshot(a.id)
+    assert backend.get_blob(digest) is not None
+    mgr.delete_snapshot(b.id)
+    assert backend.get_blob(digest) is None
+    assert mgr.list_snapshots('inst') == []
+    assert backend.list_relations() == []
+
+
+def test_get_config_reads_legacy_inline_config(isolated):
+    backend, mgr = isolated
+    backend.put_minion({
+        'id': 'legacy', 'title': 'Old', 'minionTypeId': openclaw_snapshot_type.id,
+        'fields': {'instanceId': 'inst', 'config': '{"port": 1}'},
+    })
+    assert mgr.get_config('legacy') == {'port': 1}
+
+
+def test_compare_resolves_blob_configs(isolated):
+    _, mgr = isolated
+    a = mgr.capture_snapshot('inst', {'config': {'port': 1}})
+    b = mgr.capture_snapshot('inst', {'config': {'port': 2}})
+    diff = mgr.compare(a.id, b.id)
+    assert json.loads(diff['config']['from']) == {'port': 1}
+    assert json.loads(diff['config']['to']) == {'port': 2}
+    assert 'configHash' not in diff
+
+
+# ─── Delta-encoded snapshot chains ────────────────────────────────────────────
+
+def _config(i):
+    return {'port': 18789, 'agents': {'main': {'model': f'm{i}'}}, 'plugins': list(range(50))}
+
+
+def test_changed_configs_are_stored_as_deltas(isolated):
+    backend, mgr = isolated
+    snaps = [mgr.capture_snapshot('inst', {'config': _config(i)}) for i in range(4)]
+    stored = [backend.get_minion(s.id)['fields'] for s in snaps]
+    assert 'configBase' not in stored[0]
+    assert [f['configBase'] for f in stored[1:]] == [s.id for s in snaps[:-1]]
+    assert stored[3]['configPatch'] == [{'op': 'replace', 'path': '/agents/main/model', 'value': 'm3'}]
+    assert len(backend.export()['blobRefs']) == 1
+    assert [mgr.get_config(s.id) for s in snaps] == [_config(i) for i in range(4)]
+
+
+def test_keyframe_written_every_interval(tmp_path):
+    from minions_openclaw.storage import SqliteBackend
+    backend = SqliteBackend(tmp_path / 'data.db')
+    mgr = SnapshotManager(storage=backend, keyframe_interval=3)
+    snaps = [mgr.capture_snapshot('inst', {'config': _config(i)}) for i in range(7)]
+    keyframes = [i for i, s in enumerate(snaps) if 'configBase' not in backend.get_minion(s.id)['fields']]
+    assert keyframes == [0, 3, 6]
+    # A fresh manager has no cached chain tip and must replay from the keyframe
+    assert SnapshotManager(storage=backend).get_config(snaps[5].id) == _config(5)
+
+
+def test_captures_are_linked_by_follows(isolated):
+    _, mgr = isolated
+    snaps = [mgr.capture_snapshot('inst', {'config': _config(i)}) for i in range(3)]
+    assert [s['id'] for s in mgr.get_history('inst')] == [s.id for s in reversed(snaps)]
+
+
+def test_deleting_delta_base_rebases_successor(isolated):
+    backend, mgr = isolated
+    a, b, c = (mgr.capture_snapshot('inst', {'config': _config(i)}) for i in range(3))
+    mgr.delete_snapshot(b.id)
+    assert 'configBase' not in backend.get_minion(c.id)['fields']
+    assert mgr.get_config(c.id) == _config(2)
+    assert mgr.get_config(a.id) == _config(0)
+    assert [s['id'] for s in mgr.get_history('inst')] == [c.id, a.id]
+    mgr.delete_snapshot(a.id)
+    mgr.delete_snapshot(c.id)
+    assert backend.export().get('blobRefs', {}) == {}
+
+
+def test_chain_head_found_after_another_writer(isolated):
+    backend, mgr = isolated
+    first = mgr.capture_snapshot('inst', {'config': _config(0)})
+    other = SnapshotManager(storage=backend)
+    second = other.capture_snapshot('inst', {'config': _config(1)})
+    third = mgr.capture_snapshot('inst', {'config': _config(2)})
+    fresh = SnapshotManager(storage=backend).capture_snapshot('inst', {'config': _config(3)})
+    assert [s['id'] for s in mgr.get_history('inst')] == [fresh.id, third.id, second.id, first.id]
+    assert mgr.get_config(fresh.id) == _config(3)
+
+
+def test_capture_does_not_load_whole_history(isolated, monkeypatch):
+    backend, mgr = isolated
+    for i in range(30):
+        mgr.capture_snapshot('inst', {'config': _config(i)})
+    loads = []
+    original = backend.get_minion
+    monkeypatch.setattr(backend, 'get_minion', lambda id: (loads.append(id), original(id))[1])
+    mgr.capture_snapshot('inst', {'config': _config(30)})
+    assert len(loads) <= 3
+
+
+def test_tip_config_cache_is_bounded(tmp_path):
+    from minions_openclaw.storage import SqliteBackend
+    mgr = SnapshotManager(storage=SqliteBackend(tmp_path / 'data.db'), tip_cache_size=2)
+    for instance in ('a', 'b', 'c'):
+        mgr.capture_snapshot(instance, {'config': _config(0)})
+    assert len(mgr._tip_configs) == 2
+    snap = mgr.capture_snapshot('a', {'config': _config(1)})
+    assert mgr.get_config(snap.id) == _config(1)
+
+
+# ─── Streamed capture ─────────────────────────────────────────────────────────
+
+def test_streamed_capture_stores_the_same_blob(isolated):
+    backend, mgr = isolated
+    config = {'port': 1, 'plugins': [{'name': f'p{i}'} for i in range(200)]}
+    streamed = mgr.capture_snapshot('inst', {'config': config}, inline_config=False)
+    assert 'config' not in streamed.fields
+    inline = mgr.capture_snapshot('other', {'config': config})
+    assert streamed.fields['configHash'] == inline.fields['configHash']
+    assert backend.export()['blobRefs'] == {inline.fields['configHash']: 2}
+    assert mgr.get_config(streamed.id) == config
+
+
+def test_streamed_capture_deltas_survive_caller_mutation(isolated):
+    backend, mgr = isolated
+    config = _config(0)
+    a = mgr.capture_snapshot('inst', {'config': config}, inline_config=False)
+    config['agents']['main']['model'] = 'changed'
+    b = mgr.capture_snapshot('inst', {'config': _config(1)}, inline_config=False)
+    assert backend.get_minion(b.id)['fields']['configBase'] == a.id
+    assert mgr.get_config(a.id) == _config(0)
+    assert mgr.get_config(b.id) == _config(1)
+
+
+def test_streamed_capture_keeps_no_config_copy(tmp_path):
+    from minions_openclaw.storage import SqliteBackend
+    mgr = SnapshotManager(storage=SqliteBackend(tmp_path / 'data.db'))
+    a = mgr.capture_snapshot('inst', {'config': _config(0)}, inline_config=False)
+    assert mgr._tip_configs == {}
+    b = mgr.capture_snapshot('inst', {'config': _config(1)}, inline_config=False)
+    assert mgr._tip_configs == {}
+    assert mgr.storage.get_minion(b.id)['fields']['configBase'] == a.id
+    assert mgr.get_config(b.id) == _config(1)
+
+
+# ─── Cache isolation ──────────────────────────────────────────────────────────
+
+def test_returned_snapshots_are_copies(data_json):
+    backend, mgr = data_json
+    mgr.capture_snapshot('inst', SAMPLE_GATEWAY_DATA)
+    mgr.list_snapshots('inst')[0]['fields']['agentCount'] = 999
+    mgr.get_history('inst')[0]['fields']['agentCount'] = 999
+    mgr.capture_snapshot('other', SAMPLE_GATEWAY_DATA)
+    assert mgr.list_snapshots('inst')[0]['fields']['agentCount'] == len(SAMPLE_GATEWAY_DATA['agents'])
+    assert type(backend)(backend.path).list_minions()[0]['fields']['agentCount'] != 999
+
+
+def test_history_revalidates_store_once(tmp_path, monkeypatch):
+    from minions_openclaw.storage import JournalBackend
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    mgr = SnapshotManager(storage=backend)
+    for i in range(20):
+        mgr.capture_snapshot('inst', {'config': _config(i)})
+    checks = []
+    original = backend._current_signature
+    monkeypatch.setattr(backend, '_current_signature', lambda: (checks.append(1), original())[1])
+    assert len(mgr.get_history('inst')) == 20
+    assert len(checks) == 1
@@ -0,0 +1,297 @@
+"""Tests for the pluggable storage backends."""
+import json
+import pytest
+from minions_openclaw.storage import JsonFileBackend, JournalBackend, ShardedBackend, SqliteBackend, migrate_json_to_sqlite
+from minions_openclaw.storage import canonical_chunks, canonical_digest, canonical_json, content_digest
+from minions_openclaw.instance_manager import InstanceManager
+from minions_openclaw.snapshot_manager import SnapshotManager
+from minions_openclaw.config_decomposer import ConfigDecomposer
+
+
+def _minion(id, type_id='t1', **extra):
+    return {'id': id, 'title': id, 'minionTypeId': type_id, 'fields': {}, **extra}
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite', 'sharded'])
+def backend(request, tmp_path):
+    if request.param == 'json':
+        b = JsonFileBackend(tmp_path / 'data.json')
+    elif request.param == 'journal':
+        b = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    elif request.param == 'sqlite':
+        b = SqliteBackend(tmp_path / 'data.db')
+    else:
+        b = ShardedBackend(tmp_path / 'shards')
+    yield b
+    b.close()
+
+
+def test_put_and_get_minion(backend):
+    backend.put_minion(_minion('a'))
+    assert backend.get_minion('a')['title'] == 'a'
+    assert backend.get_minion('missing') is None
+
+
+def test_put_minion_replaces_existing_record_in_place(backend):
+    backend.put_minion(_minion('a'))
+    backend.put_minion(_minion('b'))
+    backend.put_minion(_minion('a', title='renamed'))
+    assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+    assert backend.get_minion('a')['title'] == 'renamed'
+
+
+def test_list_minions_filters_by_type(backend):
+    backend.put_many(minions=[_minion('a', 't1'), _minion('b', 't2'), _minion('c', 't1')])
+    assert [m['id'] for m in backend.list_minions('t1')] == ['a', 'c']
+
+
+def test_list_relations_filters(backend):
+    backend.put_many(relations=[
+        {'id': 'r1', 'sourceId': 'a', 'targetId': 'b', 'type': 'parent_of'},
+        {'id': 'r2', 'sourceId': 'a', 'targetId': 'c', 'type': 'follows'},
+        {'id': 'r3', 'sourceId': 'b', 'targetId': 'c', 'type': 'parent_of'},
+    ])
+    assert [r['id'] for r in backend.list_relations(source_id='a')] == ['r1', 'r2']
+    assert [r['id'] for r in backend.list_relations(target_id='c', type='parent_of')] == ['r3']
+
+
+def test_delete_records(backend):
+    backend.put_many(
+        minions=[_minion('a')],
+        relations=[{'id': 'r1', 'sourceId': 'a', 'targetId': 'b', 'type': 'parent_of'}],
+    )
+    backend.delete_minion('a')
+    backend.delete_relation('r1')
+    assert backend.export() == {'minions': [], 'relations': []}
+
+
+def test_put_relation_without_id_assigns_one(backend):
+    backend.put_relation({'sourceId': 'a', 'targetId': 'b', 'type': 'parent_of'})
+    assert backend.list_relations()[0]['id']
+
+
+def test_sqlite_uses_wal_mode(tmp_path):
+    backend = SqliteBackend(tmp_path / 'data.db')
+    mode = backend.conn.execute('PRAGMA journal_mode').fetchone()[0]
+    backend.close()
+    assert mode == 'wal'
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    source = tmp_path / 'data.json'
+    source.write_text(json.dumps({
+        'minions': [_minion('a'), _minion('b')],
+        'relations': [{'id': 'r1', 'sourceId': 'a', 'targetId': 'b', 'type': 'parent_of'}],
+    }))
+    counts = migrate_json_to_sqlite(source, tmp_path / 'data.db')
+    assert counts == {'minions': 2, 'relations': 1}
+    assert not source.exists()
+    assert (tmp_path / 'data.json.migrated').exists()
+
+    backend = SqliteBackend(tmp_path / 'data.db')
+    assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+    assert backend.list_relations(source_id='a')[0]['targetId'] == 'b'
+    backend.close()
+
+
+def test_managers_share_sqlite_backend(tmp_path):
+    backend = SqliteBackend(tmp_path / 'data.db')
+    instances = InstanceManager(storage=backend)
+    snapshots = SnapshotManager(storage=backend)
+    instance = instances.register('Gateway', 'ws://localhost:8080')
+    snapshot = snapshots.capture_snapshot(instance.id, {'config': {'port': 1}})
+    assert [i.id for i in instances.list()] == [instance.id]
+    assert [s['id'] for s in snapshots.list_snapshots(instance.id)] == [snapshot.id]
+    instances.remove(instance.id)
+    assert instances.get_by_id(instance.id) is None
+    backend.close()
+
+
+def test_compose_reads_children_from_backend(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    decomposer = ConfigDecomposer(storage=backend)
+    minions, relations = decomposer.decompose({'agents': [{'name': 'a1', 'model': 'gpt-4'}]}, 'inst-1')
+    backend.put_many(
+        minions=[m.to_dict() for m in minions],
+        relations=[{'id': r.id, 'sourceId': r.source_id, 'targetId': r.target_id, 'type': r.type} for r in relations],
+    )
+    assert decomposer.compose('inst-1')['agents'][0]['name'] == 'a1'
+
+
+def test_repeated_reads_parse_file_once(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    instances = InstanceManager(storage=backend)
+    snapshots = SnapshotManager(storage=backend)
+    instance = instances.register('Gateway', 'ws://localhost:8080')
+    snapshots.capture_snapshot(instance.id, {'config': {}})
+    backend.invalidate()
+    parsed = backend.parse_count
+    for _ in range(50):
+        instances.list()
+        instances.get_by_id(instance.id)
+        snapshots.list_snapshots(instance.id)
+    assert backend.parse_count == parsed + 1
+
+
+def test_own_writes_do_not_force_reparse(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    backend.put_minion(_minion('a'))
+    parsed = backend.parse_count
+    backend.put_minion(_minion('b'))
+    assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+    assert backend.parse_count == parsed
+
+
+def test_write_from_another_process_is_picked_up(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    other = JsonFileBackend(tmp_path / 'data.json')
+    backend.put_minion(_minion('a'))
+    assert backend.list_minions()
+    other.put_minion(_minion('b'))
+    assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+
+
+def test_deleted_file_resets_cache(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    backend.put_minion(_minion('a'))
+    (tmp_path / 'data.json').unlink()
+    assert backend.list_minions() == []
+
+
+def test_journal_replays_only_new_tail_from_other_writer(tmp_path):
+    backend = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    other = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    backend.put_minion(_minion('a'))
+    backend.list_minions()
+    parsed = backend.parse_count
+    other.put_minion(_minion('b'))
+    assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+    assert backend.parse_count == parsed
+
+
+def test_default_managers_share_one_backend():
+    assert InstanceManager().storage is SnapshotManager().storage
+    assert ConfigDecomposer().storage is InstanceManager().storage
+
+
+def test_blob_refcounting(backend):
+    backend.put_blob('d1', b'payload')
+    backend.put_blob('d1', b'payload')
+    assert backend.get_blob('d1') == b'payload'
+    backend.release_blob('d1')
+    assert backend.has_blob('d1')
+    backend.release_blob('d1')
+    assert not backend.has_blob('d1')
+    assert backend.get_blob('d1') is None
+
+
+def test_blob_release_rolled_back_keeps_payload(backend):
+    backend.put_blob('d1', b'payload')
+    with pytest.raises(RuntimeError):
+        with backend.transaction():
+            backend.release_blob('d1')
+            raise RuntimeError('boom')
+    assert backend.get_blob('d1') == b'payload'
+
+
+def test_put_blob_stream_matches_put_blob(backend):
+    chunks = [b'{"port":', b'1', b'}']
+    digest = backend.put_blob_stream(iter(chunks))
+    assert digest == content_digest(b'{"port":1}')
+    assert backend.get_blob(digest) == b'{"port":1}'
+    backend.put_blob(digest, b'{"port":1}')
+    backend.release_blob(digest)
+    assert backend.has_blob(digest)
+    backend.release_blob(digest)
+    assert not backend.has_blob(digest)
+
+
+def test_put_blob_stream_handles_large_payloads(backend):
+    payload = {'items': [{'id': i, 'text': 'x' * 100} for i in range(5000)]}
+    digest = backend.put_blob_stream(canonical_chunks(payload))
+    assert digest == canonical_digest(payload)
+    assert backend.get_blob(digest) == canonical_json(payload)
+
+
+def test_canonical_chunks_join_to_canonical_json():
+    values = [
+        {},
+        [],
+        {'b': [1, 2.5, None, True], 'a': {'z': 'é', 'y': list(range(100))}},
+        {'deep': {'keys': {f'k{i}': {'v': i} for i in range(80)}}},
+        [[{'x': i}] * 3 for i in range(70)],
+        'plain',
+    ]
+    for value in values:
+        assert b''.join(canonical_chunks(value)) == canonical_json(value)
+        assert canonical_digest(value) == content_digest(canonical_json(value))
+
+
+def test_reading_block_sees_its_own_writes(backend):
+    backend.put_minion(_minion('a'))
+    with backend.reading():
+        assert backend.get_minion('a')['id'] == 'a'
+        with backend.reading():
+            backend.put_minion(_minion('b'))
+        assert [m['id'] for m in backend.list_minions()] == ['a', 'b']
+    assert backend.get_minion('b')['id'] == 'b'
+
+
+def test_reading_block_checks_disk_once(tmp_path):
+    backend = JsonFileBackend(tmp_path / 'data.json')
+    backend.put_minion(_minion('a'))
+    other = JsonFileBackend(tmp_path / 'data.json')
+    with backend.reading():
+        other.put_minion(_minion('b'))
+        assert backend.get_minion('b') is None
+    assert backend.get_minion('b')['id'] == 'b'
+
+
+def test_migrate_includes_pending_journal_entries(tmp_path):
+    source = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    for id in 'abcde':
+        source.put_minion(_minion(id))
+    source.compact()
+    source.put_minion(_minion('f'))
+    assert source.journal_size() > 0
+    counts = migrate_json_to_sqlite(tmp_path / 'data.json', tmp_path / 'data.db')
+    assert counts['minions'] == 6
+    assert not (tmp_path / 'data.json.journal').exists()
+    backend = SqliteBackend(tmp_path / 'data.db')
+    assert [m['id'] for m in backend.list_minions()] == list('abcdef')
+    backend.close()
+
+
+def test_migrate_journal_only_store(tmp_path):
+    source = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    source.put_minion(_minion('a'))
+    assert not (tmp_path / 'data.json').exists()
+    assert migrate_json_to_sqlite(tmp_path / 'data.json', tmp_path / 'data.db')['minions'] == 1
+
+
+def test_migrate_refuses_when_journal_grows(tmp_path, monkeypatch):
+    source = JournalBackend(tmp_path / 'data.json', background_compaction=False)
+    source.put_minion(_minion('a'))
+    put_many = SqliteBackend.put_many
+
+    def racing_put_many(self, **kwargs):
+        put_many(self, **kwargs)
+        JournalBackend(tmp_path / 'data.json').put_minion(_minion('late'))
+    monkeypatch.setattr(SqliteBackend, 'put_many', racing_put_many)
+    with pytest.raises(RuntimeError):
+        migrate_json_to_sqlite(tmp_path / 'data.json', tmp_path / 'data.db')
+    assert (tmp_path / 'data.json').exists()
+    assert {m['id'] for m in JournalBackend(tmp_path / 'data.json').list_minions()} == {'a', 'late'}
+
+
+def test_migrate_copies_blobs(tmp_path):
+    source = JsonFileBackend(tmp_path / 'data.json')
+    source.put_minion(_minion('a'))
+    source.put_blob('d1', b'{"port":1}')
+    source.put_blob('d1', b'{"port":1}')
+    migrate_json_to_sqlite(tmp_path / 'data.json', tmp_path / 'data.db')
+    backend = SqliteBackend(tmp_path / 'data.db')
+    assert backend.get_blob('d1') == b'{"port":1}'
+    backend.release_blob('d1')
+    assert backend.has_blob('d1')
+    backend.close()
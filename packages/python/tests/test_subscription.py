@@ -0,0 +1,114 @@
+"""Tests for server-push subscriptions on GatewayClient."""
+import asyncio
+
+import pytest
+
+from minions_openclaw.gateway_client import GatewayClient
+from minions_openclaw.subscription import Subscription, SubscriptionOverflow
+
+
+async def _open(connect):
+    client = GatewayClient(url='ws://gw', connect=connect)
+    await client.open_connection()
+    return client
+
+
+async def _next(subscription):
+    return await asyncio.wait_for(subscription.__anext__(), timeout=1)
+
+
+async def test_subscription_receives_matching_events(fake_gateway):
+    connect, sockets = fake_gateway
+    client = await _open(connect)
+    presence = client.subscribe('presence')
+    everything = client.subscribe()
+    sockets[0].push({'type': 'event', 'event': 'presence', 'payload': {'n': 1}})
+    sockets[0].push({'type': 'event', 'event': 'agent', 'payload': {'n': 2}})
+    assert (await _next(presence))['payload'] == {'n': 1}
+    assert [(await _next(everything))['event'] for _ in range(2)] == ['presence', 'agent']
+    await client.close()
+
+
+async def test_callbacks_and_unsubscribe(fake_gateway):
+    connect, sockets = fake_gateway
+    client = await _open(connect)
+    seen = []
+    off = client.on('agent', lambda frame: seen.append(frame['payload']))
+    sockets[0].push({'type': 'event', 'event': 'agent', 'payload': 1})
+    await asyncio.sleep(0.01)
+    off()
+    sockets[0].push({'type': 'event', 'event': 'agent', 'payload': 2})
+    await asyncio.sleep(0.01)
+    assert seen == [1]
+    await client.close()
+
+
+async def test_async_callback_errors_are_logged_and_close_cancels_the_rest(fake_gateway, caplog):
+    connect, sockets = fake_gateway
+    client = await _open(connect)
+    started = asyncio.Event()
+    cancelled = []
+
+    async def broken(frame):
+        raise ValueError('boom')
+
+    async def slow(frame):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(frame['payload'])
+            raise
+    client.on('broken', broken)
+    client.on('slow', slow)
+    sockets[0].push({'type': 'event', 'event': 'broken'})
+    sockets[0].push({'type': 'event', 'event': 'slow', 'payload': 1})
+    await asyncio.wait_for(started.wait(), timeout=1)
+    assert 'Event callback for broken failed' in caplog.text
+    assert 'boom' in caplog.text
+    assert len(client._callback_tasks) == 1
+    await client.close()
+    assert cancelled == [1] and not client._callback_tasks
+
+
+def test_drop_oldest_keeps_latest_frames():
+    sub = Subscription(None, maxsize=2)
+    for n in range(5):
+        sub.push({'n': n})
+    assert sub.dropped == 3
+    assert [f['n'] for f in sub._frames] == [3, 4]
+
+
+def test_drop_newest_keeps_earliest_frames():
+    sub = Subscription(None, maxsize=2, overflow='drop_newest')
+    for n in range(5):
+        sub.push({'n': n})
+    assert [f['n'] for f in sub._frames] == [0, 1]
+
+
+async def test_raise_policy_ends_subscription_after_backlog():
+    sub = Subscription(None, maxsize=1, overflow='raise')
+    sub.push({'n': 0})
+    sub.push({'n': 1})
+    assert (await _next(sub)) == {'n': 0}
+    with pytest.raises(SubscriptionOverflow):
+        await _next(sub)
+
+
+def test_unknown_overflow_policy_rejected():
+    with pytest.raises(ValueError):
+        Subscription(None, overflow='block')
+
+
+async def test_close_ends_iteration_and_connection_loss_raises(fake_gateway):
+    connect, sockets = fake_gateway
+    client = await _open(connect)
+    with client.subscribe('presence') as sub:
+        pass
+    with pytest.raises(StopAsyncIteration):
+        await _next(sub)
+    live = client.subscribe('presence')
+    sockets[0].drop()
+    with pytest.raises(ConnectionError):
+        await _next(live)
+    await client.close()